@@ -0,0 +1,76 @@
+"""Adaptive polling interval for the background service."""
+
+import random
+import threading
+from typing import Optional
+import config
+
+
+class AdaptivePollInterval:
+    """Pick the delay before the next poll from how recent polls went.
+    
+    Busy polls (many trades, or a full page from the API) halve the interval
+    so whales are seen sooner. Empty or failed polls multiply it by the
+    backoff factor, up to the maximum. A poll with some trades settles back to
+    the base interval. Each delay gets random jitter within the bounds.
+    """
+    
+    def __init__(
+        self,
+        base_seconds: float = config.POLL_INTERVAL_MINUTES * 60,
+        min_seconds: float = config.POLL_MIN_SECONDS,
+        max_seconds: float = config.POLL_MAX_SECONDS,
+        busy_trades: int = config.POLL_BUSY_TRADES,
+        backoff_factor: float = config.POLL_BACKOFF_FACTOR,
+        jitter: float = config.POLL_JITTER,
+        rng: Optional[random.Random] = None
+    ):
+        """
+        Initialize the interval.
+        
+        Args:
+            base_seconds: Interval for ordinary activity
+            min_seconds: Lower bound
+            max_seconds: Upper bound
+            busy_trades: Trades per poll that count as busy
+            backoff_factor: Multiplier after empty or failed polls
+            jitter: Random +/- fraction applied to each delay
+            rng: Random source (for tests)
+        """
+        self.base_seconds = base_seconds
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.busy_trades = busy_trades
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.current = self._clamp(base_seconds)
+        self._lock = threading.Lock()
+        
+    def _clamp(self, seconds: float) -> float:
+        """Keep a delay within the configured bounds."""
+        return max(self.min_seconds, min(self.max_seconds, seconds))
+        
+    def record(self, new_trades: int, hit_page_limit: bool, ok: bool):
+        """
+        Adjust the interval after a poll.
+        
+        Args:
+            new_trades: Trades the poll stored that were not seen before;
+                rows re-read from the poll overlap do not count
+            hit_page_limit: True if the API returned at least one full page
+            ok: False if the poll failed
+        """
+        with self._lock:
+            if not ok or new_trades == 0:
+                self.current = self._clamp(self.current * self.backoff_factor)
+            elif hit_page_limit or new_trades >= self.busy_trades:
+                self.current = self._clamp(self.current / 2)
+            else:
+                self.current = self._clamp(self.base_seconds)
+                
+    def next_delay(self) -> float:
+        """Get the delay before the next poll, with jitter applied."""
+        with self._lock:
+            spread = self.current * self.jitter
+            return self._clamp(self.current + self.rng.uniform(-spread, spread))
@@ -0,0 +1,259 @@
+"""Alert rules evaluated locally over the fetched trade feed."""
+
+import bisect
+import json
+from typing import Dict, Iterable, List, Optional
+import config
+
+
+class AlertRule:
+    """One alert condition on a trade.
+    
+    Every set field must match: amount within [min_amount, max_amount),
+    market (event slug or market slug), outcome, side, and trader address
+    within the watchlist.
+    """
+    
+    FIELDS = ('name', 'min_amount', 'max_amount', 'market', 'outcome', 'side', 'traders')
+    
+    def __init__(
+        self,
+        name: str,
+        min_amount: float = 0.0,
+        max_amount: Optional[float] = None,
+        market: Optional[str] = None,
+        outcome: Optional[str] = None,
+        side: Optional[str] = None,
+        traders: Optional[Iterable[str]] = None
+    ):
+        """
+        Initialize rule.
+        
+        Args:
+            name: Name shown for matches
+            min_amount: Smallest matching trade amount in USD
+            max_amount: Amount the band stops at (exclusive), None for no cap
+            market: Event or market slug to match
+            outcome: Outcome to match (case-insensitive)
+            side: BUY or SELL
+            traders: Trader addresses to watch (case-insensitive)
+        """
+        if max_amount is not None and max_amount <= min_amount:
+            raise ValueError(f"Rule {name!r}: max_amount must exceed min_amount")
+        if side is not None and (not isinstance(side, str) or side.upper() not in ('BUY', 'SELL')):
+            raise ValueError(f"Rule {name!r}: side must be BUY or SELL")
+        if traders is not None and (
+            isinstance(traders, str) or not all(isinstance(t, str) for t in traders)
+        ):
+            raise ValueError(f"Rule {name!r}: traders must be a list of addresses")
+        for field, value in (('market', market), ('outcome', outcome)):
+            if value is not None and not isinstance(value, str):
+                raise ValueError(f"Rule {name!r}: {field} must be a string")
+            
+        self.name = name
+        self.min_amount = float(min_amount)
+        self.max_amount = float(max_amount) if max_amount is not None else None
+        self.market = market or None
+        self.outcome = outcome.lower() if outcome else None
+        self.side = side.upper() if side else None
+        self.traders = frozenset(t.lower() for t in traders) if traders else None
+        
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'AlertRule':
+        """
+        Build a rule from its settings representation.
+        
+        Every custom rule must set min_amount, at least ALERT_RULE_MIN_AMOUNT:
+        the lowest rule floor is the fetch threshold, so a rule without one
+        would make the service ingest the whole trade feed.
+        """
+        if not isinstance(data, dict):
+            raise ValueError("Alert rule must be an object")
+        unknown = set(data) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown alert rule fields: {', '.join(sorted(unknown))}")
+        if not data.get('name') or not isinstance(data['name'], str):
+            raise ValueError("Alert rule needs a name")
+        min_amount = data.get('min_amount')
+        if isinstance(min_amount, bool) or not isinstance(min_amount, (int, float)):
+            raise ValueError(f"Rule {data['name']!r}: min_amount is required")
+        if min_amount < config.ALERT_RULE_MIN_AMOUNT:
+            raise ValueError(
+                f"Rule {data['name']!r}: min_amount must be at least "
+                f"${config.ALERT_RULE_MIN_AMOUNT:,.0f}"
+            )
+        return cls(**data)
+        
+    def to_dict(self) -> Dict:
+        """Get the settings representation of the rule."""
+        data = {'name': self.name, 'min_amount': self.min_amount}
+        if self.max_amount is not None:
+            data['max_amount'] = self.max_amount
+        if self.market:
+            data['market'] = self.market
+        if self.outcome:
+            data['outcome'] = self.outcome
+        if self.side:
+            data['side'] = self.side
+        if self.traders:
+            data['traders'] = sorted(self.traders)
+        return data
+        
+    def matches(self, trade: Dict) -> bool:
+        """Check every condition of the rule against a trade."""
+        amount = trade.get('amount', 0)
+        if amount < self.min_amount:
+            return False
+        if self.max_amount is not None and amount >= self.max_amount:
+            return False
+        if self.market and self.market not in _market_keys(trade):
+            return False
+        if self.outcome and (trade.get('outcome') or '').lower() != self.outcome:
+            return False
+        if self.side and (trade.get('side') or '').upper() != self.side:
+            return False
+        if self.traders and (trade.get('trader_address') or '').lower() not in self.traders:
+            return False
+        return True
+
+
+def _market_keys(trade: Dict) -> List[str]:
+    """Slugs a trade can be matched on: its event slug and its market slug."""
+    keys = [trade.get('market_id')]
+    details = trade.get('details')
+    if isinstance(details, dict):
+        keys.append(details.get('slug'))
+    return [key for key in keys if key]
+
+
+class _Bucket:
+    """Rules sharing an index key, sorted by min_amount."""
+    
+    def __init__(self):
+        """Initialize an empty bucket."""
+        self.min_amounts: List[float] = []
+        self.rules: List[AlertRule] = []
+        
+    def add(self, rule: AlertRule):
+        """Insert a rule, keeping the bucket sorted."""
+        index = bisect.bisect_right(self.min_amounts, rule.min_amount)
+        self.min_amounts.insert(index, rule.min_amount)
+        self.rules.insert(index, rule)
+        
+    def candidates(self, amount: float) -> List[AlertRule]:
+        """Rules whose min_amount the amount reaches."""
+        return self.rules[:bisect.bisect_right(self.min_amounts, amount)]
+
+
+class AlertRuleSet:
+    """Compiled set of alert rules.
+    
+    Rules are indexed by trader (watchlist rules), then by market, with the
+    rest in one generic bucket; each bucket is sorted by min_amount. A trade
+    is only checked against the rules of its own trader and market buckets
+    whose amount floor it reaches, so hundreds of rules stay cheap per trade.
+    The whole feed is fetched once at fetch_threshold, the lowest floor.
+    """
+    
+    SETTING_KEY = 'alert_rules'
+    
+    def __init__(self, rules: Iterable[AlertRule]):
+        """
+        Compile rules.
+        
+        Args:
+            rules: Alert rules
+        """
+        self.rules = list(rules)
+        self.by_trader: Dict[str, _Bucket] = {}
+        self.by_market: Dict[str, _Bucket] = {}
+        self.generic = _Bucket()
+        
+        for rule in self.rules:
+            if rule.traders:
+                for trader in rule.traders:
+                    self.by_trader.setdefault(trader, _Bucket()).add(rule)
+            elif rule.market:
+                self.by_market.setdefault(rule.market, _Bucket()).add(rule)
+            else:
+                self.generic.add(rule)
+                
+    @property
+    def min_threshold(self) -> float:
+        """Lowest amount any rule can match."""
+        return min((rule.min_amount for rule in self.rules), default=0.0)
+        
+    @property
+    def fetch_threshold(self) -> float:
+        """Amount to fetch at: the lowest rule floor, or lower if the anomaly detector needs it."""
+        if config.ANOMALY_MIN_AMOUNT is None:
+            return self.min_threshold
+        return min(self.min_threshold, config.ANOMALY_MIN_AMOUNT)
+        
+    def evaluate(self, trade: Dict) -> List[AlertRule]:
+        """
+        Get the rules a trade matches.
+        
+        Args:
+            trade: Trade dictionary
+            
+        Returns:
+            Matching rules, each at most once
+        """
+        amount = trade.get('amount', 0)
+        buckets = [self.generic]
+        trader = (trade.get('trader_address') or '').lower()
+        if trader in self.by_trader:
+            buckets.append(self.by_trader[trader])
+        for key in _market_keys(trade):
+            if key in self.by_market:
+                buckets.append(self.by_market[key])
+                
+        matched = []
+        for bucket in buckets:
+            for rule in bucket.candidates(amount):
+                if rule not in matched and rule.matches(trade):
+                    matched.append(rule)
+        return matched
+        
+    @classmethod
+    def from_json(cls, value: Optional[str], whale_threshold: float, strict: bool = True) -> 'AlertRuleSet':
+        """
+        Build the rule set from its settings JSON.
+        
+        The whale threshold is always present as the rule named 'whale', so
+        with no custom rules stored the behaviour is a plain threshold.
+        
+        Args:
+            value: JSON list of rule dictionaries, or None
+            whale_threshold: Current whale threshold
+            strict: Raise on an invalid rule instead of skipping it
+            
+        Raises:
+            ValueError: If strict and a rule is invalid
+        """
+        rules = [AlertRule('whale', min_amount=whale_threshold)]
+        for data in json.loads(value) if value else []:
+            try:
+                rule = AlertRule.from_dict(data)
+            except (ValueError, TypeError) as e:
+                if strict:
+                    raise
+                print(f"Skipping invalid alert rule: {e}")
+                continue
+            if rule.name != 'whale':
+                rules.append(rule)
+        return cls(rules)
+        
+    def to_json(self) -> str:
+        """Get the settings JSON of the custom rules (without 'whale')."""
+        return json.dumps([rule.to_dict() for rule in self.rules if rule.name != 'whale'])
+        
+    @classmethod
+    def load(cls, db) -> 'AlertRuleSet':
+        """Load the rule set from the settings table, skipping rules no longer valid."""
+        return cls.from_json(db.get_setting(cls.SETTING_KEY), db.get_whale_threshold(), strict=False)
+        
+    def save(self, db):
+        """Store the custom rules in the settings table."""
+        db.set_setting(self.SETTING_KEY, self.to_json())
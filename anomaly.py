@@ -0,0 +1,342 @@
+"""Per-market baselines that flag trades unusually large for their market."""
+
+import math
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+import config
+
+
+class TDigest:
+    """Merging t-digest for streaming quantile estimates.
+    
+    Values are buffered and merged into centroids sized by the arcsine
+    scale function, so centroids near the tails stay small and extreme
+    quantiles such as p99.5 remain accurate while the digest holds about
+    compression / 2 centroids however many values it has seen.
+    """
+    
+    def __init__(self, compression: float = config.ANOMALY_DIGEST_COMPRESSION):
+        """
+        Initialize an empty digest.
+        
+        Args:
+            compression: Accuracy/size trade-off; about half this many centroids are kept
+        """
+        self.compression = compression
+        self.means: List[float] = []
+        self.counts: List[float] = []
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: List[Tuple[float, float]] = []
+        
+    def __len__(self) -> int:
+        """Number of values added."""
+        return int(self.total + sum(weight for _, weight in self._buffer))
+        
+    def add(self, value: float, weight: float = 1.0):
+        """
+        Add a value.
+        
+        Args:
+            value: Observed value
+            weight: Number of times it was observed
+        """
+        self._buffer.append((value, weight))
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= 5 * self.compression:
+            self._merge()
+            
+    def _merge(self):
+        """Fold buffered values into the centroids."""
+        if not self._buffer:
+            return
+            
+        points = sorted(list(zip(self.means, self.counts)) + self._buffer)
+        self._buffer = []
+        total = sum(count for _, count in points)
+        
+        means, counts = [], []
+        seen = 0.0
+        mean, count = points[0]
+        limit = self._next_limit(0.0)
+        for value, weight in points[1:]:
+            if (seen + count + weight) / total <= limit:
+                count += weight
+                mean += (value - mean) * weight / count
+            else:
+                means.append(mean)
+                counts.append(count)
+                seen += count
+                mean, count = value, weight
+                limit = self._next_limit(seen / total)
+        means.append(mean)
+        counts.append(count)
+        
+        self.means, self.counts, self.total = means, counts, total
+        
+    def _next_limit(self, q: float) -> float:
+        """Largest quantile a centroid starting at q may reach (one unit of k)."""
+        k = math.asin(2 * q - 1) + 2 * math.pi / self.compression
+        return (math.sin(min(k, math.pi / 2)) + 1) / 2
+        
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile.
+        
+        Args:
+            q: Quantile from 0 to 1
+            
+        Returns:
+            Estimated value, or None if the digest is empty
+        """
+        self._merge()
+        if not self.counts:
+            return None
+            
+        # Interpolate between centroid centers, and out to min/max at the ends
+        target = q * self.total
+        previous_center, previous_mean = 0.0, self.min
+        seen = 0.0
+        for mean, count in zip(self.means, self.counts):
+            center = seen + count / 2
+            if target < center:
+                fraction = (target - previous_center) / (center - previous_center)
+                return previous_mean + fraction * (mean - previous_mean)
+            previous_center, previous_mean = center, mean
+            seen += count
+            
+        if self.total == previous_center:
+            return self.max
+        fraction = (target - previous_center) / (self.total - previous_center)
+        return previous_mean + fraction * (self.max - previous_mean)
+        
+    def to_bytes(self) -> bytes:
+        """Serialize as packed doubles: min, max, then mean/count pairs."""
+        self._merge()
+        values = array('d', [self.min, self.max])
+        for mean, count in zip(self.means, self.counts):
+            values.extend((mean, count))
+        return values.tobytes()
+        
+    @classmethod
+    def from_bytes(cls, data: bytes, compression: float = config.ANOMALY_DIGEST_COMPRESSION) -> 'TDigest':
+        """Rebuild a digest serialized by to_bytes."""
+        values = array('d')
+        values.frombytes(data)
+        digest = cls(compression)
+        digest.min, digest.max = values[0], values[1]
+        digest.means = list(values[2::2])
+        digest.counts = list(values[3::2])
+        digest.total = sum(digest.counts)
+        return digest
+
+
+class MarketBaseline:
+    """Streaming trade size baseline of one market.
+    
+    Keeps an EWMA mean and variance of log(amount), which follow the
+    market's recent level, and a t-digest of amounts for its quantiles.
+    """
+    
+    def __init__(
+        self,
+        market_id: str,
+        alpha: float = config.ANOMALY_EWMA_ALPHA,
+        compression: float = config.ANOMALY_DIGEST_COMPRESSION
+    ):
+        """
+        Initialize an empty baseline.
+        
+        Args:
+            market_id: Market the baseline describes
+            alpha: Weight of each new trade in the EWMA moments
+            compression: t-digest compression
+        """
+        self.market_id = market_id
+        self.alpha = alpha
+        self.sample_count = 0
+        self.ewma_mean = 0.0
+        self.ewma_variance = 0.0
+        self.digest = TDigest(compression)
+        self.updated_at = 0
+        
+    def observe(self, amount: float, timestamp: int):
+        """
+        Add a trade to the baseline.
+        
+        Args:
+            amount: Trade amount in USD
+            timestamp: Trade time
+        """
+        value = math.log(max(amount, 1.0))
+        if self.sample_count == 0:
+            self.ewma_mean = value
+        else:
+            diff = value - self.ewma_mean
+            increment = self.alpha * diff
+            self.ewma_mean += increment
+            self.ewma_variance = (1 - self.alpha) * (self.ewma_variance + diff * increment)
+            
+        self.digest.add(amount)
+        self.sample_count += 1
+        self.updated_at = max(self.updated_at, timestamp)
+        
+    def z_score(self, amount: float) -> Optional[float]:
+        """z-score of log(amount) against the EWMA moments."""
+        if self.ewma_variance <= 0:
+            return None
+        # The variance starts at zero, so early on it is scaled up by the
+        # weight it has accumulated so far
+        variance = self.ewma_variance / (1 - (1 - self.alpha) ** (self.sample_count - 1))
+        return (math.log(max(amount, 1.0)) - self.ewma_mean) / math.sqrt(variance)
+        
+    def to_row(self) -> Dict:
+        """Get the market_baselines row of the baseline."""
+        return {
+            'market_id': self.market_id,
+            'sample_count': self.sample_count,
+            'ewma_mean': self.ewma_mean,
+            'ewma_variance': self.ewma_variance,
+            'digest': self.digest.to_bytes(),
+            'updated_at': self.updated_at
+        }
+        
+    @classmethod
+    def from_row(
+        cls,
+        row: Dict,
+        alpha: float = config.ANOMALY_EWMA_ALPHA,
+        compression: float = config.ANOMALY_DIGEST_COMPRESSION
+    ) -> 'MarketBaseline':
+        """Rebuild a baseline from its market_baselines row."""
+        baseline = cls(row['market_id'], alpha, compression)
+        baseline.sample_count = row['sample_count']
+        baseline.ewma_mean = row['ewma_mean']
+        baseline.ewma_variance = row['ewma_variance']
+        baseline.digest = TDigest.from_bytes(row['digest'], compression)
+        baseline.updated_at = row['updated_at']
+        return baseline
+        
+    def summary(self, quantile: float = config.ANOMALY_QUANTILE) -> Dict:
+        """Get the baseline's figures for display."""
+        return {
+            'market_id': self.market_id,
+            'sample_count': self.sample_count,
+            'typical_amount': math.exp(self.ewma_mean) if self.sample_count else None,
+            'ewma_log_std': math.sqrt(self.ewma_variance),
+            'median': self.digest.quantile(0.5),
+            'threshold': self.digest.quantile(quantile),
+            'updated_at': self.updated_at
+        }
+
+
+class AnomalyDetector:
+    """Ingest stage flagging trades above their market's usual sizes.
+    
+    Each new trade is scored against its market's baseline before being
+    added to it: a trade is unusual when the market has at least
+    min_samples trades, the amount exceeds the market's quantile (p99.5 by
+    default), and it is z_threshold deviations above the EWMA level. The
+    z-score check keeps young markets, whose p99.5 is still close to their
+    largest trade, from flagging every new maximum. Baselines are loaded
+    from SQLite on first use and written back after every batch, so a
+    restart resumes where it left off.
+    """
+    
+    def __init__(
+        self,
+        db,
+        quantile: float = config.ANOMALY_QUANTILE,
+        min_samples: int = config.ANOMALY_MIN_SAMPLES,
+        z_threshold: float = config.ANOMALY_Z_THRESHOLD,
+        alpha: float = config.ANOMALY_EWMA_ALPHA,
+        compression: float = config.ANOMALY_DIGEST_COMPRESSION
+    ):
+        """
+        Initialize the detector.
+        
+        Args:
+            db: Connected database holding the baselines
+            quantile: Per-market quantile above which trades are flagged
+            min_samples: Trades a market needs before it flags
+            z_threshold: Smallest z-score of log(amount) flagged
+            alpha: Weight of each new trade in the EWMA moments
+            compression: t-digest compression
+        """
+        self.db = db
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.z_threshold = z_threshold
+        self.alpha = alpha
+        self.compression = compression
+        self.baselines: Dict[str, MarketBaseline] = {}
+        self._lock = threading.Lock()
+        
+    def _load(self, market_ids: Iterable[str]):
+        """Make sure the baselines of the given markets are in memory."""
+        missing = [market_id for market_id in market_ids if market_id not in self.baselines]
+        if not missing:
+            return
+            
+        rows = self.db.get_market_baselines(missing)
+        for market_id in missing:
+            row = rows.get(market_id)
+            self.baselines[market_id] = (
+                MarketBaseline.from_row(row, self.alpha, self.compression) if row
+                else MarketBaseline(market_id, self.alpha, self.compression)
+            )
+            
+    def process(self, trades: List[Dict]) -> List[Dict]:
+        """
+        Score new trades, then add them to their baselines.
+        
+        Flagged trades get an 'anomaly' entry with the market threshold
+        they exceeded, their EWMA z-score and the baseline's sample count.
+        Pass only trades not stored yet, or re-fetched trades are counted
+        twice.
+        
+        Args:
+            trades: Trade dictionaries
+            
+        Returns:
+            The flagged trades, oldest first
+        """
+        if not trades:
+            return []
+            
+        flagged = []
+        with self._lock:
+            self._load({trade.get('market_id') or '' for trade in trades})
+            touched = {}
+            
+            for trade in sorted(trades, key=lambda t: (t['timestamp'], t.get('id') or 0)):
+                baseline = self.baselines[trade.get('market_id') or '']
+                amount = trade['amount']
+                
+                if baseline.sample_count >= self.min_samples:
+                    threshold = baseline.digest.quantile(self.quantile)
+                    z_score = baseline.z_score(amount)
+                    # No spread yet: every earlier trade had the same size
+                    if amount > threshold and (z_score is None or z_score >= self.z_threshold):
+                        trade['anomaly'] = {
+                            'threshold': threshold,
+                            'quantile': self.quantile,
+                            'z_score': z_score,
+                            'sample_count': baseline.sample_count
+                        }
+                        flagged.append(trade)
+                        
+                baseline.observe(amount, trade['timestamp'])
+                touched[baseline.market_id] = baseline
+                
+            self.db.save_market_baselines([baseline.to_row() for baseline in touched.values()])
+        return flagged
+        
+    def baseline(self, market_id: str) -> MarketBaseline:
+        """Get a market's baseline, loading it if needed."""
+        with self._lock:
+            self._load([market_id])
+            return self.baselines[market_id]
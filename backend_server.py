@@ -1,12 +1,19 @@
 """Flask API server for Electron frontend."""
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from datetime import datetime
+import json
 import threading
+import config
+from alert_rules import AlertRuleSet
+from anomaly import MarketBaseline
 from database import Database
+from event_bus import EventBus
 from polymarket_api import PolymarketAPI
 from notifier_service import NotifierService
+from response_cache import ResponseCache
+from trade_window import TradeWindow
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for Electron
@@ -17,11 +24,47 @@ print("Connecting to database...")
 db.connect()  # Connect immediately
 print(f"Database connected. Transaction count: {db.get_transaction_count()}")
 api_client = PolymarketAPI()
+trade_bus = EventBus()
+response_cache = ResponseCache()
+trade_window = TradeWindow()
+trade_window.load(db, int(datetime.now().timestamp()) - config.TRADE_WINDOW_HOURS * 3600)
 notifier = None
 
+@app.teardown_appcontext
+def release_db_connection(exception):
+    """Return the request thread's connection to the pool."""
+    db.release_connection()
+
+def cached_json(key, build):
+    """Serve a read endpoint from the response cache.
+    
+    The body is rebuilt only after the database has been written to, and a
+    request whose If-None-Match matches the current ETag gets a bare 304.
+    """
+    etag, body = response_cache.get(key, db.write_generation, build)
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def parse_cursor(value):
+    """Parse a 'timestamp,id' pagination cursor into a tuple."""
+    timestamp, tx_id = value.split(',')
+    return int(timestamp), int(tx_id)
+
+def format_cursor(tx):
+    """Format a transaction's position as a 'timestamp,id' cursor."""
+    return f"{tx['timestamp']},{tx['id']}"
+
 @app.route('/api/transactions', methods=['GET'])
 def get_transactions():
-    """Get all whale transactions."""
+    """Get a page of whale transactions.
+    
+    Supports keyset pagination with ?before=<timestamp,id> (older rows) or
+    ?after=<timestamp,id> (newer rows). next_cursor pages further back.
+    With ?since_id=N only rows inserted after id N are returned. Every
+    response carries latest_id, the client's next high-water mark.
+    """
     try:
         # Get limit from query parameter, default to 100
         limit = request.args.get('limit', default=100, type=int)
@@ -29,12 +72,44 @@ def get_transactions():
         # Ensure limit is reasonable (between 1 and 500)
         limit = max(1, min(500, limit))
         
-        transactions = db.get_all_transactions(limit=limit)
-        return jsonify({
-            'success': True,
-            'transactions': transactions,
-            'count': len(transactions)
-        })
+        # Malformed cursors come back as None from request.args.get
+        since_id = request.args.get('since_id', type=int)
+        before = request.args.get('before', type=parse_cursor)
+        after = request.args.get('after', type=parse_cursor)
+        if ('before' in request.args and before is None) or ('after' in request.args and after is None):
+            return jsonify({
+                'success': False,
+                'error': 'Invalid cursor: expected <timestamp>,<id>'
+            }), 400
+            
+        def build():
+            # Trades below the whale threshold (kept for lower alert rules or
+            # from a higher old threshold) are filtered out on read
+            threshold = db.get_whale_threshold()
+            latest_id = db.get_latest_transaction_id()
+            if since_id is not None:
+                transactions = (
+                    db.get_transactions_since(since_id, limit, min_amount=threshold)
+                    if since_id < latest_id else []
+                )
+                return {
+                    'success': True,
+                    'transactions': transactions,
+                    'count': len(transactions),
+                    'latest_id': latest_id
+                }
+                
+            transactions = db.get_transactions_page(limit, before=before, after=after, min_amount=threshold)
+            return {
+                'success': True,
+                'transactions': transactions,
+                'count': len(transactions),
+                'latest_id': latest_id,
+                'next_cursor': format_cursor(transactions[-1]) if len(transactions) == limit else None,
+                'prev_cursor': format_cursor(transactions[0]) if transactions else None
+            }
+            
+        return cached_json(('transactions', limit, since_id, before, after), build)
     except Exception as e:
         import traceback
         print(f"ERROR in /api/transactions: {str(e)}")
@@ -44,20 +119,131 @@ def get_transactions():
             'error': str(e)
         }), 500
 
-@app.route('/api/status', methods=['GET'])
-def get_status():
-    """Get service status."""
+@app.route('/api/transactions/version', methods=['GET'])
+def get_transactions_version():
+    """Get the feed version (largest transaction id) without any rows."""
+    try:
+        return jsonify({
+            'success': True,
+            'latest_id': db.get_latest_transaction_id()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/transactions/<tx_hash>', methods=['GET'])
+def get_transaction_details(tx_hash):
+    """Get one transaction with its details and raw API payload."""
+    try:
+        tx = db.get_transaction_by_hash(tx_hash, include_raw=True)
+        if tx is None:
+            return jsonify({
+                'success': False,
+                'error': 'Transaction not found'
+            }), 404
+            
+        details_json = tx.pop('details_json', None)
+        tx['details'] = json.loads(details_json) if details_json else {}
+        tx['details'].pop('raw_data', None)  # legacy rows; already in tx['raw_data']
+        
+        return jsonify({
+            'success': True,
+            'transaction': tx
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/markets/top', methods=['GET'])
+def get_top_markets():
+    """Get markets ranked by whale volume over the last ?hours (default 24)."""
+    try:
+        hours = max(1, min(24 * 365, request.args.get('hours', default=24, type=int)))
+        limit = max(1, min(100, request.args.get('limit', default=10, type=int)))
+        
+        # Windows start on an hour boundary, so the key changes once an hour
+        since = (int(datetime.now().timestamp()) // 3600 - hours + 1) * 3600
+        
+        def build():
+            return {
+                'success': True,
+                'since': since,
+                'markets': db.get_top_markets(since, limit)
+            }
+            
+        return cached_json(('markets_top', since, limit), build)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/markets/<path:market_id>/baseline', methods=['GET'])
+def get_market_baseline(market_id):
+    """Get the trade size baseline the anomaly detector keeps for a market."""
+    try:
+        row = db.get_market_baselines([market_id]).get(market_id)
+        if row is None:
+            return jsonify({
+                'success': False,
+                'error': 'No baseline for this market'
+            }), 404
+            
+        return jsonify({
+            'success': True,
+            'baseline': MarketBaseline.from_row(row).summary()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/traders/top', methods=['GET'])
+def get_top_traders():
+    """Get wallets ranked by whale volume over the last ?days (default 7)."""
+    try:
+        days = max(1, min(365, request.args.get('days', default=7, type=int)))
+        limit = max(1, min(100, request.args.get('limit', default=10, type=int)))
+        
+        # Windows start on a (UTC) day boundary
+        since = (int(datetime.now().timestamp()) // 86400 - days + 1) * 86400
+        
+        def build():
+            return {
+                'success': True,
+                'since': since,
+                'traders': db.get_top_traders(since, limit)
+            }
+            
+        return cached_json(('traders_top', since, limit), build)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def analytics_since():
+    """Start of the analytics window from ?hours (default 24)."""
+    hours = max(1, min(config.TRADE_WINDOW_HOURS, request.args.get('hours', default=24, type=int)))
+    return int(datetime.now().timestamp()) - hours * 3600
+
+@app.route('/api/analytics/volume', methods=['GET'])
+def get_volume_analytics():
+    """Get whale volume per ?bucket seconds (default 3600) over the window."""
     try:
-        status = notifier.get_status() if notifier else {
-            'is_running': False,
-            'last_fetch': None,
-            'total_trades': 0,
-            'poll_interval': 5
-        }
+        since = analytics_since()
+        bucket = max(60, request.args.get('bucket', default=3600, type=int))
+        until = int(datetime.now().timestamp())
         
         return jsonify({
             'success': True,
-            'status': status
+            'volume': trade_window.rolling_volume(since, until, bucket),
+            'imbalance': trade_window.imbalance(since)
         })
     except Exception as e:
         return jsonify({
@@ -65,6 +251,96 @@ def get_status():
             'error': str(e)
         }), 500
 
+@app.route('/api/analytics/markets', methods=['GET'])
+def get_market_analytics():
+    """Get per-market volume, VWAP and buy/sell imbalance over the window."""
+    try:
+        since = analytics_since()
+        limit = max(1, min(100, request.args.get('limit', default=20, type=int)))
+        
+        return jsonify({
+            'success': True,
+            'since': since,
+            'markets': trade_window.market_stats(since, limit)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/analytics/anomalies', methods=['GET'])
+def get_anomalies():
+    """Get trades unusually large for their market (?z sets the z-score cutoff)."""
+    try:
+        since = analytics_since()
+        z = request.args.get('z', default=config.WINDOW_OUTLIER_Z_THRESHOLD, type=float)
+        
+        return jsonify({
+            'success': True,
+            'since': since,
+            'anomalies': trade_window.anomalies(since, z_threshold=z)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/stream', methods=['GET'])
+def stream_trades():
+    """Server-Sent Events stream of newly stored whale trades.
+    
+    Slow clients are dropped by the event bus; the stream then ends and the
+    browser's EventSource reconnects and resyncs with ?since_id.
+    """
+    subscription = trade_bus.subscribe()
+    
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while not subscription.closed:
+                trade = subscription.get(timeout=config.STREAM_KEEPALIVE_SECONDS)
+                if trade is None:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f"event: trade\ndata: {json.dumps(trade)}\n\n"
+        finally:
+            trade_bus.unsubscribe(subscription)
+            
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/status', methods=['GET'])
+def get_status():
+    """Get service status."""
+    try:
+        def build():
+            status = notifier.get_status() if notifier else {
+                'is_running': False,
+                'last_fetch': None,
+                'total_trades': 0,
+                'feed_trades': 0,
+                'poll_interval': 5
+            }
+            
+            return {
+                'success': True,
+                'status': status
+            }
+            
+        # The snapshot changes on every poll, not only on database writes
+        key = ('status', notifier.is_running, notifier.status.version) if notifier else ('status',)
+        return cached_json(key, build)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/refresh', methods=['POST'])
 def trigger_refresh():
     """Manually trigger a refresh."""
@@ -86,11 +362,13 @@ def trigger_refresh():
 def get_threshold():
     """Get current whale threshold."""
     try:
-        threshold = db.get_whale_threshold()
-        return jsonify({
-            'success': True,
-            'threshold': threshold
-        })
+        def build():
+            return {
+                'success': True,
+                'threshold': db.get_whale_threshold()
+            }
+            
+        return cached_json(('threshold',), build)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -124,13 +402,19 @@ def update_threshold():
         # Update threshold in database
         db.set_whale_threshold(amount)
         
-        # Update notifier service if running
-        if notifier:
-            notifier.update_threshold(amount)
+        # Update notifier service if running; it rebuilds the aggregates and,
+        # when the threshold drops, backfills the newly uncovered band in
+        # the background
+        if notifier and notifier.is_running:
+            backfill = notifier.update_threshold(amount)
+        else:
+            backfill = False
+            threading.Thread(target=db.rebuild_aggregates, daemon=True).start()
         
         return jsonify({
             'success': True,
             'threshold': amount,
+            'backfill': backfill,
             'message': 'Threshold updated successfully'
         })
     except Exception as e:
@@ -142,10 +426,69 @@ def update_threshold():
             'error': str(e)
         }), 500
 
+@app.route('/api/alert-rules', methods=['GET'])
+def get_alert_rules():
+    """Get the alert rules (the whale threshold rule is listed first)."""
+    try:
+        def build():
+            rules = AlertRuleSet.load(db)
+            return {
+                'success': True,
+                'rules': [rule.to_dict() for rule in rules.rules],
+                'fetch_threshold': rules.fetch_threshold
+            }
+            
+        return cached_json(('alert_rules',), build)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/alert-rules', methods=['POST'])
+def update_alert_rules():
+    """Replace the custom alert rules."""
+    try:
+        data = request.get_json()
+        rules = data.get('rules') if isinstance(data, dict) else None
+        
+        if not isinstance(rules, list):
+            return jsonify({
+                'success': False,
+                'error': 'rules must be a list'
+            }), 400
+            
+        # Validate before storing anything
+        try:
+            rule_set = AlertRuleSet.from_json(json.dumps(rules), db.get_whale_threshold())
+        except (ValueError, TypeError) as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid rule: {e}'
+            }), 400
+            
+        backfill = False
+        if notifier and notifier.is_running:
+            backfill = notifier.update_alert_rules(rule_set.to_json())
+        else:
+            rule_set.save(db)
+            
+        return jsonify({
+            'success': True,
+            'backfill': backfill,
+            'rules': [rule.to_dict() for rule in rule_set.rules],
+            'fetch_threshold': rule_set.fetch_threshold
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 def start_notifier_service():
     """Start the background notifier service."""
     global notifier
-    notifier = NotifierService()
+    notifier = NotifierService(event_bus=trade_bus, trade_window=trade_window)
     notifier.start()
 
 def main():
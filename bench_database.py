@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Benchmark per-row vs bulk transaction inserts into the SQLite store.
+
+Inserts the same synthetic trades into two fresh temporary databases, once
+through insert_transaction (one commit per row) and once through
+insert_transactions in poll-sized batches (one commit per batch).
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import config
+from database import Database
+
+
+def make_trades(count: int) -> list:
+    """Build synthetic normalized trades."""
+    base = 1700000000
+    return [
+        {
+            'tx_hash': f'0x{i:064x}',
+            'amount': 10000.0 + (i % 5000),
+            'market_name': f'Benchmark Market {i % 200}',
+            'market_id': f'benchmark-market-{i % 200}',
+            'outcome': 'Yes' if i % 2 else 'No',
+            'side': 'BUY' if i % 3 else 'SELL',
+            'trader_address': f'0x{i % 1000:040x}',
+            'timestamp': base + i,
+            'details': {'price': '0.5', 'size': str(20000 + i % 5000)}
+        }
+        for i in range(count)
+    ]
+
+
+def run(label: str, trades: list, insert) -> float:
+    """Insert trades into a fresh database and report throughput."""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        with Database(path) as db:
+            start = time.perf_counter()
+            inserted = insert(db, trades)
+            elapsed = time.perf_counter() - start
+            assert inserted == len(trades) == db.get_transaction_count()
+    finally:
+        os.unlink(path)
+
+    print(f"{label:<28} {elapsed:8.2f} s  {len(trades) / elapsed:10.0f} rows/s")
+    return elapsed
+
+
+def insert_per_row(db: Database, trades: list) -> int:
+    """Insert one row per commit."""
+    return sum(1 for trade in trades if db.insert_transaction(trade))
+
+
+def insert_bulk(batch_size: int):
+    """Insert batch_size rows per commit."""
+    def insert(db: Database, trades: list) -> int:
+        inserted = 0
+        for i in range(0, len(trades), batch_size):
+            inserted += len(db.insert_transactions(trades[i:i + batch_size]))
+        return inserted
+    return insert
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000, help='Synthetic trades to insert')
+    parser.add_argument('--batch-size', type=int, default=config.TRADES_LIMIT,
+                        help='Rows per insert_transactions call')
+    args = parser.parse_args()
+
+    trades = make_trades(args.rows)
+    print(f"Inserting {args.rows} synthetic trades")
+
+    per_row = run('insert_transaction', trades, insert_per_row)
+    bulk = run(f'insert_transactions ({args.batch_size})', trades, insert_bulk(args.batch_size))
+
+    print(f"Speedup: {per_row / bulk:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
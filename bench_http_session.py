@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Benchmark per-poll latency of bare requests.get vs the pooled API session.
+
+Runs against a local stub of the /trades endpoint, so the numbers only show
+the TCP connection cost. Against the real API each new connection also pays
+a TLS handshake, which widens the gap further.
+"""
+
+import argparse
+import json
+import socket
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+import config
+from polymarket_api import PolymarketAPI, create_session
+
+
+def _make_payload(count: int) -> bytes:
+    """Build a /trades style response body."""
+    trades = [
+        {
+            'transactionHash': f'0x{i:064x}',
+            'price': '0.5',
+            'size': '25000',
+            'side': 'BUY',
+            'title': 'Benchmark Market',
+            'eventSlug': 'benchmark-market',
+            'timestamp': 1700000000 - i
+        }
+        for i in range(count)
+    ]
+    return json.dumps(trades).encode()
+
+
+class StubTradesHandler(BaseHTTPRequestHandler):
+    """Minimal keep-alive capable /trades stub."""
+
+    protocol_version = 'HTTP/1.1'
+    payload = b'[]'
+
+    def setup(self):
+        """Disable Nagle so keep-alive replies are not held for delayed ACKs."""
+        super().setup()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        """Serve the canned payload."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.payload)))
+        self.end_headers()
+        self.wfile.write(self.payload)
+
+    def log_message(self, format, *args):
+        """Silence request logging."""
+
+
+def _measure(poll, polls: int) -> list:
+    """Time each call of poll in milliseconds."""
+    timings = []
+    for _ in range(polls):
+        start = time.perf_counter()
+        poll()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label: str, timings: list):
+    """Print latency summary."""
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<22} mean {statistics.mean(timings):7.3f} ms  "
+          f"p50 {statistics.median(timings):7.3f} ms  p95 {p95:7.3f} ms")
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--polls', type=int, default=500, help='Polls per variant')
+    parser.add_argument('--trades', type=int, default=50, help='Trades per response')
+    args = parser.parse_args()
+
+    StubTradesHandler.payload = _make_payload(args.trades)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubTradesHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_port}/trades"
+
+    params = {'filterType': config.FILTER_TYPE, 'filterAmount': config.WHALE_THRESHOLD}
+
+    def bare_poll():
+        response = requests.get(endpoint, params=params, timeout=config.API_TIMEOUT)
+        response.raise_for_status()
+        api._parse_trades(response.json())
+
+    api = PolymarketAPI(session=create_session())
+    api.trades_endpoint = endpoint
+
+    def pooled_poll():
+        api.fetch_trades()
+
+    try:
+        # Warm up both paths once
+        bare_poll()
+        pooled_poll()
+
+        print(f"{args.polls} polls, {args.trades} trades per response")
+        _report('requests.get (before)', _measure(bare_poll, args.polls))
+        _report('pooled session (after)', _measure(pooled_poll, args.polls))
+    finally:
+        server.shutdown()
+        api.session.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Report the size reduction from moving raw payloads into trade_raw.
+
+Builds a database in the old layout, with raw_data inline in details_json,
+runs the migration tool on it with VACUUM and compares file sizes.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from database import Database
+from migrate_raw_data import migrate_raw_data
+
+
+def make_raw_trade(i: int) -> dict:
+    """Build a synthetic /trades item shaped like the live API's."""
+    return {
+        'proxyWallet': f'0x{i % 5000:040x}',
+        'side': 'BUY' if i % 3 else 'SELL',
+        'asset': str(10 ** 75 + i * 7919),
+        'conditionId': f'0x{i % 300:064x}',
+        'size': 20000 + i % 5000,
+        'price': round(0.05 + (i % 90) / 100, 2),
+        'timestamp': 1700000000 + i,
+        'title': f'Will benchmark event {i % 300} resolve YES by the deadline?',
+        'slug': f'will-benchmark-event-{i % 300}-resolve-yes',
+        'icon': f'https://polymarket-upload.s3.us-east-2.amazonaws.com/event-{i % 300}.png',
+        'eventSlug': f'benchmark-event-{i % 300}',
+        'outcome': 'Yes' if i % 2 else 'No',
+        'outcomeIndex': i % 2,
+        'name': f'whale{i % 5000}',
+        'pseudonym': f'Benchmark-Whale-{i % 5000}',
+        'bio': '',
+        'profileImage': '',
+        'profileImageOptimized': '',
+        'transactionHash': f'0x{i:064x}'
+    }
+
+
+def build_legacy_db(path: str, rows: int, batch_size: int = 10000):
+    """Create a database whose rows still carry raw_data inline."""
+    with Database(path):
+        pass  # create schema
+
+    conn = sqlite3.connect(path)
+    for start in range(0, rows, batch_size):
+        batch = []
+        for i in range(start, min(rows, start + batch_size)):
+            raw = make_raw_trade(i)
+            details = {
+                'price': raw['price'],
+                'size': raw['size'],
+                'fee_rate': None,
+                'transaction_hash': raw['transactionHash'],
+                'bucket_index': None,
+                'match_time': None,
+                'slug': raw['slug'],
+                'event_slug': raw['eventSlug'],
+                'raw_data': raw
+            }
+            batch.append((
+                raw['transactionHash'], raw['price'] * raw['size'], raw['title'],
+                raw['eventSlug'], raw['outcome'], raw['side'], raw['proxyWallet'],
+                raw['timestamp'], json.dumps(details), raw['timestamp']
+            ))
+        conn.executemany('''
+            INSERT INTO whale_transactions (
+                tx_hash, amount, market_name, market_id, outcome,
+                side, trader_address, timestamp, details_json, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', batch)
+        conn.commit()
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.close()
+
+
+def main():
+    """Run the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Rows in the synthetic DB')
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        print(f"Building legacy database with {args.rows:,} rows...")
+        build_legacy_db(path, args.rows)
+
+        start = time.perf_counter()
+        migrate_raw_data(path, batch_size=5000, vacuum=True)
+        print(f"Migration took {time.perf_counter() - start:.1f} s")
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,9 +12,16 @@ TRADES_ENDPOINT = f"{POLYMARKET_API_BASE}/trades"
 
 # Whale transaction threshold (in USD)
 WHALE_THRESHOLD = 10000
+ALERT_RULE_MIN_AMOUNT = 1000  # Lowest min_amount a custom alert rule may set (the fetch floor)
 
 # Polling settings
 POLL_INTERVAL_MINUTES = 5  # Check for new trades every 5 minutes
+POLL_MIN_SECONDS = 30  # Fastest adaptive polling interval
+POLL_MAX_SECONDS = 30 * 60  # Slowest adaptive polling interval
+POLL_BUSY_TRADES = 20  # Trades per poll that count as a busy market
+POLL_BACKOFF_FACTOR = 2.0  # Interval multiplier after empty or failed polls
+POLL_JITTER = 0.1  # Random +/- fraction applied to each delay
+POLL_OVERLAP_SECONDS = 120  # Re-read this much before the high-water mark; dedupe absorbs repeats
 INITIAL_FETCH_HOURS = 24  # Try to fetch from last 24 hours on first run
 FALLBACK_FETCH_DAYS = 7  # If no trades in 24hrs, fallback to 7 days
 
@@ -23,15 +30,62 @@ FALLBACK_FETCH_DAYS = 7  # If no trades in 24hrs, fallback to 7 days
 DATA_DIR = os.path.join(os.path.expanduser("~"), ".local", "share", "polywhale")
 os.makedirs(DATA_DIR, exist_ok=True)  # Create directory structure if it doesn't exist
 DB_PATH = os.path.join(DATA_DIR, "whale_trades.db")
+DB_JOURNAL_MODE = "WAL"  # Readers don't block the writer (and vice versa)
+DB_SYNCHRONOUS = "NORMAL"  # Safe with WAL, avoids an fsync per commit
+DB_MMAP_SIZE = 256 * 1024 * 1024  # Bytes of the DB file to memory-map
+DB_CACHE_SIZE = -16000  # Page cache per connection (negative = KiB)
+DB_BUSY_TIMEOUT = 10  # Seconds to wait for a lock before failing
+DB_POOL_SIZE = 4  # Idle connections kept for reuse by short-lived threads
+
+# Retention settings
+RETENTION_DAYS = 90  # Keep individual trades this long (0 keeps everything)
+RETENTION_INTERVAL_HOURS = 6  # How often the retention job runs
+RETENTION_BATCH_SIZE = 500  # Rows rolled up and deleted per transaction
+RETENTION_BATCH_PAUSE = 0.05  # Seconds between batches so the poller can write
+ARCHIVE_FORMAT = None  # "ndjson" or "parquet" to export expired trades, None to drop them
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+
+# Live stream settings
+STREAM_QUEUE_SIZE = 100  # Events buffered per subscriber before it is dropped
+STREAM_KEEPALIVE_SECONDS = 15  # Comment line sent on idle streams
+
+# Response cache settings
+RESPONSE_CACHE_SIZE = 256  # Pre-serialized read responses kept in memory
+
+# Analytics settings
+TRADE_WINDOW_SIZE = 100000  # Recent trades kept in memory for analytics
+TRADE_WINDOW_HOURS = 24 * 7  # History loaded into the window at startup
+WINDOW_OUTLIER_Z_THRESHOLD = 3.0  # z-score of log(amount) within a market that /api/analytics/anomalies reports
+WINDOW_OUTLIER_MIN_SAMPLES = 10  # Trades a market needs in the window before it is scored
+
+# Ingest-time anomaly detection against persisted per-market baselines
+ANOMALY_MIN_AMOUNT = None  # Fetch and store trades down to this amount for the baselines (None: the alert rule floor)
+ANOMALY_QUANTILE = 0.995  # Per-market quantile above which ingested trades are unusual
+ANOMALY_Z_THRESHOLD = 3.0  # Smallest EWMA z-score of log(amount) an unusual trade needs
+ANOMALY_MIN_SAMPLES = 50  # Trades a market baseline needs before it flags
+ANOMALY_EWMA_ALPHA = 0.02  # Weight of each new trade in the EWMA mean and variance
+ANOMALY_DIGEST_COMPRESSION = 200  # t-digest compression; about half this many centroids are kept
 
 # Notification settings
 NOTIFICATION_TIMEOUT = 5000  # 5 seconds
 NOTIFICATION_ICON = "dialog-information"  # Generic info icon
+NOTIFY_COALESCE_SECONDS = 2.0  # Trades arriving this close together share one summary
+NOTIFY_RATE_PER_MINUTE = 6  # Sustained popups allowed per minute
+NOTIFY_BURST = 3  # Popups allowed back to back
 
 # API request settings
 API_TIMEOUT = 30  # seconds
+API_CONNECT_TIMEOUT = 5  # seconds to establish a connection
+API_READ_TIMEOUT = API_TIMEOUT  # seconds to wait for response data
+HTTP_POOL_CONNECTIONS = 4  # Number of host pools to cache
+HTTP_POOL_MAXSIZE = 10  # Keep-alive connections kept per host
 MAX_RETRIES = 3
 TRADES_LIMIT = 500  # Maximum trades to fetch per request
+MAX_TRADE_PAGES = 20  # Maximum pages to walk in one paginated fetch
+
+# Backfill settings
+BACKFILL_SLICE_HOURS = 6  # Split long history fetches into slices of this size
+BACKFILL_CONCURRENCY = 8  # Maximum slices fetched at the same time
 
 # Filter settings
 FILTER_TYPE = "CASH"  # Filter by cash amount
@@ -41,3 +95,4 @@ FILTER_AMOUNT = WHALE_THRESHOLD
 WINDOW_TITLE = APP_NAME
 WINDOW_WIDTH = 1000
 WINDOW_HEIGHT = 700
+UI_PAGE_SIZE = 200  # Table rows loaded per scroll page
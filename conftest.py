@@ -0,0 +1,50 @@
+"""Shared test fixtures: a temporary database and a trade factory."""
+
+import os
+import pytest
+from database import Database
+
+
+def make_trade(i, amount=20000.0, timestamp=None, market='a', side='BUY', price=0.5, size=None, **fields):
+    """
+    Build a trade dictionary shaped like Database.insert_transactions output.
+    
+    Without the id it is also what PolymarketAPI._parse_trades returns, so
+    the same trades can be fed to a poll, inserted or analysed directly.
+    
+    Args:
+        i: Trade number, used for the id and tx_hash
+        amount: Trade amount in USD
+        timestamp: Trade time (defaults to 1700000000 + i)
+        market: Market id; the market name is its upper-case form
+        side: BUY or SELL
+        price: Price stored in details
+        size: Size stored in details (defaults to amount / price)
+        **fields: Other keys to set or replace, such as trader_address or details
+        
+    Returns:
+        Trade dictionary
+    """
+    trade = {
+        'id': i,
+        'tx_hash': f'0x{i}',
+        'amount': amount,
+        'market_id': market,
+        'market_name': market.upper(),
+        'outcome': 'Yes',
+        'side': side,
+        'trader_address': '0xabc',
+        'timestamp': 1700000000 + i if timestamp is None else timestamp,
+        'details': {'price': price, 'size': size if size is not None else amount / price}
+    }
+    trade.update(fields)
+    return trade
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Connected database in a temporary directory, closed afterwards."""
+    database = Database(os.path.join(tmp_path, 'whale_trades.db'))
+    database.connect()
+    yield database
+    database.close()
@@ -2,26 +2,425 @@
 
 import sqlite3
 import json
+import threading
+import zlib
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import config
 
 
+# Columns served by the transaction feed. details_json is left out so the
+# feed can be answered from idx_whale_tx_feed without touching table rows.
+FEED_COLUMNS = (
+    'id', 'tx_hash', 'amount', 'market_name', 'market_id', 'outcome',
+    'side', 'trader_address', 'timestamp', 'created_at'
+)
+
+# Whale threshold as stored in settings, for use inside SQL statements
+WHALE_THRESHOLD_SQL = (
+    "COALESCE((SELECT CAST(value AS REAL) FROM settings WHERE key = 'whale_threshold'), "
+    f"{float(config.WHALE_THRESHOLD)})"
+)
+
+# Upserts that fold whale_transactions rows into the aggregate tables. Only
+# trades at or above the whale threshold count, so the aggregates agree with
+# the feed; trades fetched for lower alert rules are left out. {where} narrows
+# the rows further: the new ids of an insert batch, or nothing when the
+# migration creating the tables runs on an existing database.
+MARKET_HOURLY_UPSERT = f'''
+    INSERT INTO market_hourly (
+        market_id, hour, market_name, trade_count, volume,
+        buy_volume, sell_volume, max_amount
+    )
+    SELECT
+        COALESCE(market_id, ''), (timestamp / 3600) * 3600, MAX(market_name),
+        COUNT(*), SUM(amount),
+        SUM(CASE WHEN side = 'BUY' THEN amount ELSE 0 END),
+        SUM(CASE WHEN side = 'SELL' THEN amount ELSE 0 END),
+        MAX(amount)
+    FROM whale_transactions
+    WHERE amount >= {WHALE_THRESHOLD_SQL} {{where}}
+    GROUP BY 1, 2
+    ON CONFLICT (market_id, hour) DO UPDATE SET
+        market_name = COALESCE(excluded.market_name, market_name),
+        trade_count = trade_count + excluded.trade_count,
+        volume = volume + excluded.volume,
+        buy_volume = buy_volume + excluded.buy_volume,
+        sell_volume = sell_volume + excluded.sell_volume,
+        max_amount = MAX(max_amount, excluded.max_amount)
+'''
+TRADER_DAILY_UPSERT = f'''
+    INSERT INTO trader_daily (
+        trader_address, day, trade_count, volume,
+        buy_volume, sell_volume, max_amount
+    )
+    SELECT
+        COALESCE(trader_address, ''), (timestamp / 86400) * 86400,
+        COUNT(*), SUM(amount),
+        SUM(CASE WHEN side = 'BUY' THEN amount ELSE 0 END),
+        SUM(CASE WHEN side = 'SELL' THEN amount ELSE 0 END),
+        MAX(amount)
+    FROM whale_transactions
+    WHERE amount >= {WHALE_THRESHOLD_SQL} {{where}}
+    GROUP BY 1, 2
+    ON CONFLICT (trader_address, day) DO UPDATE SET
+        trade_count = trade_count + excluded.trade_count,
+        volume = volume + excluded.volume,
+        buy_volume = buy_volume + excluded.buy_volume,
+        sell_volume = sell_volume + excluded.sell_volume,
+        max_amount = MAX(max_amount, excluded.max_amount)
+'''
+
+# Start of the first aggregate bucket holding no expired trade. retention_horizon
+# is the newest trade retention has rolled away; without it nothing has been
+# expired and every bucket can be rebuilt.
+REBUILD_FLOOR_SQL = (
+    "COALESCE((SELECT (CAST(value AS INTEGER) / {size} + 1) * {size} "
+    "FROM settings WHERE key = 'retention_horizon'), 0)"
+)
+
+# Recompute the aggregates after the whale threshold changes. Buckets that
+# lost trades to retention (older ones and the partly expired boundary one)
+# keep their figures, since the trades they summarize are gone.
+AGGREGATE_REBUILD = [
+    f'''
+        DELETE FROM market_hourly
+        WHERE hour >= {REBUILD_FLOOR_SQL.format(size=3600)}
+    ''',
+    MARKET_HOURLY_UPSERT.format(where=f'AND timestamp >= {REBUILD_FLOOR_SQL.format(size=3600)}'),
+    f'''
+        DELETE FROM trader_daily
+        WHERE day >= {REBUILD_FLOOR_SQL.format(size=86400)}
+    ''',
+    TRADER_DAILY_UPSERT.format(where=f'AND timestamp >= {REBUILD_FLOOR_SQL.format(size=86400)}')
+]
+
+# Databases that ran retention before the horizon was recorded: the oldest
+# stored trade is the closest known bound
+RETENTION_HORIZON_SEED = '''
+    INSERT OR IGNORE INTO settings (key, value)
+    SELECT 'retention_horizon', oldest
+    FROM (SELECT MIN(timestamp) AS oldest FROM whale_transactions)
+    WHERE oldest IS NOT NULL AND EXISTS (SELECT 1 FROM daily_market_rollups)
+'''
+
+# Schema migrations, applied in order on connect. PRAGMA user_version records
+# how many have run, so each one executes once per database file.
+MIGRATIONS = [
+    # 1: Feed, market and trader indexes. The covering feed index leads with
+    # timestamp, so it also serves plain timestamp range scans.
+    [
+        '''
+            CREATE INDEX IF NOT EXISTS idx_whale_tx_feed ON whale_transactions (
+                timestamp DESC, id DESC, tx_hash, amount, market_name,
+                market_id, outcome, side, trader_address, created_at
+            )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_whale_tx_market ON whale_transactions (market_id, timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_whale_tx_trader ON whale_transactions (trader_address, timestamp)'
+    ],
+    # 2: Trigger-maintained row counter, so counting never scans the table
+    [
+        '''
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        ''',
+        '''
+            INSERT OR REPLACE INTO counters (name, value)
+            SELECT 'whale_transactions', COUNT(*) FROM whale_transactions
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_whale_tx_count_insert
+            AFTER INSERT ON whale_transactions
+            BEGIN
+                UPDATE counters SET value = value + 1 WHERE name = 'whale_transactions';
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_whale_tx_count_delete
+            AFTER DELETE ON whale_transactions
+            BEGIN
+                UPDATE counters SET value = value - 1 WHERE name = 'whale_transactions';
+            END
+        '''
+    ],
+    # 3: Compressed raw API payloads, split out of details_json and loaded
+    # only on demand. Existing rows are moved by migrate_raw_data.py.
+    [
+        '''
+            CREATE TABLE IF NOT EXISTS trade_raw (
+                tx_id INTEGER PRIMARY KEY,
+                codec TEXT NOT NULL,
+                payload BLOB NOT NULL
+            )
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_whale_tx_raw_delete
+            AFTER DELETE ON whale_transactions
+            BEGIN
+                DELETE FROM trade_raw WHERE tx_id = OLD.id;
+            END
+        '''
+    ],
+    # 4: Daily per-market aggregates of trades removed by the retention job
+    [
+        '''
+            CREATE TABLE IF NOT EXISTS daily_market_rollups (
+                market_id TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                market_name TEXT,
+                trade_count INTEGER NOT NULL,
+                volume REAL NOT NULL,
+                buy_volume REAL NOT NULL,
+                sell_volume REAL NOT NULL,
+                max_amount REAL NOT NULL,
+                PRIMARY KEY (market_id, day)
+            )
+        '''
+    ],
+    # 5: Market x hour and trader x day aggregates, kept current by
+    # insert_transactions. The retention job leaves them in place.
+    [
+        '''
+            CREATE TABLE IF NOT EXISTS market_hourly (
+                market_id TEXT NOT NULL,
+                hour INTEGER NOT NULL,
+                market_name TEXT,
+                trade_count INTEGER NOT NULL,
+                volume REAL NOT NULL,
+                buy_volume REAL NOT NULL,
+                sell_volume REAL NOT NULL,
+                max_amount REAL NOT NULL,
+                PRIMARY KEY (market_id, hour)
+            )
+        ''',
+        '''
+            CREATE TABLE IF NOT EXISTS trader_daily (
+                trader_address TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                trade_count INTEGER NOT NULL,
+                volume REAL NOT NULL,
+                buy_volume REAL NOT NULL,
+                sell_volume REAL NOT NULL,
+                max_amount REAL NOT NULL,
+                PRIMARY KEY (trader_address, day)
+            )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_market_hourly_hour ON market_hourly (hour)',
+        'CREATE INDEX IF NOT EXISTS idx_trader_daily_day ON trader_daily (day)',
+        MARKET_HOURLY_UPSERT.format(where=''),
+        TRADER_DAILY_UPSERT.format(where='')
+    ],
+    # 6: Per-market trade size baselines of the anomaly detector: EWMA
+    # moments plus a serialized t-digest, so restarts need no replay
+    [
+        '''
+            CREATE TABLE IF NOT EXISTS market_baselines (
+                market_id TEXT PRIMARY KEY,
+                sample_count INTEGER NOT NULL,
+                ewma_mean REAL NOT NULL,
+                ewma_variance REAL NOT NULL,
+                digest BLOB NOT NULL,
+                updated_at INTEGER NOT NULL
+            )
+        '''
+    ],
+    # 7: Aggregates count only trades at or above the whale threshold
+    [RETENTION_HORIZON_SEED] + AGGREGATE_REBUILD,
+    # 8: Trades the anomaly detector flagged; they join the feed whatever
+    # their amount
+    [
+        '''
+            CREATE TABLE IF NOT EXISTS unusual_trades (
+                tx_id INTEGER PRIMARY KEY,
+                threshold REAL NOT NULL,
+                quantile REAL NOT NULL,
+                z_score REAL,
+                sample_count INTEGER NOT NULL
+            )
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_whale_tx_unusual_delete
+            AFTER DELETE ON whale_transactions
+            BEGIN
+                DELETE FROM unusual_trades WHERE tx_id = OLD.id;
+            END
+        '''
+    ]
+]
+
+# Feed filter: trades at or above an amount, plus every trade flagged as
+# unusual for its market. unusual_trades is small, so the IN list is built
+# once and the feed is still read from the covering index.
+FEED_FILTER = '(amount >= ? OR id IN (SELECT tx_id FROM unusual_trades))'
+
+# Feed column marking rows flagged as unusual, as the live feed does
+UNUSUAL_COLUMN = 'id IN (SELECT tx_id FROM unusual_trades) AS unusual'
+
+
+# Raw API payloads are stored zlib-compressed with a preset dictionary of the
+# field names every /trades item carries, which matters for small payloads.
+# The dictionary uses the same compact separators as compress_raw, so its key
+# patterns match the payloads. Each codec name fixes its dictionary; older
+# codecs stay readable.
+RAW_ZDICTS = {
+    'zlib-d1': (
+        b'{"proxyWallet": "0x", "side": "BUY", "side": "SELL", "asset": "", '
+        b'"conditionId": "0x", "size": , "price": , "timestamp": , "title": "", '
+        b'"slug": "", "icon": "https://polymarket-upload.s3.us-east-2.amazonaws.com/", '
+        b'"eventSlug": "", "outcome": "Yes", "outcome": "No", "outcomeIndex": 0, '
+        b'"name": "", "pseudonym": "", "bio": "", "profileImage": "", '
+        b'"profileImageOptimized": "", "transactionHash": "0x"}'
+    ),
+    'zlib-d2': (
+        b'{"proxyWallet":"0x","side":"BUY","side":"SELL","asset":"",'
+        b'"conditionId":"0x","size":,"price":,"timestamp":,"title":"",'
+        b'"slug":"","icon":"https://polymarket-upload.s3.us-east-2.amazonaws.com/",'
+        b'"eventSlug":"","outcome":"Yes","outcome":"No","outcomeIndex":0,'
+        b'"name":"","pseudonym":"","bio":"","profileImage":"",'
+        b'"profileImageOptimized":"","transactionHash":"0x"}'
+    )
+}
+RAW_CODEC = 'zlib-d2'
+RAW_ZDICT = RAW_ZDICTS[RAW_CODEC]
+
+
+def compress_raw(raw_data: Dict) -> bytes:
+    """Serialize and compress a raw API payload for trade_raw."""
+    compressor = zlib.compressobj(level=6, zdict=RAW_ZDICT)
+    data = json.dumps(raw_data, separators=(',', ':')).encode()
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress_raw(codec: str, payload: bytes) -> Dict:
+    """Decompress a trade_raw payload."""
+    if codec not in RAW_ZDICTS:
+        raise ValueError(f"Unknown raw payload codec: {codec}")
+    decompressor = zlib.decompressobj(zdict=RAW_ZDICTS[codec])
+    return json.loads(decompressor.decompress(payload) + decompressor.flush())
+
+
+# Write generation per database file, shared by every Database instance in
+# this process. It is bumped after each committed write, so readers can tell
+# whether results cached at an earlier generation are still current.
+_write_generations = {}
+_write_generations_lock = threading.Lock()
+
+
 class Database:
-    """Manage SQLite database for whale transactions."""
+    """Manage SQLite database for whale transactions.
     
-    def __init__(self, db_path: str = config.DB_PATH):
-        """Initialize database connection."""
+    Each thread gets its own SQLite connection, opened on first use, so
+    readers on Flask request threads never queue behind the poller's writes.
+    """
+    
+    def __init__(self, db_path: str = config.DB_PATH, pool_size: int = config.DB_POOL_SIZE):
+        """
+        Initialize database connection.
+        
+        Args:
+            db_path: Path of the SQLite file
+            pool_size: Idle connections kept for reuse by later threads
+        """
         self.db_path = db_path
-        self.conn = None
         self.cursor = None
+        self._connected = False
+        self._pragmas = {}
+        self._local = threading.local()
+        self._connections = {}  # Thread -> connection, for reaping and close()
+        self._idle = []  # Released connections, handed to the next new thread
+        self.pool_size = pool_size
+        self._connections_lock = threading.Lock()
         
-    def connect(self):
-        """Connect to database and initialize schema."""
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row  # Access columns by name
+    def connect(
+        self,
+        journal_mode: str = config.DB_JOURNAL_MODE,
+        synchronous: str = config.DB_SYNCHRONOUS,
+        mmap_size: int = config.DB_MMAP_SIZE,
+        cache_size: int = config.DB_CACHE_SIZE
+    ):
+        """Connect to database and initialize schema.
+        
+        Args:
+            journal_mode: SQLite journal mode (WAL lets readers run during writes)
+            synchronous: SQLite synchronous level
+            mmap_size: Bytes of the database file to memory-map
+            cache_size: Page cache size (negative values are KiB)
+        """
+        self._pragmas = {
+            'synchronous': synchronous,
+            'mmap_size': mmap_size,
+            'cache_size': cache_size
+        }
+        self._connected = True
+        
+        # journal_mode is persistent, so it only needs setting once per file
+        self.conn.execute(f'PRAGMA journal_mode = {journal_mode}')
         self._create_tables()
+        self._migrate()
+        
+    @property
+    def conn(self) -> Optional[sqlite3.Connection]:
+        """Connection owned by the calling thread, or None if not connected."""
+        if not self._connected:
+            return None
+            
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            with self._connections_lock:
+                self._reap_connections()
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._open_connection()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections[threading.current_thread()] = conn
+        return conn
+        
+    def release_connection(self):
+        """
+        Hand the calling thread's connection back for reuse.
+        
+        Servers that run each request on a new thread call this when the
+        request ends, so requests share a few open connections instead of
+        each opening (and configuring) its own.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._connections_lock:
+            self._connections.pop(threading.current_thread(), None)
+            self._park(conn)
         
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open a new connection with the configured pragmas."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=config.DB_BUSY_TIMEOUT,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row  # Access columns by name
+        for name, value in self._pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+        
+    def _reap_connections(self):
+        """Reclaim connections whose owning thread has exited."""
+        for thread in [t for t in self._connections if not t.is_alive()]:
+            self._park(self._connections.pop(thread))
+            
+    def _park(self, conn: sqlite3.Connection):
+        """Keep a connection for reuse, or close it if the pool is full (lock held)."""
+        if conn.in_transaction:
+            conn.rollback()
+        if len(self._idle) < self.pool_size:
+            self._idle.append(conn)
+        else:
+            conn.close()
+            
     def _create_tables(self):
         """Create database tables if they don't exist."""
         cursor = self.conn.cursor()
@@ -54,6 +453,26 @@ class Database:
         self.conn.commit()
         cursor.close()
         
+    def _migrate(self):
+        """Apply any schema migrations this database has not seen yet."""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('PRAGMA user_version')
+            version = cursor.fetchone()[0]
+            
+            for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+                cursor.execute('BEGIN IMMEDIATE')
+                try:
+                    for statement in statements:
+                        cursor.execute(statement)
+                    cursor.execute(f'PRAGMA user_version = {number}')
+                    self.conn.commit()
+                except Exception:
+                    self.conn.rollback()
+                    raise
+        finally:
+            cursor.close()
+            
     def insert_transaction(self, tx_data: Dict) -> bool:
         """
         Insert a new whale transaction.
@@ -64,14 +483,42 @@ class Database:
         Returns:
             True if inserted, False if duplicate
         """
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute('''
-                INSERT INTO whale_transactions (
-                    tx_hash, amount, market_name, market_id, outcome,
-                    side, trader_address, timestamp, details_json, created_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+        return bool(self.insert_transactions([tx_data]))
+        
+    def insert_transactions(self, batch: List[Dict]) -> List[Dict]:
+        """
+        Insert a batch of whale transactions in a single transaction.
+        
+        Duplicates are skipped with ON CONFLICT(tx_hash) DO NOTHING. New rows
+        are identified by their AUTOINCREMENT ids, which always exceed the
+        largest id present when the write lock was taken. An 'anomaly' entry
+        set by the anomaly detector is stored in unusual_trades.
+        
+        Args:
+            batch: List of transaction dictionaries
+            
+        Returns:
+            The transactions from batch that were newly inserted, in input
+            order, as copies carrying their new id and created_at
+        """
+        if not batch:
+            return []
+            
+        now = int(datetime.now().timestamp())
+        rows = []
+        raw_payloads = {}
+        anomalies = {}
+        for tx_data in batch:
+            if tx_data.get('anomaly'):
+                anomalies.setdefault(tx_data.get('tx_hash'), tx_data['anomaly'])
+                
+            # Raw API payloads go to trade_raw, compressed, instead of details_json
+            details = dict(tx_data.get('details') or {})
+            raw_data = details.pop('raw_data', None)
+            if raw_data is not None:
+                raw_payloads.setdefault(tx_data.get('tx_hash'), raw_data)
+                
+            rows.append((
                 tx_data.get('tx_hash'),
                 tx_data.get('amount'),
                 tx_data.get('market_name'),
@@ -80,67 +527,233 @@ class Database:
                 tx_data.get('side'),
                 tx_data.get('trader_address'),
                 tx_data.get('timestamp'),
-                json.dumps(tx_data.get('details', {})),
-                int(datetime.now().timestamp())
+                json.dumps(details),
+                now
             ))
+            
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('SELECT COALESCE(MAX(id), 0) AS max_id FROM whale_transactions')
+            max_id = cursor.fetchone()['max_id']
+            
+            # executemany discards RETURNING rows, so new rows are read back by id
+            cursor.executemany('''
+                INSERT INTO whale_transactions (
+                    tx_hash, amount, market_name, market_id, outcome,
+                    side, trader_address, timestamp, details_json, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(tx_hash) DO NOTHING
+            ''', rows)
+            
+            cursor.execute(
+                'SELECT id, tx_hash FROM whale_transactions WHERE id > ?',
+                (max_id,)
+            )
+            new_ids = {row['tx_hash']: row['id'] for row in cursor.fetchall()}
+            
+            # Fold the new rows into the aggregates in the same transaction
+            if new_ids:
+                cursor.execute(MARKET_HOURLY_UPSERT.format(where='AND id > ?'), (max_id,))
+                cursor.execute(TRADER_DAILY_UPSERT.format(where='AND id > ?'), (max_id,))
+                
+            # Anomaly flags set by the ingest stage go in with their trades
+            cursor.executemany('''
+                INSERT OR IGNORE INTO unusual_trades (tx_id, threshold, quantile, z_score, sample_count)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [
+                (
+                    new_ids[tx_hash], anomaly['threshold'], anomaly['quantile'],
+                    anomaly['z_score'], anomaly['sample_count']
+                )
+                for tx_hash, anomaly in anomalies.items()
+                if tx_hash in new_ids
+            ])
+                
+            cursor.executemany(
+                'INSERT INTO trade_raw (tx_id, codec, payload) VALUES (?, ?, ?)',
+                [
+                    (tx_id, RAW_CODEC, compress_raw(raw_payloads[tx_hash]))
+                    for tx_hash, tx_id in new_ids.items()
+                    if tx_hash in raw_payloads
+                ]
+            )
             self.conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            # Duplicate tx_hash
-            return False
+        except Exception:
+            self.conn.rollback()
+            raise
         finally:
             cursor.close()
             
-    def get_all_transactions(self, limit: Optional[int] = None) -> List[Dict]:
+        new_hashes = set(new_ids)
+        if new_hashes:
+            self._bump_write_generation()
+            
+        # Keep the first occurrence of each new hash, in input order
+        inserted = []
+        for tx_data in batch:
+            tx_hash = tx_data.get('tx_hash')
+            if tx_hash in new_hashes:
+                new_hashes.discard(tx_hash)
+                inserted.append(dict(tx_data, id=new_ids[tx_hash], created_at=now))
+        return inserted
+        
+    def get_all_transactions(
+        self,
+        limit: Optional[int] = None,
+        include_details: bool = False,
+        min_amount: Optional[float] = None
+    ) -> List[Dict]:
         """
         Get all whale transactions, ordered by timestamp descending.
         
         Args:
             limit: Optional limit on number of results
+            include_details: Also load the details_json blob for each row
+            min_amount: Only rows of at least this amount, or flagged as
+                unusual (optional)
             
         Returns:
             List of transaction dictionaries
         """
+        columns = FEED_COLUMNS + ('details_json',) if include_details else FEED_COLUMNS
         cursor = self.conn.cursor()
         try:
-            query = '''
-                SELECT * FROM whale_transactions 
-                ORDER BY timestamp DESC
+            query = f'''
+                SELECT {', '.join(columns)}, {UNUSUAL_COLUMN} FROM whale_transactions
+                WHERE {FEED_FILTER}
+                ORDER BY timestamp DESC, id DESC
             '''
+            params = (min_amount or 0,)
             if limit:
-                query += f' LIMIT {limit}'
+                query += ' LIMIT ?'
+                params += (limit,)
                 
-            cursor.execute(query)
+            cursor.execute(query, params)
             rows = cursor.fetchall()
             
-            # Manually convert rows to dicts to ensure proper serialization
-            transactions = []
-            for row in rows:
-                tx = {
-                    'id': row['id'],
-                    'tx_hash': row['tx_hash'],
-                    'amount': float(row['amount']) if row['amount'] else 0,
-                    'market_name': row['market_name'],
-                    'market_id': row['market_id'],
-                    'outcome': row['outcome'],
-                    'side': row['side'],
-                    'trader_address': row['trader_address'],
-                    'timestamp': int(row['timestamp']) if row['timestamp'] else 0,
-                    'details_json': row['details_json'],
-                    'created_at': int(row['created_at']) if row['created_at'] else 0
-                }
-                transactions.append(tx)
-                
-            return transactions
+            return [self._row_to_transaction(row) for row in rows]
+        finally:
+            cursor.close()
+            
+    def get_transactions_page(
+        self,
+        limit: int,
+        before: Optional[Tuple[int, int]] = None,
+        after: Optional[Tuple[int, int]] = None,
+        min_amount: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Get one page of the feed using keyset pagination.
+        
+        Pages are seeked through idx_whale_tx_feed by (timestamp, id), so the
+        cost of a page does not grow with how deep into history it is. The
+        amount filter is checked on the same covering index.
+        
+        Args:
+            limit: Maximum number of rows in the page
+            before: Only rows older than this (timestamp, id) cursor
+            after: Only rows newer than this (timestamp, id) cursor
+            min_amount: Only rows of at least this amount, or flagged as
+                unusual (optional)
+            
+        Returns:
+            List of transaction dictionaries, newest first
+        """
+        if before is not None:
+            where, order, params = 'AND (timestamp, id) < (?, ?)', 'DESC', before
+        elif after is not None:
+            where, order, params = 'AND (timestamp, id) > (?, ?)', 'ASC', after
+        else:
+            where, order, params = '', 'DESC', ()
+            
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(f'''
+                SELECT {', '.join(FEED_COLUMNS)}, {UNUSUAL_COLUMN} FROM whale_transactions
+                WHERE {FEED_FILTER} {where}
+                ORDER BY timestamp {order}, id {order}
+                LIMIT ?
+            ''', (min_amount or 0, *params, limit))
+            transactions = [self._row_to_transaction(row) for row in cursor.fetchall()]
         finally:
             cursor.close()
+            
+        if order == 'ASC':
+            transactions.reverse()
+        return transactions
         
-    def get_transaction_by_hash(self, tx_hash: str) -> Optional[Dict]:
+    def get_transactions_since(
+        self,
+        since_id: int,
+        limit: int,
+        min_amount: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Get transactions inserted after a known id (a client's high-water mark).
+        
+        Args:
+            since_id: Largest transaction id the client already has
+            limit: Maximum number of rows to return (the newest inserts win)
+            min_amount: Only rows of at least this amount, or flagged as
+                unusual (optional)
+            
+        Returns:
+            List of transaction dictionaries, newest first
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(f'''
+                SELECT {', '.join(FEED_COLUMNS)}, {UNUSUAL_COLUMN} FROM whale_transactions
+                WHERE id > ? AND {FEED_FILTER}
+                ORDER BY id DESC
+                LIMIT ?
+            ''', (since_id, min_amount or 0, limit))
+            transactions = [self._row_to_transaction(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            
+        # Backfilled rows can carry older timestamps than earlier inserts
+        transactions.sort(key=lambda tx: (tx['timestamp'], tx['id']), reverse=True)
+        return transactions
+        
+    def get_latest_transaction_id(self) -> int:
+        """Get the largest transaction id, a cheap version of the feed."""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('SELECT COALESCE(MAX(id), 0) AS max_id FROM whale_transactions')
+            return cursor.fetchone()['max_id']
+        finally:
+            cursor.close()
+            
+    @staticmethod
+    def _row_to_transaction(row: sqlite3.Row) -> Dict:
+        """Convert a row to a plain dict to ensure proper serialization."""
+        tx = {
+            'id': row['id'],
+            'tx_hash': row['tx_hash'],
+            'amount': float(row['amount']) if row['amount'] else 0,
+            'market_name': row['market_name'],
+            'market_id': row['market_id'],
+            'outcome': row['outcome'],
+            'side': row['side'],
+            'trader_address': row['trader_address'],
+            'timestamp': int(row['timestamp']) if row['timestamp'] else 0,
+            'created_at': int(row['created_at']) if row['created_at'] else 0
+        }
+        if 'details_json' in row.keys():
+            tx['details_json'] = row['details_json']
+        if 'unusual' in row.keys() and row['unusual']:
+            tx['unusual'] = True
+        return tx
+        
+    def get_transaction_by_hash(self, tx_hash: str, include_raw: bool = False) -> Optional[Dict]:
         """
         Get a specific transaction by its hash.
         
         Args:
             tx_hash: Transaction hash
+            include_raw: Also load the raw API payload into 'raw_data'
             
         Returns:
             Transaction dictionary or None
@@ -152,9 +765,108 @@ class Database:
                 (tx_hash,)
             )
             row = cursor.fetchone()
-            return dict(row) if row else None
         finally:
             cursor.close()
+            
+        if not row:
+            return None
+            
+        tx = dict(row)
+        if include_raw:
+            tx['raw_data'] = self.get_raw_trade(tx['id'])
+        return tx
+        
+    def get_raw_trade(self, tx_id: int) -> Optional[Dict]:
+        """
+        Load and decompress the raw API payload of a transaction.
+        
+        Args:
+            tx_id: Transaction id
+            
+        Returns:
+            Raw trade dictionary, or None if none was stored
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(
+                'SELECT codec, payload FROM trade_raw WHERE tx_id = ?',
+                (tx_id,)
+            )
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+            
+        if row:
+            return decompress_raw(row['codec'], row['payload'])
+            
+        # Rows stored before trade_raw existed keep the payload inline
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(
+                'SELECT details_json FROM whale_transactions WHERE id = ?',
+                (tx_id,)
+            )
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+        details = json.loads(row['details_json']) if row and row['details_json'] else {}
+        return details.get('raw_data')
+        
+    def move_raw_data(self, after_id: int, batch_size: int) -> Tuple[Optional[int], int, int, int]:
+        """
+        Move inline raw payloads of one batch of rows into trade_raw.
+        
+        Args:
+            after_id: Only rows with a larger id are considered
+            batch_size: Number of rows to scan
+            
+        Returns:
+            Tuple of (last id scanned or None when done, rows moved,
+            bytes before, bytes after)
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute(
+                'SELECT id, details_json FROM whale_transactions WHERE id > ? ORDER BY id LIMIT ?',
+                (after_id, batch_size)
+            )
+            rows = cursor.fetchall()
+            
+            updates = []
+            raw_rows = []
+            bytes_before = bytes_after = 0
+            for row in rows:
+                details = json.loads(row['details_json']) if row['details_json'] else {}
+                if 'raw_data' not in details:
+                    continue
+                    
+                payload = compress_raw(details.pop('raw_data'))
+                details_json = json.dumps(details)
+                bytes_before += len(row['details_json'].encode())
+                bytes_after += len(details_json.encode()) + len(payload)
+                updates.append((details_json, row['id']))
+                raw_rows.append((row['id'], RAW_CODEC, payload))
+                
+            cursor.executemany(
+                'INSERT OR REPLACE INTO trade_raw (tx_id, codec, payload) VALUES (?, ?, ?)',
+                raw_rows
+            )
+            cursor.executemany(
+                'UPDATE whale_transactions SET details_json = ? WHERE id = ?',
+                updates
+            )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            
+        if updates:
+            self._bump_write_generation()
+        last_id = rows[-1]['id'] if rows else None
+        return last_id, len(updates), bytes_before, bytes_after
         
     def transaction_exists(self, tx_hash: str) -> bool:
         """
@@ -176,6 +888,316 @@ class Database:
         finally:
             cursor.close()
         
+    def get_expired_transactions(self, cutoff: int, limit: int) -> List[Dict]:
+        """
+        Get the oldest transactions with a timestamp before cutoff.
+        
+        Args:
+            cutoff: Unix timestamp; older trades are expired
+            limit: Maximum number of rows to return
+            
+        Returns:
+            List of full transaction dictionaries, oldest first
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT * FROM whale_transactions
+                WHERE timestamp < ?
+                ORDER BY timestamp, id
+                LIMIT ?
+            ''', (cutoff, limit))
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            
+    def expire_transactions(self, tx_ids: List[int]) -> int:
+        """
+        Roll transactions up into daily_market_rollups and delete them.
+        
+        Both happen in one short transaction, so callers can work through a
+        large backlog in small batches without holding the write lock long.
+        
+        Args:
+            tx_ids: Ids of the transactions to expire
+            
+        Returns:
+            Number of rows deleted
+        """
+        if not tx_ids:
+            return 0
+            
+        placeholders = ', '.join('?' * len(tx_ids))
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute(f'''
+                INSERT INTO daily_market_rollups (
+                    market_id, day, market_name, trade_count, volume,
+                    buy_volume, sell_volume, max_amount
+                )
+                SELECT
+                    COALESCE(market_id, ''), (timestamp / 86400) * 86400, MAX(market_name),
+                    COUNT(*), SUM(amount),
+                    SUM(CASE WHEN side = 'BUY' THEN amount ELSE 0 END),
+                    SUM(CASE WHEN side = 'SELL' THEN amount ELSE 0 END),
+                    MAX(amount)
+                FROM whale_transactions
+                WHERE id IN ({placeholders})
+                GROUP BY 1, 2
+                ON CONFLICT (market_id, day) DO UPDATE SET
+                    trade_count = trade_count + excluded.trade_count,
+                    volume = volume + excluded.volume,
+                    buy_volume = buy_volume + excluded.buy_volume,
+                    sell_volume = sell_volume + excluded.sell_volume,
+                    max_amount = MAX(max_amount, excluded.max_amount)
+            ''', tx_ids)
+            # Aggregate buckets up to the newest expired trade can no longer
+            # be rebuilt from stored rows
+            cursor.execute(f'''
+                INSERT INTO settings (key, value)
+                SELECT 'retention_horizon', newest
+                FROM (SELECT MAX(timestamp) AS newest FROM whale_transactions WHERE id IN ({placeholders}))
+                WHERE newest IS NOT NULL
+                ON CONFLICT (key) DO UPDATE SET
+                    value = MAX(CAST(value AS INTEGER), CAST(excluded.value AS INTEGER))
+            ''', tx_ids)
+            cursor.execute(
+                f'DELETE FROM whale_transactions WHERE id IN ({placeholders})',
+                tx_ids
+            )
+            deleted = cursor.rowcount
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            
+        self._bump_write_generation()
+        return deleted
+        
+    def get_daily_rollups(self, start_day: int, end_day: int) -> List[Dict]:
+        """
+        Get daily per-market aggregates of expired trades.
+        
+        Args:
+            start_day: First day (Unix timestamp of midnight UTC)
+            end_day: Last day (Unix timestamp of midnight UTC)
+            
+        Returns:
+            List of rollup dictionaries
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT * FROM daily_market_rollups
+                WHERE day BETWEEN ? AND ?
+                ORDER BY day, market_id
+            ''', (start_day, end_day))
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            
+    def get_oldest_transaction_time(self) -> Optional[int]:
+        """
+        Get the timestamp of the oldest stored transaction.
+        
+        Returns:
+            Unix timestamp or None if the table is empty
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('SELECT MIN(timestamp) AS oldest FROM whale_transactions')
+            row = cursor.fetchone()
+            return row['oldest'] if row else None
+        finally:
+            cursor.close()
+            
+    def get_top_markets(self, since: int, limit: int = 10) -> List[Dict]:
+        """
+        Get the markets with the most whale volume since a time.
+        
+        Reads market_hourly, so the cost depends on the number of markets
+        and hours in the window, not on the number of stored trades.
+        
+        Args:
+            since: Unix timestamp; the hour containing it is included
+            limit: Maximum number of markets
+            
+        Returns:
+            List of market aggregate dictionaries, largest volume first
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT
+                    market_id, MAX(market_name) AS market_name,
+                    SUM(trade_count) AS trade_count, SUM(volume) AS volume,
+                    SUM(buy_volume) AS buy_volume, SUM(sell_volume) AS sell_volume,
+                    MAX(max_amount) AS max_amount
+                FROM market_hourly
+                WHERE hour >= ?
+                GROUP BY market_id
+                ORDER BY volume DESC
+                LIMIT ?
+            ''', ((since // 3600) * 3600, limit))
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            
+    def get_top_traders(self, since: int, limit: int = 10) -> List[Dict]:
+        """
+        Get the wallets with the most whale volume since a time.
+        
+        Args:
+            since: Unix timestamp; the day containing it is included
+            limit: Maximum number of traders
+            
+        Returns:
+            List of trader aggregate dictionaries, largest volume first
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT
+                    trader_address,
+                    SUM(trade_count) AS trade_count, SUM(volume) AS volume,
+                    SUM(buy_volume) AS buy_volume, SUM(sell_volume) AS sell_volume,
+                    MAX(max_amount) AS max_amount
+                FROM trader_daily
+                WHERE day >= ?
+                GROUP BY trader_address
+                ORDER BY volume DESC
+                LIMIT ?
+            ''', ((since // 86400) * 86400, limit))
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            
+    def get_window_trades(self, since: int, limit: int, min_amount: Optional[float] = None) -> List[Dict]:
+        """
+        Get recent trades with price and size, for the analytics window.
+        
+        Args:
+            since: Oldest timestamp to include
+            limit: Maximum number of trades (the newest win)
+            min_amount: Only rows of at least this amount, or flagged as
+                unusual, as in the feed (optional)
+            
+        Returns:
+            List of trade dictionaries, oldest first
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(f'''
+                SELECT
+                    id, amount, market_id, market_name, side, timestamp,
+                    json_extract(details_json, '$.price') AS price,
+                    json_extract(details_json, '$.size') AS size
+                FROM whale_transactions
+                WHERE timestamp >= ? AND {FEED_FILTER}
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ?
+            ''', (since, min_amount or 0, limit))
+            trades = [dict(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            
+        trades.reverse()
+        return trades
+        
+    def get_stored_hashes(self, tx_hashes: List[str]) -> set:
+        """
+        Get which of the given transaction hashes are already stored.
+        
+        Args:
+            tx_hashes: Transaction hashes to check
+            
+        Returns:
+            Set of the hashes found
+        """
+        tx_hashes = list(tx_hashes)
+        if not tx_hashes:
+            return set()
+            
+        cursor = self.conn.cursor()
+        try:
+            placeholders = ', '.join('?' * len(tx_hashes))
+            cursor.execute(
+                f'SELECT tx_hash FROM whale_transactions WHERE tx_hash IN ({placeholders})',
+                tx_hashes
+            )
+            return {row['tx_hash'] for row in cursor.fetchall()}
+        finally:
+            cursor.close()
+            
+    def get_market_baselines(self, market_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Get stored anomaly baselines.
+        
+        Args:
+            market_ids: Markets to look up
+            
+        Returns:
+            Dictionary of market ID to baseline row, for the markets found
+        """
+        market_ids = list(market_ids)
+        if not market_ids:
+            return {}
+            
+        cursor = self.conn.cursor()
+        try:
+            placeholders = ', '.join('?' * len(market_ids))
+            cursor.execute(f'''
+                SELECT market_id, sample_count, ewma_mean, ewma_variance, digest, updated_at
+                FROM market_baselines
+                WHERE market_id IN ({placeholders})
+            ''', market_ids)
+            return {row['market_id']: dict(row) for row in cursor.fetchall()}
+        finally:
+            cursor.close()
+            
+    def save_market_baselines(self, baselines: List[Dict]):
+        """
+        Store anomaly baselines, replacing earlier versions.
+        
+        Args:
+            baselines: Baseline rows as returned by get_market_baselines
+        """
+        if not baselines:
+            return
+            
+        cursor = self.conn.cursor()
+        try:
+            cursor.executemany('''
+                INSERT OR REPLACE INTO market_baselines (
+                    market_id, sample_count, ewma_mean, ewma_variance, digest, updated_at
+                ) VALUES (
+                    :market_id, :sample_count, :ewma_mean, :ewma_variance, :digest, :updated_at
+                )
+            ''', baselines)
+            self.conn.commit()
+        finally:
+            cursor.close()
+            
+    def get_latest_tx_hash(self) -> Optional[str]:
+        """
+        Get the hash of the newest stored transaction.
+        
+        Returns:
+            Transaction hash or None if the table is empty
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(
+                'SELECT tx_hash FROM whale_transactions ORDER BY timestamp DESC, id DESC LIMIT 1'
+            )
+            row = cursor.fetchone()
+            return row['tx_hash'] if row else None
+        finally:
+            cursor.close()
+        
     def get_setting(self, key: str) -> Optional[str]:
         """Get a setting value."""
         cursor = self.conn.cursor()
@@ -186,8 +1208,16 @@ class Database:
         finally:
             cursor.close()
         
-    def set_setting(self, key: str, value: str):
-        """Set or update a setting value."""
+    def set_setting(self, key: str, value: str, invalidate: bool = True):
+        """
+        Set or update a setting value.
+        
+        Args:
+            key: Setting name
+            value: Setting value
+            invalidate: Bump the write generation, dropping cached responses;
+                pass False for bookkeeping settings no response depends on
+        """
         cursor = self.conn.cursor()
         try:
             cursor.execute('''
@@ -197,6 +1227,8 @@ class Database:
             self.conn.commit()
         finally:
             cursor.close()
+        if invalidate:
+            self._bump_write_generation()
         
     def get_last_fetch_time(self) -> Optional[int]:
         """Get the last time trades were fetched."""
@@ -205,17 +1237,51 @@ class Database:
         
     def set_last_fetch_time(self, timestamp: int):
         """Set the last fetch time."""
-        self.set_setting('last_fetch_time', str(timestamp))
+        self.set_setting('last_fetch_time', str(timestamp), invalidate=False)
+        
+    def get_backfill_floor(self) -> Optional[float]:
+        """Get the lowest amount whose trades are stored for the whole history."""
+        value = self.get_setting('backfill_floor')
+        return float(value) if value else None
+        
+    def set_backfill_floor(self, amount: float):
+        """Set the lowest amount whose trades are stored for the whole history."""
+        self.set_setting('backfill_floor', str(amount), invalidate=False)
         
     def get_transaction_count(self) -> int:
-        """Get total count of stored transactions."""
+        """Get total count of stored transactions from the trigger-maintained counter."""
         cursor = self.conn.cursor()
         try:
-            cursor.execute('SELECT COUNT(*) as count FROM whale_transactions')
-            return cursor.fetchone()['count']
+            cursor.execute(
+                'SELECT value FROM counters WHERE name = ?',
+                ('whale_transactions',)
+            )
+            row = cursor.fetchone()
+            return row['value'] if row else 0
         finally:
             cursor.close()
         
+    def get_feed_count(self, min_amount: Optional[float] = None) -> int:
+        """
+        Count the stored trades the feed shows.
+        
+        Args:
+            min_amount: Only rows of at least this amount, or flagged as
+                unusual (optional)
+                
+        Returns:
+            Number of feed rows
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM whale_transactions WHERE {FEED_FILTER}',
+                (min_amount or 0,)
+            )
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
+            
     def get_whale_threshold(self) -> float:
         """Get the whale threshold from settings or return default."""
         import config
@@ -233,13 +1299,51 @@ class Database:
             cursor.close()
         
     def set_whale_threshold(self, amount: float):
-        """Set the whale threshold."""
+        """
+        Set the whale threshold.
+        
+        The aggregates that depend on it are not recomputed here; that scans
+        the whole table, so callers run rebuild_aggregates in the background.
+        
+        Args:
+            amount: New threshold in USD
+        """
         self.set_setting('whale_threshold', str(amount))
         
+    def rebuild_aggregates(self):
+        """Recompute market_hourly and trader_daily at the current whale threshold."""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            for statement in AGGREGATE_REBUILD:
+                cursor.execute(statement)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        self._bump_write_generation()
+        
+    @property
+    def write_generation(self) -> int:
+        """Counter bumped by every committed write to this database file."""
+        return _write_generations.get(self.db_path, 0)
+        
+    def _bump_write_generation(self):
+        """Mark cached reads of this database file as stale."""
+        with _write_generations_lock:
+            _write_generations[self.db_path] = _write_generations.get(self.db_path, 0) + 1
+            
     def close(self):
-        """Close database connection."""
-        if self.conn:
-            self.conn.close()
+        """Close every thread's database connection."""
+        self._connected = False
+        with self._connections_lock:
+            for conn in list(self._connections.values()) + self._idle:
+                conn.close()
+            self._connections.clear()
+            self._idle.clear()
+        self._local = threading.local()
             
     def __enter__(self):
         """Context manager entry."""
@@ -2,28 +2,37 @@
 
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
-    QPushButton, QTextEdit, QGroupBox, QGridLayout
+    QPushButton, QGroupBox, QGridLayout, QTreeWidget, QTreeWidgetItem
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThreadPool
 from PyQt5.QtGui import QFont
 from datetime import datetime
 import json
+from database import Database
+from qt_workers import Worker
 
 
 class DetailDialog(QDialog):
     """Dialog to display detailed transaction information."""
     
-    def __init__(self, transaction: dict, parent=None):
+    def __init__(self, tx_hash: str, db: Database, parent=None):
         """
         Initialize detail dialog.
         
+        The transaction is loaded and parsed on a worker thread; the dialog
+        shows a placeholder until it arrives.
+        
         Args:
-            transaction: Transaction data dictionary
+            tx_hash: Hash of the transaction to show
+            db: Database the transaction is loaded from
             parent: Parent widget
         """
         super().__init__(parent)
-        self.transaction = transaction
+        self.tx_hash = tx_hash
+        self.db = db
+        self.transaction = None
         self.init_ui()
+        self._start_loading()
         
     def init_ui(self):
         """Initialize UI components."""
@@ -55,7 +64,7 @@ class DetailDialog(QDialog):
                 left: 10px;
                 padding: 0 5px;
             }
-            QTextEdit {
+            QTreeWidget {
                 background-color: #2d2d2d;
                 color: #e0e0e0;
                 border: 1px solid #3d3d3d;
@@ -92,17 +101,14 @@ class DetailDialog(QDialog):
         title.setAlignment(Qt.AlignCenter)
         layout.addWidget(title)
         
-        # Transaction Info Group
-        tx_group = self._create_transaction_group()
-        layout.addWidget(tx_group)
-        
-        # Market Info Group
-        market_group = self._create_market_group()
-        layout.addWidget(market_group)
-        
-        # Raw Details (expandable)
-        details_group = self._create_details_group()
-        layout.addWidget(details_group)
+        # Groups are added once the transaction has loaded
+        self.content_layout = QVBoxLayout()
+        self.content_layout.setSpacing(15)
+        self.loading_label = QLabel("Loading transaction...")
+        self.loading_label.setAlignment(Qt.AlignCenter)
+        self.content_layout.addWidget(self.loading_label)
+        layout.addLayout(self.content_layout)
+        layout.addStretch()
         
         # Buttons
         button_layout = QHBoxLayout()
@@ -116,6 +122,62 @@ class DetailDialog(QDialog):
         
         self.setLayout(layout)
         
+    def _start_loading(self):
+        """Load the transaction on a worker thread."""
+        worker = Worker(self._load_transaction, self.db, self.tx_hash)
+        worker.signals.result.connect(self._on_loaded)
+        worker.signals.error.connect(self._on_load_error)
+        QThreadPool.globalInstance().start(worker)
+        
+    @staticmethod
+    def _load_transaction(db: Database, tx_hash: str):
+        """
+        Fetch a transaction and parse its details (runs on a worker thread).
+        
+        Args:
+            db: Database to read from
+            tx_hash: Transaction hash
+            
+        Returns:
+            Tuple of (transaction, details) or None if it no longer exists
+        """
+        transaction = db.get_transaction_by_hash(tx_hash, include_raw=True)
+        if transaction is None:
+            return None
+            
+        try:
+            details = json.loads(transaction.pop('details_json', None) or '{}')
+        except (json.JSONDecodeError, TypeError):
+            details = {}
+            
+        # Raw API payload lives compressed in trade_raw (inline on legacy rows)
+        raw_data = transaction.pop('raw_data', None)
+        if raw_data is not None:
+            details['raw_data'] = raw_data
+        return transaction, details
+        
+    def _on_loaded(self, result):
+        """Build the dialog contents from the loaded transaction."""
+        if result is None:
+            self.loading_label.setText("Transaction not found")
+            return
+            
+        self.transaction, details = result
+        self.loading_label.hide()
+        
+        # Transaction Info Group
+        self.content_layout.addWidget(self._create_transaction_group())
+        
+        # Market Info Group
+        self.content_layout.addWidget(self._create_market_group())
+        
+        # Raw Details (expandable)
+        self.content_layout.addWidget(self._create_details_group(details))
+        
+    def _on_load_error(self, message: str):
+        """Show why the transaction could not be loaded."""
+        self.loading_label.setText(f"Failed to load transaction: {message}")
+        
     def _create_transaction_group(self) -> QGroupBox:
         """Create transaction information group."""
         group = QGroupBox("Transaction Information")
@@ -171,31 +233,50 @@ class DetailDialog(QDialog):
         group.setLayout(grid)
         return group
         
-    def _create_details_group(self) -> QGroupBox:
-        """Create raw details group."""
+    def _create_details_group(self, details: dict) -> QGroupBox:
+        """Create raw details group as a collapsible JSON tree."""
         group = QGroupBox("Additional Details")
         layout = QVBoxLayout()
         
-        # Parse JSON details
-        details_json = self.transaction.get('details_json', '{}')
-        try:
-            if isinstance(details_json, str):
-                details = json.loads(details_json)
-            else:
-                details = details_json
-        except (json.JSONDecodeError, TypeError):
-            details = {}
-            
-        # Show formatted JSON
-        text_edit = QTextEdit()
-        text_edit.setReadOnly(True)
-        text_edit.setMaximumHeight(200)
-        text_edit.setPlainText(json.dumps(details, indent=2))
+        tree = QTreeWidget()
+        tree.setColumnCount(2)
+        tree.setHeaderLabels(["Key", "Value"])
+        tree.setMinimumHeight(200)
+        tree.itemExpanded.connect(self._expand_json_item)
+        
+        # Only the top level is built now; nested values are built on expand
+        self._add_json_children(tree.invisibleRootItem(), details)
+        tree.resizeColumnToContents(0)
         
-        layout.addWidget(text_edit)
+        layout.addWidget(tree)
         group.setLayout(layout)
         return group
         
+    def _add_json_children(self, parent: QTreeWidgetItem, value):
+        """Add one tree level for the members of a JSON object or array."""
+        members = value.items() if isinstance(value, dict) else enumerate(value)
+        for key, child in members:
+            item = QTreeWidgetItem(parent, [str(key), self._json_summary(child)])
+            if isinstance(child, (dict, list)) and child:
+                item.setData(0, Qt.UserRole, child)
+                item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+                
+    def _expand_json_item(self, item: QTreeWidgetItem):
+        """Build an item's children the first time it is expanded."""
+        value = item.data(0, Qt.UserRole)
+        if value is not None and item.childCount() == 0:
+            self._add_json_children(item, value)
+            item.setData(0, Qt.UserRole, None)
+            
+    @staticmethod
+    def _json_summary(value) -> str:
+        """One-line text for a JSON value in the tree."""
+        if isinstance(value, dict):
+            return f"{{{len(value)} keys}}"
+        if isinstance(value, list):
+            return f"[{len(value)} items]"
+        return json.dumps(value)
+        
     def _add_field(self, grid: QGridLayout, row: int, label: str, value: str, bold_value: bool = False):
         """Add a label-value pair to grid."""
         label_widget = QLabel(label)
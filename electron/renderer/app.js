@@ -6,6 +6,8 @@ let transactions = [];
 let expandedCardId = null;
 let transactionLimit = 10; // Default to 10
 let currentThreshold = 10000; // Default threshold
+let latestId = null; // Largest transaction id received (feed high-water mark)
+let streamConnected = false; // True while the live trade stream is open
 
 // Initialize app
 document.addEventListener('DOMContentLoaded', () => {
@@ -24,8 +26,13 @@ document.addEventListener('DOMContentLoaded', () => {
     loadTransactions();
     setupEventListeners();
 
-    // Auto-refresh every minute
-    setInterval(loadTransactions, 60000);
+    // Live push of new trades, with a once-a-minute delta poll as fallback
+    connectTradeStream();
+    setInterval(() => {
+        if (!streamConnected) {
+            loadNewTransactions();
+        }
+    }, 60000);
 });
 
 // Setup event listeners
@@ -115,6 +122,8 @@ async function updateThreshold() {
             currentThreshold = data.threshold;
             updateEmptyStateText();
             showThresholdFeedback(`Threshold updated to $${formatThreshold(currentThreshold)}`, true);
+            // The feed is filtered by the threshold; backfilled trades stream in
+            loadTransactions();
         } else {
             showThresholdFeedback(data.error || 'Failed to update threshold', false);
         }
@@ -164,6 +173,7 @@ async function loadTransactions() {
         const data = await response.json();
 
         transactions = data.transactions || [];
+        latestId = data.latest_id ?? null;
         renderTransactions();
         updateTimestamp();
 
@@ -173,6 +183,72 @@ async function loadTransactions() {
     }
 }
 
+// Load only transactions inserted since the last response and merge them in
+async function loadNewTransactions() {
+    if (latestId === null) {
+        return loadTransactions();
+    }
+
+    try {
+        const response = await fetch(`${API_BASE}/transactions?since_id=${latestId}&limit=${transactionLimit}`);
+        const data = await response.json();
+
+        if (!data.success) {
+            return;
+        }
+
+        // A full page of deltas may be truncated, so resync from scratch
+        if (data.count >= transactionLimit) {
+            return loadTransactions();
+        }
+
+        latestId = data.latest_id;
+        mergeTransactions(data.transactions);
+        updateTimestamp();
+
+    } catch (error) {
+        console.error('Failed to load new transactions:', error);
+    }
+}
+
+// Merge new transactions into the feed, keeping it sorted and trimmed
+function mergeTransactions(incoming) {
+    const known = new Set(transactions.map(tx => tx.tx_hash));
+    const fresh = incoming.filter(tx => !known.has(tx.tx_hash));
+
+    if (fresh.length === 0) {
+        return;
+    }
+
+    transactions = fresh.concat(transactions)
+        .sort((a, b) => b.timestamp - a.timestamp || (b.id || 0) - (a.id || 0))
+        .slice(0, transactionLimit);
+    renderTransactions();
+}
+
+// Subscribe to the backend's Server-Sent Events stream of new trades
+function connectTradeStream() {
+    const source = new EventSource(`${API_BASE}/stream`);
+
+    source.addEventListener('open', () => {
+        // Catch up on anything stored while the stream was down
+        if (!streamConnected && latestId !== null) {
+            loadNewTransactions();
+        }
+        streamConnected = true;
+    });
+
+    source.addEventListener('trade', (event) => {
+        mergeTransactions([JSON.parse(event.data)]);
+        updateTimestamp();
+    });
+
+    // EventSource reconnects on its own after errors
+    source.addEventListener('error', () => {
+        streamConnected = false;
+    });
+}
+
 // Trigger manual refresh via API
 async function triggerManualRefresh() {
     try {
@@ -0,0 +1,90 @@
+"""In-process publish/subscribe for newly stored whale trades."""
+
+import queue
+import threading
+from typing import Dict, Optional
+import config
+
+
+class Subscription:
+    """A subscriber's bounded queue of events."""
+    
+    def __init__(self, max_queue_size: int):
+        """
+        Initialize subscription.
+        
+        Args:
+            max_queue_size: Events buffered before the subscriber is dropped
+        """
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.closed = False
+        
+    def get(self, timeout: float) -> Optional[Dict]:
+        """
+        Wait for the next event.
+        
+        Args:
+            timeout: Seconds to wait
+            
+        Returns:
+            Event dictionary, or None if nothing arrived in time
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBus:
+    """Fan out events to every subscriber without ever blocking publishers.
+    
+    A subscriber whose queue fills up is a slow consumer. It is closed and
+    removed rather than letting the publisher wait or memory grow.
+    """
+    
+    def __init__(self, max_queue_size: int = config.STREAM_QUEUE_SIZE):
+        """
+        Initialize event bus.
+        
+        Args:
+            max_queue_size: Events buffered per subscriber
+        """
+        self.max_queue_size = max_queue_size
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        
+    def subscribe(self) -> Subscription:
+        """Register a new subscriber."""
+        subscription = Subscription(self.max_queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+        
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscriber."""
+        subscription.closed = True
+        with self._lock:
+            self._subscriptions.discard(subscription)
+            
+    def publish(self, event: Dict):
+        """
+        Deliver an event to every subscriber.
+        
+        Args:
+            event: Event dictionary
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+            
+        for subscription in subscriptions:
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                print("Dropping slow stream subscriber")
+                self.unsubscribe(subscription)
+                
+    @property
+    def subscriber_count(self) -> int:
+        """Number of active subscribers."""
+        with self._lock:
+            return len(self._subscriptions)
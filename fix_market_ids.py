@@ -11,7 +11,7 @@ def fix_market_ids():
     db.connect()
     
     # Get all transactions
-    transactions = db.get_all_transactions()
+    transactions = db.get_all_transactions(include_details=True)
     
     fixed_count = 0
     skipped_count = 0
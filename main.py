@@ -31,7 +31,7 @@ class PolymarketWhaleApp:
         print(f"Starting {config.APP_NAME} v{config.APP_VERSION}")
         
         # Start background service
-        self.notifier_service = NotifierService(on_new_trade=self.on_new_trade)
+        self.notifier_service = NotifierService(on_new_trades=self.on_new_trades)
         self.notifier_service.start()
         
         # Create system tray icon
@@ -46,7 +46,7 @@ class PolymarketWhaleApp:
         
         print("Application started successfully")
         print(f"Monitoring for trades over ${config.WHALE_THRESHOLD:,.2f}")
-        print(f"Polling every {config.POLL_INTERVAL_MINUTES} minutes")
+        print(f"Polling every {config.POLL_MIN_SECONDS}s to {config.POLL_MAX_SECONDS}s, adapting to activity")
         
         # Run Qt event loop
         sys.exit(self.app.exec_())
@@ -108,24 +108,20 @@ class PolymarketWhaleApp:
             self.main_window.raise_()
             
     def manual_refresh(self):
-        """Manually trigger a refresh."""
-        if self.notifier_service:
-            self.notifier_service.poll_now()
-            
-        # Also refresh window if it exists
+        """Manually trigger a refresh without blocking the tray menu."""
         if self.main_window:
-            self.main_window.load_transactions()
+            self.main_window.refresh_data()
             
-    def on_new_trade(self, trade: dict):
+    def on_new_trades(self, trades: list):
         """
-        Callback when new trade is detected.
+        Callback with the new trades found by one poll (polling thread).
         
         Args:
-            trade: Trade dictionary
+            trades: Trade dictionaries, newest first
         """
-        # Refresh main window if it's open
-        if self.main_window and self.main_window.isVisible():
-            self.main_window.load_transactions()
+        # Emitting is thread-safe; the window updates on the GUI thread
+        if self.main_window:
+            self.main_window.trades_arrived.emit(trades)
             
     def quit_app(self):
         """Quit the application."""
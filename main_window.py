@@ -2,21 +2,26 @@
 
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QTableWidget, QTableWidgetItem, QPushButton, QStatusBar,
+    QTableView, QAbstractItemView, QPushButton, QStatusBar,
     QHeaderView, QLabel, QMessageBox
 )
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QFont, QColor
+from PyQt5.QtCore import Qt, QThreadPool, QTimer, pyqtSignal
+from PyQt5.QtGui import QFont
 from datetime import datetime
 from typing import Optional
 import config
 from database import Database
 from detail_dialog import DetailDialog
+from qt_workers import Worker
+from transaction_model import TransactionTableModel
 
 
 class MainWindow(QMainWindow):
     """Main application window."""
     
+    # Emitted from the polling thread with a poll's new trades, newest first
+    trades_arrived = pyqtSignal(list)
+    
     def __init__(self, notifier_service=None):
         """
         Initialize main window.
@@ -28,9 +33,15 @@ class MainWindow(QMainWindow):
         self.db = Database()
         self.db.connect()
         self.notifier_service = notifier_service
+        self.thread_pool = QThreadPool.globalInstance()
+        self.refreshing = False
+        self.model = TransactionTableModel(self.db)
         self.init_ui()
         self.load_transactions()
         
+        # Queued, so the slot runs on the GUI thread whoever emits
+        self.trades_arrived.connect(self.add_trades, Qt.QueuedConnection)
+        
     def init_ui(self):
         """Initialize UI components."""
         self.setWindowTitle(config.WINDOW_TITLE)
@@ -46,7 +57,7 @@ class MainWindow(QMainWindow):
                 color: #e0e0e0;
                 font-size: 13px;
             }
-            QTableWidget {
+            QTableView {
                 background-color: #2d2d2d;
                 alternate-background-color: #252525;
                 gridline-color: #3d3d3d;
@@ -54,10 +65,10 @@ class MainWindow(QMainWindow):
                 border: 1px solid #3d3d3d;
                 border-radius: 5px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #4a4a4a;
             }
             QHeaderView::section {
@@ -120,26 +131,25 @@ class MainWindow(QMainWindow):
         layout.addLayout(header_layout)
         
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels([
-            "Timestamp", "Market", "Amount", "Side", "Outcome"
-        ])
+        self.table = QTableView()
+        self.table.setModel(self.model)
         
         # Configure table
         self.table.setAlternatingRowColors(True)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SingleSelection)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.verticalHeader().setVisible(False)
         
-        # Column widths
+        # Fixed row heights let the view skip measuring every row
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        
+        # Column widths (ResizeToContents would scan every loaded row)
         header = self.table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(QHeaderView.Interactive)
         header.setSectionResizeMode(1, QHeaderView.Stretch)
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(4, QHeaderView.ResizeToContents)
+        header.resizeSection(0, 170)
+        header.resizeSection(2, 130)
         
         # Double-click to view details
         self.table.doubleClicked.connect(self.show_transaction_details)
@@ -159,49 +169,23 @@ class MainWindow(QMainWindow):
         self.update_status_bar()
         
     def load_transactions(self):
-        """Load transactions from database and populate table."""
-        transactions = self.db.get_all_transactions()
-        
-        self.table.setRowCount(len(transactions))
-        
-        for row, tx in enumerate(transactions):
-            # Timestamp
-            timestamp = tx.get('timestamp', 0)
-            if timestamp:
-                time_str = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
-            else:
-                time_str = 'N/A'
-            self.table.setItem(row, 0, QTableWidgetItem(time_str))
-            
-            # Market name
-            market = tx.get('market_name', 'Unknown')
-            self.table.setItem(row, 1, QTableWidgetItem(market))
-            
-            # Amount
-            amount = tx.get('amount', 0)
-            amount_item = QTableWidgetItem(f"${amount:,.2f}")
-            amount_item.setForeground(QColor("#4CAF50"))  # Green
-            amount_font = QFont()
-            amount_font.setBold(True)
-            amount_item.setFont(amount_font)
-            self.table.setItem(row, 2, amount_item)
-            
-            # Side
-            side = tx.get('side', 'N/A')
-            side_item = QTableWidgetItem(side)
-            if side == 'BUY':
-                side_item.setForeground(QColor("#2196F3"))  # Blue
-            elif side == 'SELL':
-                side_item.setForeground(QColor("#FF9800"))  # Orange
-            self.table.setItem(row, 3, side_item)
-            
-            # Outcome
-            outcome = tx.get('outcome', 'N/A')
-            self.table.setItem(row, 4, QTableWidgetItem(outcome))
-            
-            # Store full transaction data in row
-            self.table.item(row, 0).setData(Qt.UserRole, tx)
-            
+        """Reload the table from the newest page of transactions."""
+        self.model.reload()
+        self.update_status_bar()
+        
+    def load_new_transactions(self):
+        """Insert rows stored since the last load at the top of the table."""
+        self.model.fetch_new()
+        self.update_status_bar()
+        
+    def add_trades(self, trades: list):
+        """
+        Add a poll's new trades to the table in timestamp order.
+        
+        Args:
+            trades: Trade dictionaries with the feed columns, newest first
+        """
+        self.model.prepend(trades)
         self.update_status_bar()
         
     def show_transaction_details(self):
@@ -210,31 +194,43 @@ class MainWindow(QMainWindow):
         if not selected_rows:
             return
             
-        row = selected_rows[0].row()
-        tx = self.table.item(row, 0).data(Qt.UserRole)
+        tx_hash = selected_rows[0].data(Qt.UserRole)
         
-        if tx:
-            dialog = DetailDialog(tx, self)
+        if tx_hash:
+            dialog = DetailDialog(tx_hash, self.db, self)
             dialog.exec_()
             
     def refresh_data(self):
-        """Refresh transaction data."""
+        """Poll for new trades on a worker thread, then update the table."""
+        if self.refreshing:
+            return
+            
+        if not self.notifier_service:
+            self.load_new_transactions()
+            return
+            
+        self.refreshing = True
         self.refresh_btn.setEnabled(False)
         self.refresh_btn.setText("⏳ Refreshing...")
         
-        # Trigger manual poll if service is available
-        if self.notifier_service:
-            try:
-                self.notifier_service.poll_now()
-            except Exception as e:
-                QMessageBox.warning(
-                    self,
-                    "Refresh Error",
-                    f"Failed to fetch new trades: {str(e)}"
-                )
-        
-        # Reload table
-        self.load_transactions()
+        # poll_now can block on network retries; keep it off the GUI thread
+        worker = Worker(self.notifier_service.poll_now)
+        worker.signals.error.connect(self._on_refresh_error)
+        worker.signals.finished.connect(self._on_refresh_finished)
+        self.thread_pool.start(worker)
+        
+    def _on_refresh_error(self, message: str):
+        """Report a failed background refresh."""
+        QMessageBox.warning(
+            self,
+            "Refresh Error",
+            f"Failed to fetch new trades: {message}"
+        )
+        
+    def _on_refresh_finished(self):
+        """Show newly stored trades once the background refresh is done."""
+        self.refreshing = False
+        self.load_new_transactions()
         
         # Re-enable button after short delay
         QTimer.singleShot(1000, self._reset_refresh_button)
@@ -246,14 +242,18 @@ class MainWindow(QMainWindow):
         
     def update_status_bar(self):
         """Update status bar with transaction count and last update."""
-        count = self.table.rowCount()
+        count = self.db.get_feed_count(self.model.min_amount)
+        stored = self.db.get_transaction_count()
         
+        # Trades kept only for alert rules or anomaly baselines are not shown
+        status = f"Total: {count} whale transactions"
+        if stored != count:
+            status += f" ({stored} stored)"
+            
         last_fetch = self.db.get_last_fetch_time()
         if last_fetch:
             last_fetch_str = datetime.fromtimestamp(last_fetch).strftime('%Y-%m-%d %H:%M:%S')
-            status = f"Total: {count} whale transactions | Last updated: {last_fetch_str}"
-        else:
-            status = f"Total: {count} whale transactions"
+            status += f" | Last updated: {last_fetch_str}"
             
         self.status_bar.showMessage(status)
         
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Move raw API payloads out of details_json into the compressed trade_raw table."""
+
+import argparse
+import os
+import config
+from database import Database
+
+
+def file_size(db_path):
+    """Size of the database file plus its WAL, in bytes."""
+    wal_path = db_path + '-wal'
+    size = os.path.getsize(db_path)
+    if os.path.exists(wal_path):
+        size += os.path.getsize(wal_path)
+    return size
+
+
+def migrate_raw_data(db_path=config.DB_PATH, batch_size=1000, vacuum=False):
+    """Migrate every row in small batches, then print a size report."""
+    size_before = file_size(db_path)
+
+    db = Database(db_path)
+    db.connect()
+
+    last_id = 0
+    moved = 0
+    bytes_before = 0
+    bytes_after = 0
+
+    print(f"Migrating raw payloads in {db_path}...")
+
+    while True:
+        last_id, batch_moved, batch_before, batch_after = db.move_raw_data(last_id, batch_size)
+        if last_id is None:
+            break
+        moved += batch_moved
+        bytes_before += batch_before
+        bytes_after += batch_after
+        if batch_moved:
+            print(f"  ...{moved} rows moved (up to id {last_id})")
+
+    if vacuum:
+        print("Reclaiming free pages with VACUUM...")
+        db.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        db.conn.execute('VACUUM')
+
+    db.close()
+    size_after = file_size(db_path)
+
+    print(f"\n{'='*60}")
+    print(f"✓ Moved {moved} raw payloads to trade_raw")
+    if bytes_before:
+        print(f"  Row payload bytes: {bytes_before:,} → {bytes_after:,} "
+              f"({100 * (1 - bytes_after / bytes_before):.1f}% smaller)")
+    print(f"  Database file: {size_before:,} → {size_after:,} bytes"
+          f"{'' if vacuum else ' (run with --vacuum to shrink the file)'}")
+    print(f"{'='*60}")
+
+    return moved, bytes_before, bytes_after, size_before, size_after
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db', default=config.DB_PATH, help='Database file to migrate')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rows per transaction')
+    parser.add_argument('--vacuum', action='store_true', help='VACUUM afterwards to shrink the file')
+    args = parser.parse_args()
+
+    migrate_raw_data(args.db, args.batch_size, args.vacuum)
@@ -0,0 +1,228 @@
+"""Desktop notification delivery off the polling thread."""
+
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import config
+
+
+_STOP = object()
+
+
+class TokenBucket:
+    """Token-bucket rate limiter."""
+    
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the bucket, full.
+        
+        Args:
+            rate: Tokens added per second
+            capacity: Largest number of tokens held (the burst size)
+            clock: Monotonic clock (for tests)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+        
+    def _refill(self):
+        """Add the tokens earned since the last call."""
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        
+    def try_acquire(self) -> bool:
+        """Take one token if available."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+        
+    def wait_time(self) -> float:
+        """Seconds until a token will be available."""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+def format_usd(amount: float) -> str:
+    """Format a dollar amount compactly ($12,500 / $1.4M)."""
+    if amount >= 1_000_000:
+        return f"${amount / 1_000_000:.1f}M"
+    return f"${amount:,.0f}"
+
+
+# What a notified trade matched, in display order: (summary title label,
+# breakdown label)
+MATCH_LABELS = {
+    'whale': ('whale trades', 'whale'),
+    'unusual': ('unusual trades', 'unusual'),
+    'alert': ('alert rule matches', 'alert rule')
+}
+
+
+def match_kind(trade: Dict) -> str:
+    """
+    Get what a notified trade matched: 'unusual', 'whale' or 'alert'.
+    
+    Trades without an 'alert_rules' list of matched rule names count as
+    whale trades.
+    """
+    if trade.get('anomaly'):
+        return 'unusual'
+    if 'whale' in trade.get('alert_rules', ['whale']):
+        return 'whale'
+    return 'alert'
+
+
+def format_trade(trade: Dict) -> Tuple[str, str]:
+    """
+    Build the notification for a single trade, titled by what it matched.
+    
+    Returns:
+        Tuple of (title, body)
+    """
+    anomaly = trade.get('anomaly')
+    kind = match_kind(trade)
+    if kind == 'unusual':
+        label = "Unusual Trade"
+    elif kind == 'whale':
+        label = "Whale Trade"
+    else:
+        label = trade['alert_rules'][0]
+    title = f"🐋 {label}: ${trade['amount']:,.2f}"
+    
+    body = f"{trade['market_name']}\n"
+    body += f"Side: {trade['side']}\n"
+    if anomaly:
+        body += f"Above p{anomaly['quantile'] * 100:g} for this market ({format_usd(anomaly['threshold'])})\n"
+    body += f"Time: {datetime.fromtimestamp(trade['timestamp']).strftime('%Y-%m-%d %H:%M:%S')}"
+    return title, body
+
+
+def format_summary(trades: List[Dict]) -> Tuple[str, str]:
+    """
+    Build one notification summarising a burst of trades.
+    
+    The title names what the trades matched when they all matched the
+    same thing; a mixed burst gets a neutral title and a breakdown.
+    
+    Returns:
+        Tuple of (title, body)
+    """
+    total = sum(trade['amount'] for trade in trades)
+    top = max(trades, key=lambda trade: trade['amount'])
+    counts = {kind: 0 for kind in MATCH_LABELS}
+    for trade in trades:
+        counts[match_kind(trade)] += 1
+    kinds = [kind for kind in MATCH_LABELS if counts[kind]]
+    
+    label = MATCH_LABELS[kinds[0]][0] if len(kinds) == 1 else 'trades'
+    title = f"🐋 {len(trades)} {label}, {format_usd(total)} total"
+    body = f"Top: {format_usd(top['amount'])} {top['side']} on {top['market_name']}"
+    if len(kinds) > 1:
+        body += "\nMatched: " + ", ".join(f"{counts[kind]} {MATCH_LABELS[kind][1]}" for kind in kinds)
+    return title, body
+
+
+class NotificationDispatcher:
+    """Deliver whale notifications from a worker thread.
+    
+    submit() only enqueues, so ingestion never waits on D-Bus. The worker
+    gathers trades arriving within the coalesce window into one summary,
+    and a token bucket caps how many popups are shown; trades that arrive
+    while it waits for a token join the pending summary.
+    """
+    
+    def __init__(
+        self,
+        send: Callable[[str, str], None],
+        coalesce_seconds: float = config.NOTIFY_COALESCE_SECONDS,
+        rate_per_minute: float = config.NOTIFY_RATE_PER_MINUTE,
+        burst: int = config.NOTIFY_BURST
+    ):
+        """
+        Initialize dispatcher.
+        
+        Args:
+            send: Function that shows a notification given (title, body)
+            coalesce_seconds: How long to gather trades before notifying
+            rate_per_minute: Sustained notifications allowed per minute
+            burst: Notifications allowed back to back
+        """
+        self.send = send
+        self.coalesce_seconds = coalesce_seconds
+        self.bucket = TokenBucket(rate_per_minute / 60, burst)
+        self.queue = queue.Queue()
+        self.thread: Optional[threading.Thread] = None
+        
+    def start(self):
+        """Start the worker thread."""
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._run, name='notification-dispatcher', daemon=True)
+        self.thread.start()
+        
+    def stop(self, timeout: float = 2.0):
+        """Stop the worker thread, dropping notifications still pending."""
+        if self.thread is None:
+            return
+        self.queue.put(_STOP)
+        self.thread.join(timeout)
+        self.thread = None
+        
+    def submit(self, trade: Dict):
+        """
+        Queue a trade for notification without blocking.
+        
+        Args:
+            trade: Trade dictionary
+        """
+        self.queue.put_nowait(trade)
+        
+    def _run(self):
+        """Worker loop: gather a burst, wait for a token, notify."""
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                return
+                
+            batch = [item]
+            stopping = self._gather(batch, time.monotonic() + self.coalesce_seconds)
+            while not stopping and not self.bucket.try_acquire():
+                stopping = self._gather(batch, time.monotonic() + self.bucket.wait_time())
+            if stopping:
+                return
+                
+            self._deliver(batch)
+            
+    def _gather(self, batch: List[Dict], deadline: float) -> bool:
+        """
+        Add queued trades to batch until the deadline.
+        
+        Returns:
+            True if stop() was called meanwhile
+        """
+        while True:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                return False
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                return False
+            if item is _STOP:
+                return True
+            batch.append(item)
+            
+    def _deliver(self, batch: List[Dict]):
+        """Show one notification for the batch."""
+        title, body = format_trade(batch[0]) if len(batch) == 1 else format_summary(batch)
+        try:
+            self.send(title, body)
+        except Exception as e:
+            print(f"Error sending notification: {e}")
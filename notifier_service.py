@@ -1,34 +1,69 @@
 """Background service for polling and notifications."""
 
+import asyncio
 import notify2
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
 from typing import Callable, Optional
 import config
-from database import Database
-from polymarket_api import PolymarketAPI
+from adaptive_scheduler import AdaptivePollInterval
+from alert_rules import AlertRuleSet
+from anomaly import AnomalyDetector
+from database import FEED_COLUMNS, Database
+from event_bus import EventBus
+from notification_dispatcher import NotificationDispatcher
+from polymarket_api import AsyncPolymarketAPI, PolymarketAPI
+from retention import RetentionEngine
+from service_status import ServiceStatus
+from trade_window import TradeWindow
 
 
 class NotifierService:
     """Background service for polling Polymarket and sending notifications."""
     
-    def __init__(self, on_new_trade: Optional[Callable] = None):
+    def __init__(
+        self,
+        on_new_trade: Optional[Callable] = None,
+        event_bus: Optional[EventBus] = None,
+        on_new_trades: Optional[Callable] = None,
+        trade_window: Optional[TradeWindow] = None
+    ):
         """
         Initialize the notifier service.
         
         Args:
             on_new_trade: Optional callback when new trade is found
+            event_bus: Optional bus that newly stored trades are published to
+            on_new_trades: Optional callback with all trades a poll stored,
+                newest first, called once per poll from the polling thread
+            trade_window: Optional analytics window fed with the stored trades
+                the feed shows
         """
         self.db = Database()
         # Don't connect here - will connect in start() to avoid cursor issues
         self.api = None  # Will initialize in start() with proper threshold
+        self.alert_rules = None  # Loaded in start(); decides what notifies
+        self.anomalies = None  # Per-market baselines, created in start()
+        self.feed_threshold = config.WHALE_THRESHOLD  # Smallest trade shown in the feed
         
         self.scheduler = BackgroundScheduler()
         self.on_new_trade = on_new_trade
+        self.on_new_trades = on_new_trades
+        self.trade_window = trade_window
+        self.event_bus = event_bus
         self.is_running = False
+        self.status = ServiceStatus()
+        self.poll_interval = AdaptivePollInterval()
         
-        # Initialize notification system
+        # Single-flight polling: set while a poll runs, joined by other triggers
+        self._poll_lock = threading.Lock()
+        self._poll_done = None
+        
+        # Initialize notification system; popups are shown from a worker
         notify2.init(config.APP_NAME)
+        self.notifications = NotificationDispatcher(self._show_notification)
         
     def start(self):
         """Start the background service."""
@@ -41,12 +76,24 @@ class NotifierService:
         # Connect to database
         self.db.connect()
         
-        # Initialize API with threshold from database
-        whale_threshold = self.db.get_whale_threshold()
-        self.api = PolymarketAPI(whale_threshold=whale_threshold)
+        # Fetch once at the lowest threshold any alert rule needs; the rules
+        # then pick what to notify about locally
+        self.alert_rules = AlertRuleSet.load(self.db)
+        self.feed_threshold = self.db.get_whale_threshold()
+        self.api = PolymarketAPI(whale_threshold=self.alert_rules.fetch_threshold)
+        self.anomalies = AnomalyDetector(self.db)
         
         # Check if first run
         last_fetch = self.db.get_last_fetch_time()
+        if self.db.get_backfill_floor() is None:
+            # History so far was fetched at the rule floor; a first run
+            # fetches it at the full fetch threshold
+            floor = self.alert_rules.min_threshold if last_fetch else self.alert_rules.fetch_threshold
+            self.db.set_backfill_floor(floor)
+        self.status.load(
+            self.db.get_transaction_count(), last_fetch,
+            feed_trades=self.db.get_feed_count(self.feed_threshold)
+        )
         
         if last_fetch is None:
             print("First run detected - fetching initial trades...")
@@ -54,43 +101,115 @@ class NotifierService:
         else:
             print(f"Last fetch: {datetime.fromtimestamp(last_fetch)}")
             
-        # Schedule polling job every N minutes
+        # One persistent poll job; each poll moves its next run to the
+        # adaptive delay. The interval is only a fallback should that fail.
         self.scheduler.add_job(
-            self._poll_trades,
+            self._scheduled_poll,
             'interval',
-            minutes=config.POLL_INTERVAL_MINUTES,
+            seconds=config.POLL_MAX_SECONDS,
+            next_run_time=datetime.now() + timedelta(seconds=self.poll_interval.next_delay()),
             id='poll_trades',
             replace_existing=True
         )
         
+        # Roll up and prune old trades in the background
+        if config.RETENTION_DAYS:
+            self.scheduler.add_job(
+                self._apply_retention,
+                'interval',
+                hours=config.RETENTION_INTERVAL_HOURS,
+                next_run_time=datetime.now() + timedelta(minutes=1),
+                id='apply_retention',
+                replace_existing=True
+            )
+            
+        self.notifications.start()
         self.scheduler.start()
         self.is_running = True
-        print(f"Service started - polling every {config.POLL_INTERVAL_MINUTES} minutes")
         
+        # Rules may have been lowered while the service was stopped
+        self._schedule_backfill()
+        print(f"Service started - polling adaptively every "
+              f"{config.POLL_MIN_SECONDS}s to {config.POLL_MAX_SECONDS}s")
+        
+    def _schedule_next_poll(self):
+        """Move the poll job's next run to the current adaptive delay."""
+        delay = self.poll_interval.next_delay()
+        self.scheduler.modify_job('poll_trades', next_run_time=datetime.now() + timedelta(seconds=delay))
+        
+    def _scheduled_poll(self):
+        """Run a poll, then set when the next one runs (scheduled job)."""
+        try:
+            self._poll_trades()
+        finally:
+            if self.is_running:
+                self._schedule_next_poll()
+                
     def _initial_fetch(self):
         """Fetch initial trades on first run."""
+        started = time.monotonic()
+        now = int(datetime.now().timestamp())
+        fetched = new_count = 0
+        
         try:
-            trades = self.api.fetch_initial_trades()
+            trades = asyncio.run(AsyncPolymarketAPI(self.api).fetch_initial_trades())
+            fetched = len(trades)
+            
+            self._detect_anomalies(trades)
+            inserted = self.db.insert_transactions(trades)
+            new_count = len(inserted)
+            feed = [trade for trade in inserted if self._in_feed(trade)]
+            self.status.record_inserted(new_count, len(feed))
+            if self.trade_window is not None:
+                self.trade_window.append(feed)
             
-            new_count = 0
-            for trade in trades:
-                if self.db.insert_transaction(trade):
-                    new_count += 1
-                    
             print(f"Initial fetch complete: {new_count} whale trades stored")
             
-            # Update last fetch time
-            now = int(datetime.now().timestamp())
-            self.db.set_last_fetch_time(now)
+            # High-water mark is the newest trade seen, not the wall clock
+            high_water = max((t['timestamp'] for t in trades), default=now)
+            self.db.set_last_fetch_time(high_water)
             
             # Don't send notifications for initial fetch
             
+            self.status.record_poll(now, time.monotonic() - started, fetched, new_count, True, high_water)
+            
         except Exception as e:
             print(f"Error during initial fetch: {e}")
+            self.status.record_poll(now, time.monotonic() - started, fetched, new_count, False)
             
     def _poll_trades(self):
-        """Poll for new trades (scheduled job)."""
+        """
+        Poll for new trades, joining the poll already in progress if any.
+        
+        The scheduler, the tray menu, the UI and /api/refresh can all trigger
+        a poll. Only one runs at a time; a trigger arriving meanwhile waits
+        for that poll to finish instead of starting a second one.
+        """
+        with self._poll_lock:
+            done = self._poll_done
+            leader = done is None
+            if leader:
+                done = self._poll_done = threading.Event()
+                
+        if not leader:
+            print("Poll already in progress - waiting for it")
+            done.wait()
+            return
+            
+        try:
+            self._run_poll()
+        finally:
+            with self._poll_lock:
+                self._poll_done = None
+            done.set()
+            
+    def _run_poll(self):
+        """Fetch, store and announce trades newer than the high-water mark."""
         print(f"Polling for new trades at {datetime.now()}")
+        started = time.monotonic()
+        now = int(datetime.now().timestamp())
+        fetched = new_count = 0
+        new_trades = []
         
         try:
             last_fetch = self.db.get_last_fetch_time()
@@ -99,78 +218,284 @@ class NotifierService:
                 self._initial_fetch()
                 return
                 
-            # Fetch new trades since last poll
-            trades = self.api.fetch_new_trades(last_fetch)
+            # Fetch from a little before the newest trade seen, storing each
+            # page as it arrives; trades already stored are skipped on insert
+            last_hash = self.db.get_latest_tx_hash()
+            high_water = last_fetch
+            start_time = last_fetch - config.POLL_OVERLAP_SECONDS
+            print(f"Fetching new trades since {datetime.fromtimestamp(start_time)}")
             
-            new_count = 0
-            for trade in trades:
-                if self.db.insert_transaction(trade):
+            for page in self.api.iter_trade_pages(
+                start_time=start_time, stop_at_hash=last_hash
+            ):
+                fetched += len(page)
+                high_water = max(high_water, max(t['timestamp'] for t in page))
+                self._detect_anomalies(page)
+                inserted = self.db.insert_transactions(page)
+                feed = [trade for trade in inserted if self._in_feed(trade)]
+                self.status.record_inserted(len(inserted), len(feed))
+                if self.trade_window is not None:
+                    self.trade_window.append(feed)
+                    
+                for trade in inserted:
                     new_count += 1
-                    # Send notification for new trade
-                    self._send_notification(trade)
+                    # Send notification if the trade is unusual for its
+                    # market or any alert rule matches
+                    matches = self.alert_rules.evaluate(trade)
+                    if trade.get('anomaly') or matches:
+                        trade['alert_rules'] = [rule.name for rule in matches]
+                        self._send_notification(trade)
                     
                     # Call callback if provided
                     if self.on_new_trade:
                         self.on_new_trade(trade)
                         
+                    # Trades fetched only for lower alert rules or the anomaly
+                    # baselines stay out of the feed, unless they were flagged
+                    if not self._in_feed(trade):
+                        continue
+                        
+                    feed_row = {key: trade.get(key) for key in FEED_COLUMNS if key in trade}
+                    if trade.get('anomaly'):
+                        feed_row['unusual'] = True
+                    new_trades.append(feed_row)
+                    
+                    # Push to live stream subscribers
+                    if self.event_bus:
+                        self.event_bus.publish(feed_row)
+                        
+            # Hand the whole poll's trades over at once
+            if self.on_new_trades and new_trades:
+                new_trades.sort(key=lambda tx: (tx['timestamp'], tx['id']), reverse=True)
+                self.on_new_trades(new_trades)
+                
             if new_count > 0:
                 print(f"Found {new_count} new whale trades")
             else:
                 print("No new whale trades")
                 
-            # Update last fetch time
-            now = int(datetime.now().timestamp())
-            self.db.set_last_fetch_time(now)
+            # Advance the high-water mark to the newest trade actually seen
+            self.db.set_last_fetch_time(high_water)
+            # Every poll re-reads the overlap, so activity is judged by new trades
+            self.poll_interval.record(new_count, fetched >= config.TRADES_LIMIT, True)
+            self.status.record_poll(now, time.monotonic() - started, fetched, new_count, True, high_water)
             
         except Exception as e:
             print(f"Error during polling: {e}")
+            self.poll_interval.record(new_count, False, False)
+            self.status.record_poll(now, time.monotonic() - started, fetched, new_count, False)
             
-    def _send_notification(self, trade: dict):
+    def _in_feed(self, trade: dict) -> bool:
+        """Whether the feed, and so the analytics window, shows a stored trade."""
+        return trade['amount'] >= self.feed_threshold or bool(trade.get('anomaly'))
+        
+    def _detect_anomalies(self, trades: list):
         """
-        Send desktop notification for a whale trade.
+        Score fetched trades not stored yet against their market baselines.
+        
+        This is the ingest stage between parsing and insert: unusual trades
+        are marked with an 'anomaly' entry, which insert_transactions stores
+        with them. Trades already stored (the poll overlap) are skipped so
+        no trade enters a baseline twice. A failure here is logged and never
+        stops the poll.
         
         Args:
-            trade: Trade dictionary
+            trades: Trades as parsed by PolymarketAPI
         """
         try:
-            # Format amount with commas
-            amount_str = f"${trade['amount']:,.2f}"
-            
-            # Create notification title and body
-            title = f"🐋 Whale Trade: {amount_str}"
-            
-            body = f"{trade['market_name']}\n"
-            body += f"Side: {trade['side']}\n"
-            body += f"Time: {datetime.fromtimestamp(trade['timestamp']).strftime('%Y-%m-%d %H:%M:%S')}"
-            
-            # Send notification
-            notification = notify2.Notification(
-                title,
-                body,
-                config.NOTIFICATION_ICON
-            )
-            notification.set_timeout(config.NOTIFICATION_TIMEOUT)
-            notification.show()
+            stored = self.db.get_stored_hashes(trade['tx_hash'] for trade in trades)
+            fresh = {}
+            for trade in trades:
+                if trade['tx_hash'] not in stored:
+                    fresh.setdefault(trade['tx_hash'], trade)
+                    
+            flagged = self.anomalies.process(list(fresh.values()))
+            if flagged:
+                print(f"Flagged {len(flagged)} unusual trades")
+        except Exception as e:
+            print(f"Error during anomaly detection: {e}")
             
-            print(f"Notification sent: {title}")
+    def _apply_retention(self):
+        """Expire trades older than the retention window (scheduled job)."""
+        try:
+            deleted = RetentionEngine(self.db).run()
+            if deleted:
+                self.status.record_deleted(deleted)
+                self._refresh_feed_count()
+        except Exception as e:
+            print(f"Error during retention: {e}")
             
+    def _rebuild_aggregates(self):
+        """Recompute the threshold-dependent aggregates and feed count (scheduled job)."""
+        try:
+            self.db.rebuild_aggregates()
         except Exception as e:
-            print(f"Error sending notification: {e}")
+            print(f"Error rebuilding aggregates: {e}")
+        self._refresh_feed_count()
+        
+    def _refresh_feed_count(self):
+        """Recount the stored trades the feed shows."""
+        try:
+            self.status.set_feed_trades(self.db.get_feed_count(self.feed_threshold))
+        except Exception as e:
+            print(f"Error counting feed trades: {e}")
             
+    def _send_notification(self, trade: dict):
+        """
+        Queue a desktop notification for a trade that matched.
+        
+        Bursts are coalesced into summaries and rate limited by the
+        dispatcher, so this never blocks the poll.
+        
+        Args:
+            trade: Trade dictionary
+        """
+        self.notifications.submit(trade)
+        
+    def _show_notification(self, title: str, body: str):
+        """
+        Show a desktop notification (notification dispatcher thread).
+        
+        Args:
+            title: Notification title
+            body: Notification body
+        """
+        notification = notify2.Notification(
+            title,
+            body,
+            config.NOTIFICATION_ICON
+        )
+        notification.set_timeout(config.NOTIFICATION_TIMEOUT)
+        notification.show()
+        
+        print(f"Notification sent: {title}")
+        
     def poll_now(self):
         """Manually trigger a poll for new trades."""
         print("Manual poll triggered")
         self._poll_trades()
         
-    def update_threshold(self, amount: float):
+    def update_threshold(self, amount: float) -> bool:
         """Update the whale threshold dynamically.
         
         Args:
             amount: New threshold amount
+            
+        Returns:
+            True if a backfill of the newly uncovered amount band was started
         """
         print(f"Updating whale threshold to ${amount:,.2f}")
-        self.api.whale_threshold = amount
+        self.feed_threshold = amount
+        # Rebuilding scans the whole table, so it runs off the request thread
+        self.scheduler.add_job(self._rebuild_aggregates, id='rebuild_aggregates', replace_existing=True)
+        return self._apply_alert_rules(AlertRuleSet.from_json(self.alert_rules.to_json(), amount))
+        
+    def update_alert_rules(self, rules_json: str) -> bool:
+        """Replace the custom alert rules.
+        
+        Args:
+            rules_json: JSON list of rule dictionaries
+            
+        Returns:
+            True if a backfill of the newly uncovered amount band was started
+            
+        Raises:
+            ValueError: If a rule is invalid
+        """
+        rules = AlertRuleSet.from_json(rules_json, self.db.get_whale_threshold())
+        rules.save(self.db)
+        print(f"Loaded {len(rules.rules)} alert rules, fetching trades over ${rules.fetch_threshold:,.2f}")
+        return self._apply_alert_rules(rules)
+        
+    def _apply_alert_rules(self, rules: AlertRuleSet) -> bool:
+        """
+        Switch to a new rule set and its fetch threshold.
+        
+        Raising the fetch threshold needs nothing else: reads filter by the
+        whale threshold, and stored trades stay available if it drops again.
+        Lowering it below the covered floor schedules a backfill.
         
+        Returns:
+            True if a backfill was scheduled
+        """
+        self.alert_rules = rules
+        self.api.whale_threshold = rules.fetch_threshold
+        return self._schedule_backfill()
+        
+    def _schedule_backfill(self) -> bool:
+        """
+        Schedule a background fetch of the band below the covered floor.
+        
+        The covered floor is stored in the settings table and only drops
+        once a backfill completes, so raising and lowering the threshold
+        again, or restarting, never fetches a band that is already stored.
+        
+        Returns:
+            True if a backfill was scheduled
+        """
+        covered = self.db.get_backfill_floor()
+        low = self.alert_rules.fetch_threshold
+        if covered is None or low >= covered or not self.is_running:
+            return False
+            
+        self.scheduler.add_job(
+            self._backfill_band,
+            args=(low, covered),
+            id=f'backfill_band_{low}',
+            replace_existing=True
+        )
+        return True
+        
+    def _backfill_band(self, low: float, high: float):
+        """
+        Fetch and store trades in [low, high) over the stored history (scheduled job).
+        
+        The API only filters by a minimum amount, so trades at or above high
+        come back too; they are already stored and are dropped before insert.
+        
+        Args:
+            low: New fetch threshold
+            high: Covered floor the band stops at
+        """
+        now = int(datetime.now().timestamp())
+        # Only the stored history needs the band, however long retention is
+        oldest = self.db.get_oldest_transaction_time()
+        if oldest is None:
+            start = now - config.FALLBACK_FETCH_DAYS * 24 * 3600
+        elif config.RETENTION_DAYS:
+            start = max(oldest, now - config.RETENTION_DAYS * 24 * 3600)
+        else:
+            start = oldest
+            
+        print(f"Backfilling trades from ${low:,.2f} to ${high:,.2f} since {datetime.fromtimestamp(start)}")
+        try:
+            api = PolymarketAPI(whale_threshold=low, session=self.api.session)
+            trades = AsyncPolymarketAPI(api).backfill(start, now)
+            band = [trade for trade in trades if low <= trade['amount'] < high]
+            
+            inserted = self.db.insert_transactions(band)
+            self.status.record_inserted(len(inserted), sum(1 for trade in inserted if self._in_feed(trade)))
+            # The window overwrites in append order, so only trades recent
+            # enough for its queries may go in; older ones would evict live rows
+            if self.trade_window is not None:
+                window_start = now - config.TRADE_WINDOW_HOURS * 3600
+                self.trade_window.append(
+                    trade for trade in inserted
+                    if trade['timestamp'] >= window_start and self._in_feed(trade)
+                )
+            print(f"Backfill complete: {len(inserted)} of {len(band)} trades in the band were new")
+            self.db.set_backfill_floor(min(low, self.db.get_backfill_floor() or low))
+            
+            # Live clients merge backfilled rows into the feed by timestamp
+            if self.event_bus:
+                for trade in inserted:
+                    if self._in_feed(trade):
+                        self.event_bus.publish(
+                            {key: trade.get(key) for key in FEED_COLUMNS if key in trade}
+                        )
+        except Exception as e:
+            print(f"Error during threshold backfill: {e}")
+            
     def stop(self):
         """Stop the background service."""
         if not self.is_running:
@@ -178,15 +503,17 @@ class NotifierService:
             
         print("Stopping service...")
         self.scheduler.shutdown()
+        self.notifications.stop()
         self.db.close()
         self.is_running = False
         print("Service stopped")
         
     def get_status(self) -> dict:
-        """Get service status information."""
-        return {
+        """Get service status information from the in-memory snapshot."""
+        status = self.status.to_dict()
+        status.update({
             'is_running': self.is_running,
-            'last_fetch': self.db.get_last_fetch_time() if self.db.conn else None,
-            'total_trades': self.db.get_transaction_count() if self.db.conn else 0,
-            'poll_interval': config.POLL_INTERVAL_MINUTES
-        }
+            'poll_interval': round(self.poll_interval.current / 60, 2),
+            'poll_interval_seconds': round(self.poll_interval.current)
+        })
+        return status
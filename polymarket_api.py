@@ -1,24 +1,73 @@
 """Polymarket API client for fetching whale transactions."""
 
+import asyncio
 import requests
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional, Tuple
 import config
 
 
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def create_session(
+    pool_connections: int = config.HTTP_POOL_CONNECTIONS,
+    pool_maxsize: int = config.HTTP_POOL_MAXSIZE
+) -> requests.Session:
+    """
+    Create a pooled, keep-alive HTTP session.
+    
+    Args:
+        pool_connections: Number of host pools to cache
+        pool_maxsize: Maximum connections kept alive per host
+        
+    Returns:
+        Configured requests session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'Accept-Encoding': 'gzip, deflate',
+        'User-Agent': f"{config.APP_NAME}/{config.APP_VERSION}"
+    })
+    return session
+
+
+def get_shared_session() -> requests.Session:
+    """Get the process-wide session shared by every API client."""
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = create_session()
+        return _shared_session
+
+
 class PolymarketAPI:
     """Client for interacting with Polymarket Data API."""
     
-    def __init__(self, whale_threshold: Optional[float] = None):
+    def __init__(
+        self,
+        whale_threshold: Optional[float] = None,
+        session: Optional[requests.Session] = None
+    ):
         """Initialize API client.
         
         Args:
             whale_threshold: Optional custom whale threshold (defaults to config value)
+            session: Optional HTTP session (defaults to the shared pooled session)
         """
         self.base_url = config.POLYMARKET_API_BASE
         self.trades_endpoint = config.TRADES_ENDPOINT
-        self.timeout = config.API_TIMEOUT
+        self.session = session if session is not None else get_shared_session()
+        self.connect_timeout = config.API_CONNECT_TIMEOUT
+        self.timeout = config.API_READ_TIMEOUT
         self.max_retries = config.MAX_RETRIES
         self.whale_threshold = whale_threshold if whale_threshold is not None else config.WHALE_THRESHOLD
         
@@ -26,7 +75,8 @@ class PolymarketAPI:
         self,
         start_time: Optional[int] = None,
         end_time: Optional[int] = None,
-        limit: int = config.TRADES_LIMIT
+        limit: int = config.TRADES_LIMIT,
+        offset: int = 0
     ) -> List[Dict]:
         """
         Fetch whale trades from Polymarket API.
@@ -35,10 +85,29 @@ class PolymarketAPI:
             start_time: Start timestamp in seconds (optional)
             end_time: End timestamp in seconds (optional)
             limit: Maximum number of trades to fetch
+            offset: Number of trades to skip (for pagination)
             
         Returns:
             List of trade dictionaries
         """
+        data = self._request_trades(start_time, end_time, limit, offset)
+        
+        # Parse and normalize the response
+        return self._parse_trades(data)
+        
+    def _request_trades(
+        self,
+        start_time: Optional[int],
+        end_time: Optional[int],
+        limit: int,
+        offset: int
+    ) -> List[Dict]:
+        """
+        Request one page of raw trades from the API, with retries.
+        
+        Returns:
+            Raw API response data
+        """
         params = {
             'filterType': config.FILTER_TYPE,
             'filterAmount': self.whale_threshold,
@@ -51,22 +120,20 @@ class PolymarketAPI:
             params['start'] = start_time
         if end_time:
             params['end'] = end_time
+        if offset:
+            params['offset'] = offset
             
         # Retry logic
         for attempt in range(self.max_retries):
             try:
-                response = requests.get(
+                response = self.session.get(
                     self.trades_endpoint,
                     params=params,
-                    timeout=self.timeout
+                    timeout=(self.connect_timeout, self.timeout)
                 )
                 response.raise_for_status()
                 
-                data = response.json()
-                
-                # Parse and normalize the response
-                trades = self._parse_trades(data)
-                return trades
+                return response.json()
                 
             except requests.exceptions.RequestException as e:
                 print(f"API request failed (attempt {attempt + 1}/{self.max_retries}): {e}")
@@ -77,6 +144,72 @@ class PolymarketAPI:
                     
         return []
         
+    def iter_trade_pages(
+        self,
+        start_time: Optional[int] = None,
+        end_time: Optional[int] = None,
+        stop_at_hash: Optional[str] = None,
+        page_size: int = config.TRADES_LIMIT,
+        max_pages: int = config.MAX_TRADE_PAGES
+    ) -> Iterator[List[Dict]]:
+        """
+        Walk the trades result set page by page, newest first.
+        
+        Pages are fetched lazily, so the caller can store each page before
+        the next one is downloaded. Paging stops after a short page, after
+        max_pages, or once a page contains stop_at_hash. That page is still
+        yielded whole, since trades sharing its timestamp may follow it.
+        
+        Args:
+            start_time: Start timestamp in seconds (optional)
+            end_time: End timestamp in seconds (optional)
+            stop_at_hash: Newest tx_hash already stored (optional)
+            page_size: Number of trades to request per page
+            max_pages: Upper bound on pages to request
+            
+        Yields:
+            Lists of normalized trade dictionaries
+        """
+        offset = 0
+        
+        for _ in range(max_pages):
+            data = self._request_trades(start_time, end_time, page_size, offset)
+            trades = self._parse_trades(data)
+            
+            if trades:
+                yield trades
+                
+            if len(data) < page_size:
+                return
+            if stop_at_hash and any(t['tx_hash'] == stop_at_hash for t in trades):
+                return
+                
+            offset += len(data)
+            
+        print(f"Stopped paging after {max_pages} pages of {page_size} trades")
+        
+    def fetch_all_trades(
+        self,
+        start_time: Optional[int] = None,
+        end_time: Optional[int] = None,
+        stop_at_hash: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Fetch every whale trade in a time range, following pagination.
+        
+        Args:
+            start_time: Start timestamp in seconds (optional)
+            end_time: End timestamp in seconds (optional)
+            stop_at_hash: Newest tx_hash already stored (optional)
+            
+        Returns:
+            List of trade dictionaries
+        """
+        trades = []
+        for page in self.iter_trade_pages(start_time, end_time, stop_at_hash):
+            trades.extend(page)
+        return trades
+        
     def _parse_trades(self, data: List[Dict]) -> List[Dict]:
         """
         Parse and normalize trade data from API response.
@@ -137,7 +270,7 @@ class PolymarketAPI:
         # Try last 24 hours
         start_24h = now - (config.INITIAL_FETCH_HOURS * 3600)
         print(f"Fetching trades from last {config.INITIAL_FETCH_HOURS} hours...")
-        trades = self.fetch_trades(start_time=start_24h, end_time=now)
+        trades = self.fetch_all_trades(start_time=start_24h, end_time=now)
         
         if trades:
             print(f"Found {len(trades)} whale trades in last 24 hours")
@@ -146,7 +279,7 @@ class PolymarketAPI:
         # Fallback to 7 days
         print("No trades found in last 24 hours, trying last 7 days...")
         start_7d = now - (config.FALLBACK_FETCH_DAYS * 24 * 3600)
-        trades = self.fetch_trades(start_time=start_7d, end_time=now)
+        trades = self.fetch_all_trades(start_time=start_7d, end_time=now)
         
         if trades:
             print(f"Found {len(trades)} whale trades in last 7 days")
@@ -155,12 +288,13 @@ class PolymarketAPI:
             
         return trades
         
-    def fetch_new_trades(self, last_fetch_time: int) -> List[Dict]:
+    def fetch_new_trades(self, last_fetch_time: int, stop_at_hash: Optional[str] = None) -> List[Dict]:
         """
         Fetch trades since the last fetch time.
         
         Args:
             last_fetch_time: Unix timestamp of last fetch
+            stop_at_hash: Newest tx_hash already stored (optional)
             
         Returns:
             List of new trade dictionaries
@@ -168,7 +302,137 @@ class PolymarketAPI:
         now = int(datetime.now().timestamp())
         
         print(f"Fetching new trades since {datetime.fromtimestamp(last_fetch_time)}")
-        trades = self.fetch_trades(start_time=last_fetch_time, end_time=now)
+        trades = self.fetch_all_trades(start_time=last_fetch_time, end_time=now, stop_at_hash=stop_at_hash)
         
         print(f"Found {len(trades)} new whale trades")
         return trades
+
+
+class AsyncPolymarketAPI:
+    """Concurrent backfill engine on top of PolymarketAPI.
+    
+    Long time ranges are split into slices that are fetched in parallel.
+    Each slice runs the blocking paginated fetch in a worker thread over the
+    shared pooled session, and a semaphore bounds how many are in flight.
+    """
+    
+    def __init__(
+        self,
+        api: Optional[PolymarketAPI] = None,
+        concurrency: int = config.BACKFILL_CONCURRENCY,
+        slice_seconds: int = config.BACKFILL_SLICE_HOURS * 3600
+    ):
+        """Initialize the backfill engine.
+        
+        Args:
+            api: Synchronous client used for each slice (defaults to a new one)
+            concurrency: Maximum number of slices fetched at once
+            slice_seconds: Length of each time slice in seconds
+        """
+        self.api = api if api is not None else PolymarketAPI()
+        self.concurrency = concurrency
+        self.slice_seconds = slice_seconds
+        
+    @staticmethod
+    def split_range(start: int, end: int, slice_seconds: int) -> List[Tuple[int, int]]:
+        """
+        Split [start, end] into consecutive slices, newest first.
+        
+        Args:
+            start: Start timestamp in seconds
+            end: End timestamp in seconds
+            slice_seconds: Length of each slice in seconds
+            
+        Returns:
+            List of (start, end) tuples
+        """
+        slices = []
+        slice_end = end
+        while slice_end > start:
+            slice_start = max(start, slice_end - slice_seconds)
+            slices.append((slice_start, slice_end))
+            slice_end = slice_start
+        return slices
+        
+    async def fetch_range(self, start_time: int, end_time: int) -> List[Dict]:
+        """
+        Fetch every whale trade in [start_time, end_time] concurrently.
+        
+        Args:
+            start_time: Start timestamp in seconds
+            end_time: End timestamp in seconds
+            
+        Returns:
+            List of trade dictionaries, deduplicated and newest first
+        """
+        slices = self.split_range(start_time, end_time, self.slice_seconds)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            async def fetch_slice(slice_start: int, slice_end: int) -> List[Dict]:
+                async with semaphore:
+                    return await loop.run_in_executor(
+                        executor, self.api.fetch_all_trades, slice_start, slice_end
+                    )
+                    
+            results = await asyncio.gather(
+                *(fetch_slice(slice_start, slice_end) for slice_start, slice_end in slices)
+            )
+            
+        return self._merge(results)
+        
+    @staticmethod
+    def _merge(results: List[List[Dict]]) -> List[Dict]:
+        """Merge slice results, dropping duplicate tx_hashes."""
+        merged = {}
+        for trades in results:
+            for trade in trades:
+                merged.setdefault(trade['tx_hash'], trade)
+        return sorted(merged.values(), key=lambda t: t['timestamp'], reverse=True)
+        
+    async def fetch_initial_trades(self) -> List[Dict]:
+        """
+        Fetch initial trades on first run.
+        
+        Tries the last 24 hours first, like PolymarketAPI. Only if that is
+        empty is the rest of the 7-day fallback window fetched, with its
+        slices in parallel.
+        
+        Returns:
+            List of trade dictionaries
+        """
+        now = int(datetime.now().timestamp())
+        start_24h = now - (config.INITIAL_FETCH_HOURS * 3600)
+        
+        print(f"Fetching trades from last {config.INITIAL_FETCH_HOURS} hours...")
+        trades = await self.fetch_range(start_24h, now)
+        if trades:
+            print(f"Found {len(trades)} whale trades in last 24 hours")
+            return trades
+            
+        # The last 24 hours are known to be empty, so only the older part
+        # of the fallback window is fetched
+        print(f"No trades found in last 24 hours, trying last {config.FALLBACK_FETCH_DAYS} days concurrently...")
+        start_7d = now - (config.FALLBACK_FETCH_DAYS * 24 * 3600)
+        trades = await self.fetch_range(start_7d, start_24h)
+        
+        if trades:
+            print(f"Found {len(trades)} whale trades in last 7 days")
+        else:
+            print("No whale trades found in last 7 days")
+            
+        return trades
+        
+    def backfill(self, start_time: int, end_time: int) -> List[Dict]:
+        """
+        Blocking wrapper around fetch_range for callers without an event loop.
+        
+        Args:
+            start_time: Start timestamp in seconds
+            end_time: End timestamp in seconds
+            
+        Returns:
+            List of trade dictionaries
+        """
+        return asyncio.run(self.fetch_range(start_time, end_time))
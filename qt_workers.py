@@ -0,0 +1,48 @@
+"""Background workers that keep blocking calls off the Qt GUI thread."""
+
+import traceback
+from typing import Callable
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+
+class WorkerSignals(QObject):
+    """Signals emitted by a Worker.
+    
+    QRunnable is not a QObject, so its signals live here. They are delivered
+    to slots on the GUI thread through queued connections.
+    """
+    
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+    finished = pyqtSignal()
+
+
+class Worker(QRunnable):
+    """Run a callable on a QThreadPool thread and signal the outcome."""
+    
+    def __init__(self, fn: Callable, *args, **kwargs):
+        """
+        Initialize worker.
+        
+        Args:
+            fn: Blocking function to run
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+        """
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        
+    def run(self):
+        """Run the function; emit result or error, then finished."""
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
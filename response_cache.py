@@ -0,0 +1,64 @@
+"""Cache of pre-serialized JSON responses for the read endpoints."""
+
+import json
+import threading
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Tuple
+import config
+
+
+class ResponseCache:
+    """LRU cache of JSON bodies keyed by request and database write generation.
+    
+    An entry is valid for as long as the generation it was built at is
+    current, so its ETag can be derived from the key and generation alone.
+    """
+    
+    def __init__(self, max_entries: int = config.RESPONSE_CACHE_SIZE):
+        """
+        Initialize response cache.
+        
+        Args:
+            max_entries: Maximum number of cached responses
+        """
+        self.max_entries = max_entries
+        # Distinguishes ETags from earlier processes, whose generations restarted at 0
+        self.epoch = uuid.uuid4().hex[:8]
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        
+    def get(self, key: Hashable, generation: int, build: Callable[[], Dict]) -> Tuple[str, bytes]:
+        """
+        Get the cached response for key, building it if missing or stale.
+        
+        Args:
+            key: Identifies the request (endpoint and arguments)
+            generation: Current database write generation
+            build: Produces the response payload on a miss
+            
+        Returns:
+            Tuple of (etag, serialized JSON body)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == generation:
+                self._entries.move_to_end(key)
+                return entry[1], entry[2]
+                
+        body = json.dumps(build(), separators=(',', ':')).encode()
+        etag = f"{self.epoch}-{generation}-{zlib.crc32(repr(key).encode()):08x}"
+        
+        with self._lock:
+            self._entries[key] = (generation, etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                
+        return etag, body
+        
+    def clear(self):
+        """Drop every cached response."""
+        with self._lock:
+            self._entries.clear()
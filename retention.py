@@ -0,0 +1,169 @@
+"""Retention, rollup and archival of old whale transactions."""
+
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+import config
+from database import Database
+
+
+class NdjsonArchiveWriter:
+    """Write expired transactions as gzip-compressed newline-delimited JSON."""
+    
+    extension = 'ndjson.gz'
+    
+    def __init__(self, path: str):
+        """Open the archive file."""
+        self.file = gzip.open(path, 'wt', encoding='utf-8')
+        
+    def write(self, rows: List[Dict]):
+        """Append a batch of rows."""
+        for row in rows:
+            self.file.write(json.dumps(row, separators=(',', ':')) + '\n')
+            
+    def close(self):
+        """Finish the archive file."""
+        self.file.close()
+
+
+class ParquetArchiveWriter:
+    """Write expired transactions as a zstd-compressed Parquet file (needs pyarrow)."""
+    
+    extension = 'parquet'
+    
+    def __init__(self, path: str):
+        """Open the archive file."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        self.pa = pa
+        self.schema = pa.schema([
+            ('id', pa.int64()),
+            ('tx_hash', pa.string()),
+            ('amount', pa.float64()),
+            ('market_name', pa.string()),
+            ('market_id', pa.string()),
+            ('outcome', pa.string()),
+            ('side', pa.string()),
+            ('trader_address', pa.string()),
+            ('timestamp', pa.int64()),
+            ('details_json', pa.string()),
+            ('created_at', pa.int64()),
+            ('raw_json', pa.string())
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+        
+    def write(self, rows: List[Dict]):
+        """Append a batch of rows as one row group."""
+        records = [
+            dict(row, raw_json=json.dumps(row['raw_data']) if row.get('raw_data') else None)
+            for row in rows
+        ]
+        self.writer.write_table(self.pa.Table.from_pylist(records, schema=self.schema))
+        
+    def close(self):
+        """Finish the archive file."""
+        self.writer.close()
+
+
+ARCHIVE_WRITERS = {
+    'ndjson': NdjsonArchiveWriter,
+    'parquet': ParquetArchiveWriter
+}
+
+
+class RetentionEngine:
+    """Keep recent trades hot and roll older ones into daily aggregates.
+    
+    Expired trades are optionally exported to an archive file, then rolled up
+    into daily_market_rollups and deleted in small batches with a short pause
+    in between, so a large backlog never holds the write lock for long.
+    """
+    
+    def __init__(
+        self,
+        db: Database,
+        retention_days: int = config.RETENTION_DAYS,
+        batch_size: int = config.RETENTION_BATCH_SIZE,
+        batch_pause: float = config.RETENTION_BATCH_PAUSE,
+        archive_format: Optional[str] = config.ARCHIVE_FORMAT,
+        archive_dir: str = config.ARCHIVE_DIR
+    ):
+        """
+        Initialize retention engine.
+        
+        Args:
+            db: Connected database
+            retention_days: Days of individual trades to keep (0 keeps everything)
+            batch_size: Rows expired per transaction
+            batch_pause: Seconds to sleep between batches
+            archive_format: "ndjson", "parquet" or None to skip the export
+            archive_dir: Directory archive files are written to
+        """
+        if archive_format is not None and archive_format not in ARCHIVE_WRITERS:
+            raise ValueError(f"Unknown archive format: {archive_format}")
+        if archive_format == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError("Parquet archives need pyarrow: pip install pyarrow")
+                
+        self.db = db
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.archive_format = archive_format
+        self.archive_dir = archive_dir
+        
+    def run(self, now: Optional[int] = None) -> int:
+        """
+        Expire every trade older than the retention window.
+        
+        Args:
+            now: Current Unix timestamp (defaults to the wall clock)
+            
+        Returns:
+            Number of trades expired
+        """
+        if not self.retention_days:
+            return 0
+            
+        now = now if now is not None else int(datetime.now().timestamp())
+        cutoff = now - self.retention_days * 24 * 3600
+        writer = None
+        expired = 0
+        
+        try:
+            while True:
+                rows = self.db.get_expired_transactions(cutoff, self.batch_size)
+                if not rows:
+                    break
+                    
+                if self.archive_format:
+                    if writer is None:
+                        writer = self._open_archive(now)
+                    for row in rows:
+                        row['raw_data'] = self.db.get_raw_trade(row['id'])
+                    writer.write(rows)
+                    
+                expired += self.db.expire_transactions([row['id'] for row in rows])
+                time.sleep(self.batch_pause)
+        finally:
+            if writer is not None:
+                writer.close()
+                
+        if expired:
+            print(f"Retention: rolled up and removed {expired} trades older than {self.retention_days} days")
+        return expired
+        
+    def _open_archive(self, now: int):
+        """Create the archive file for this run."""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        writer_class = ARCHIVE_WRITERS[self.archive_format]
+        stamp = datetime.fromtimestamp(now).strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(self.archive_dir, f"whale_trades-{stamp}.{writer_class.extension}")
+        print(f"Retention: archiving expired trades to {path}")
+        return writer_class(path)
@@ -0,0 +1,130 @@
+"""In-memory status snapshot for the background service."""
+
+import threading
+from typing import Dict, Optional
+
+
+class ServiceStatus:
+    """Status and per-poll statistics, updated by the poll and insert paths.
+    
+    Reading the snapshot never touches SQLite, so /api/status is O(1) and can
+    be used as a health probe. version changes on every update, which lets
+    callers cache anything derived from the snapshot.
+    """
+    
+    def __init__(self):
+        """Initialize an empty snapshot."""
+        self._lock = threading.Lock()
+        self.version = 0
+        self.last_fetch = None
+        self.total_trades = 0
+        self.feed_trades = 0
+        self.last_poll_at = None
+        self.last_poll_duration = None
+        self.last_poll_ok = None
+        self.trades_fetched = 0
+        self.trades_inserted = 0
+        self.api_errors = 0
+        
+    def load(self, total_trades: int, last_fetch: Optional[int], feed_trades: Optional[int] = None):
+        """
+        Seed the snapshot from the database at startup.
+        
+        Args:
+            total_trades: Stored transaction count
+            last_fetch: Last fetch timestamp, if any
+            feed_trades: Stored trades the feed shows (defaults to all)
+        """
+        with self._lock:
+            self.total_trades = total_trades
+            self.feed_trades = total_trades if feed_trades is None else feed_trades
+            self.last_fetch = last_fetch
+            self.version += 1
+            
+    def record_inserted(self, count: int, feed_count: Optional[int] = None):
+        """
+        Account for newly stored trades.
+        
+        Args:
+            count: Number of rows inserted
+            feed_count: How many of them the feed shows (defaults to all)
+        """
+        if not count:
+            return
+        with self._lock:
+            self.total_trades += count
+            self.feed_trades += count if feed_count is None else feed_count
+            self.version += 1
+            
+    def set_feed_trades(self, count: int):
+        """
+        Replace the feed row count, after retention or a threshold change.
+        
+        Args:
+            count: Stored trades the feed shows
+        """
+        with self._lock:
+            if count == self.feed_trades:
+                return
+            self.feed_trades = count
+            self.version += 1
+            
+    def record_deleted(self, count: int):
+        """
+        Account for trades removed by the retention job.
+        
+        Args:
+            count: Number of rows deleted
+        """
+        if not count:
+            return
+        with self._lock:
+            self.total_trades = max(0, self.total_trades - count)
+            self.version += 1
+            
+    def record_poll(
+        self,
+        started_at: int,
+        duration: float,
+        fetched: int,
+        inserted: int,
+        ok: bool,
+        last_fetch: Optional[int] = None
+    ):
+        """
+        Record the outcome of one poll.
+        
+        Args:
+            started_at: Poll start timestamp
+            duration: Poll duration in seconds
+            fetched: Trades returned by the API
+            inserted: Trades that were new
+            ok: False if the poll failed
+            last_fetch: New last fetch timestamp, if it advanced
+        """
+        with self._lock:
+            self.last_poll_at = started_at
+            self.last_poll_duration = round(duration, 3)
+            self.last_poll_ok = ok
+            self.trades_fetched = fetched
+            self.trades_inserted = inserted
+            if not ok:
+                self.api_errors += 1
+            if last_fetch is not None:
+                self.last_fetch = last_fetch
+            self.version += 1
+            
+    def to_dict(self) -> Dict:
+        """Get a consistent copy of the snapshot."""
+        with self._lock:
+            return {
+                'last_fetch': self.last_fetch,
+                'total_trades': self.total_trades,
+                'feed_trades': self.feed_trades,
+                'last_poll_at': self.last_poll_at,
+                'last_poll_duration': self.last_poll_duration,
+                'last_poll_ok': self.last_poll_ok,
+                'trades_fetched': self.trades_fetched,
+                'trades_inserted': self.trades_inserted,
+                'api_errors': self.api_errors
+            }
@@ -0,0 +1,74 @@
+"""Tests for the adaptive polling interval."""
+
+import random
+import pytest
+from adaptive_scheduler import AdaptivePollInterval
+
+
+class TestAdaptivePollInterval:
+    """Test cases for AdaptivePollInterval class."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.interval = AdaptivePollInterval(
+            base_seconds=300,
+            min_seconds=30,
+            max_seconds=1800,
+            busy_trades=20,
+            backoff_factor=2.0,
+            jitter=0.1,
+            rng=random.Random(42)
+        )
+        
+    def test_starts_at_base(self):
+        """Test the interval starts at the base value."""
+        assert self.interval.current == 300
+        
+    def test_backs_off_when_quiet(self):
+        """Test empty polls lengthen the interval up to the maximum."""
+        self.interval.record(0, False, True)
+        assert self.interval.current == 600
+        
+        for _ in range(10):
+            self.interval.record(0, False, True)
+        assert self.interval.current == 1800
+        
+    def test_backs_off_on_error(self):
+        """Test failed polls lengthen the interval."""
+        self.interval.record(50, False, False)
+        assert self.interval.current == 600
+        
+    def test_speeds_up_when_busy(self):
+        """Test busy polls shorten the interval down to the minimum."""
+        self.interval.record(25, False, True)
+        assert self.interval.current == 150
+        
+        self.interval.record(3, True, True)
+        assert self.interval.current == 75
+        
+        for _ in range(10):
+            self.interval.record(25, False, True)
+        assert self.interval.current == 30
+        
+    def test_resets_on_ordinary_activity(self):
+        """Test a poll with a few trades returns to the base interval."""
+        self.interval.record(0, False, True)
+        self.interval.record(0, False, True)
+        
+        self.interval.record(5, False, True)
+        assert self.interval.current == 300
+        
+    def test_jitter_within_bounds(self):
+        """Test delays vary by at most the jitter fraction."""
+        delays = [self.interval.next_delay() for _ in range(100)]
+        
+        assert all(270 <= delay <= 330 for delay in delays)
+        assert len(set(delays)) > 1
+        
+    def test_jitter_clamped(self):
+        """Test jitter never pushes a delay past the bounds."""
+        for _ in range(10):
+            self.interval.record(0, False, True)
+            
+        assert all(self.interval.next_delay() <= 1800 for _ in range(100))
+
@@ -0,0 +1,151 @@
+"""Tests for the alert rule engine."""
+
+import json
+import pytest
+import config
+from alert_rules import AlertRule, AlertRuleSet
+from conftest import make_trade
+
+
+def rule_trade(amount, market='event-a', trader='0xAAA', slug='market-a', **fields):
+    """Build a trade on market-a by 0xAAA unless told otherwise."""
+    return make_trade(1, amount, market=market, trader_address=trader, details={'slug': slug}, **fields)
+
+
+class TestAlertRule:
+    """Test cases for AlertRule class."""
+    
+    def test_amount_band(self):
+        """Test the band includes min_amount and excludes max_amount."""
+        rule = AlertRule('band', min_amount=1000, max_amount=5000)
+        
+        assert not rule.matches(rule_trade(999))
+        assert rule.matches(rule_trade(1000))
+        assert rule.matches(rule_trade(4999))
+        assert not rule.matches(rule_trade(5000))
+        
+    def test_filters(self):
+        """Test market, outcome, side and trader conditions."""
+        rule = AlertRule('all', market='market-a', outcome='YES', side='buy', traders=['0xaaa'])
+        
+        assert rule.matches(rule_trade(10))
+        assert not rule.matches(rule_trade(10, slug='market-b', market='event-b'))
+        assert not rule.matches(rule_trade(10, outcome='No'))
+        assert not rule.matches(rule_trade(10, side='SELL'))
+        assert not rule.matches(rule_trade(10, trader='0xBBB'))
+        
+    def test_invalid_rules(self):
+        """Test malformed rules are rejected."""
+        with pytest.raises(ValueError):
+            AlertRule('bad', min_amount=10, max_amount=5)
+        with pytest.raises(ValueError):
+            AlertRule('bad', side='HOLD')
+        with pytest.raises(ValueError):
+            AlertRule.from_dict({'name': 'bad', 'colour': 'red'})
+        with pytest.raises(ValueError):
+            AlertRule.from_dict({'min_amount': 10})
+        with pytest.raises(ValueError):
+            AlertRule('bad', side=1)
+        with pytest.raises(ValueError):
+            AlertRule('bad', traders='0xAAA')
+        with pytest.raises(ValueError):
+            AlertRule('bad', traders=[1, 2])
+            
+    def test_min_amount_required(self):
+        """Test custom rules cannot drop the fetch floor below the configured minimum."""
+        with pytest.raises(ValueError):
+            AlertRule.from_dict({'name': 'no floor', 'market': 'event-a'})
+        with pytest.raises(ValueError):
+            AlertRule.from_dict({'name': 'zero', 'min_amount': 0, 'traders': ['0xAAA']})
+        with pytest.raises(ValueError):
+            AlertRule.from_dict({'name': 'low', 'min_amount': config.ALERT_RULE_MIN_AMOUNT - 1})
+            
+        rule = AlertRule.from_dict({'name': 'floor', 'min_amount': config.ALERT_RULE_MIN_AMOUNT})
+        assert rule.min_amount == config.ALERT_RULE_MIN_AMOUNT
+            
+    def test_round_trip(self):
+        """Test a rule survives to_dict/from_dict."""
+        rule = AlertRule('watch', min_amount=5000, traders=['0xAAA'], side='SELL')
+        
+        assert AlertRule.from_dict(rule.to_dict()).to_dict() == rule.to_dict()
+
+
+class TestAlertRuleSet:
+    """Test cases for AlertRuleSet class."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.rules = AlertRuleSet.from_json(json.dumps([
+            {'name': 'watchlist', 'min_amount': 1000, 'traders': ['0xAAA']},
+            {'name': 'event-a big', 'min_amount': 5000, 'market': 'event-a'},
+            {'name': 'market-b sells', 'min_amount': 2000, 'market': 'market-b', 'side': 'SELL'}
+        ]), whale_threshold=10000)
+        
+    def names(self, trade):
+        """Names of the rules a trade matches."""
+        return sorted(rule.name for rule in self.rules.evaluate(trade))
+        
+    def test_min_threshold(self):
+        """Test the fetch threshold is the lowest rule floor."""
+        assert self.rules.min_threshold == 1000
+        
+    def test_fetch_threshold(self, monkeypatch):
+        """Test the anomaly detector can lower the fetch threshold below the rules."""
+        monkeypatch.setattr(config, 'ANOMALY_MIN_AMOUNT', 500)
+        assert self.rules.fetch_threshold == 500
+        monkeypatch.setattr(config, 'ANOMALY_MIN_AMOUNT', None)
+        assert self.rules.fetch_threshold == 1000
+        
+    def test_whale_rule(self):
+        """Test the whale threshold applies to every trade."""
+        assert self.names(rule_trade(20000, trader='0xCCC')) == ['event-a big', 'whale']
+        assert self.names(rule_trade(20000, market='event-z', slug='z', trader='0xCCC')) == ['whale']
+        
+    def test_indexed_rules(self):
+        """Test trader and market rules only apply to their own trades."""
+        assert self.names(rule_trade(1500)) == ['watchlist']
+        assert self.names(rule_trade(1500, trader='0xCCC')) == []
+        assert self.names(rule_trade(6000, trader='0xCCC')) == ['event-a big']
+        assert self.names(rule_trade(3000, market='event-b', slug='market-b', side='SELL', trader='0xCCC')) == ['market-b sells']
+        assert self.names(rule_trade(3000, market='event-b', slug='market-b', side='BUY', trader='0xCCC')) == []
+        
+    def test_default_is_whale_threshold(self):
+        """Test no stored rules means a plain threshold."""
+        rules = AlertRuleSet.from_json(None, whale_threshold=10000)
+        
+        assert rules.min_threshold == 10000
+        assert rules.to_json() == '[]'
+        
+    def test_many_rules(self):
+        """Test a large rule set still finds the right matches."""
+        rules = AlertRuleSet([AlertRule('whale', min_amount=10000)] + [
+            AlertRule(f'trader {i}', min_amount=i, traders=[f'0x{i:040x}']) for i in range(500)
+        ])
+        
+        assert [r.name for r in rules.evaluate(rule_trade(300, trader=f'0x{250:040x}'))] == ['trader 250']
+        assert [r.name for r in rules.evaluate(rule_trade(200, trader=f'0x{250:040x}'))] == []
+        
+    def test_load_skips_invalid_rules(self):
+        """Test stored rules that are no longer valid are dropped on load."""
+        value = json.dumps([
+            {'name': 'old firehose', 'market': 'event-a'},
+            {'name': 'event-a big', 'min_amount': 5000, 'market': 'event-a'}
+        ])
+        
+        with pytest.raises(ValueError):
+            AlertRuleSet.from_json(value, whale_threshold=10000)
+        rules = AlertRuleSet.from_json(value, whale_threshold=10000, strict=False)
+        assert [rule.name for rule in rules.rules] == ['whale', 'event-a big']
+        assert rules.min_threshold == 5000
+        
+    def test_save_and_load(self, db):
+        """Test rules are stored in the settings table."""
+        db.set_whale_threshold(25000)
+        self.rules.save(db)
+        
+        loaded = AlertRuleSet.load(db)
+        
+        assert [rule.name for rule in loaded.rules] == [
+            'whale', 'watchlist', 'event-a big', 'market-b sells'
+        ]
+        assert loaded.rules[0].min_amount == 25000
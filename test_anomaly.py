@@ -0,0 +1,126 @@
+"""Tests for the per-market anomaly detector."""
+
+import math
+import random
+import pytest
+from anomaly import AnomalyDetector, MarketBaseline, TDigest
+from conftest import make_trade
+
+
+class TestTDigest:
+    """Test cases for TDigest class."""
+    
+    def test_quantiles(self):
+        """Test quantile estimates, including the far tail, stay close."""
+        rng = random.Random(7)
+        values = [rng.lognormvariate(9, 1) for _ in range(20000)]
+        digest = TDigest(compression=100)
+        for value in values:
+            digest.add(value)
+            
+        values.sort()
+        for q in (0.5, 0.9, 0.99, 0.995):
+            exact = values[int(q * len(values))]
+            assert digest.quantile(q) == pytest.approx(exact, rel=0.03)
+        assert len(digest) == 20000
+        assert len(digest.means) < 300
+        
+    def test_small_and_empty(self):
+        """Test quantiles of an empty digest and of a single value."""
+        digest = TDigest()
+        assert digest.quantile(0.5) is None
+        
+        digest.add(42.0)
+        assert digest.quantile(0.0) == 42.0
+        assert digest.quantile(0.995) == 42.0
+        
+    def test_serialization_round_trip(self):
+        """Test a digest survives to_bytes/from_bytes unchanged."""
+        digest = TDigest()
+        for value in range(1, 1001):
+            digest.add(float(value))
+            
+        restored = TDigest.from_bytes(digest.to_bytes())
+        assert restored.min == 1.0
+        assert restored.max == 1000.0
+        assert len(restored) == 1000
+        assert restored.quantile(0.995) == digest.quantile(0.995)
+
+
+class TestMarketBaseline:
+    """Test cases for MarketBaseline class."""
+    
+    def test_ewma_moments(self):
+        """Test the EWMA follows log(amount) and grows variance with spread."""
+        baseline = MarketBaseline('a', alpha=0.1)
+        for _ in range(100):
+            baseline.observe(10000.0, 1)
+        assert baseline.ewma_mean == pytest.approx(math.log(10000.0))
+        assert baseline.z_score(10000.0) is None
+        
+        for i in range(100):
+            baseline.observe(5000.0 if i % 2 else 20000.0, 2)
+        assert baseline.ewma_variance > 0
+        assert baseline.z_score(200000.0) > 3
+        assert baseline.updated_at == 2
+        
+    def test_row_round_trip(self):
+        """Test a baseline survives to_row/from_row."""
+        baseline = MarketBaseline('a')
+        for amount in (1000.0, 2000.0, 3000.0):
+            baseline.observe(amount, 5)
+            
+        restored = MarketBaseline.from_row(baseline.to_row())
+        assert restored.sample_count == 3
+        assert restored.ewma_mean == baseline.ewma_mean
+        assert restored.ewma_variance == baseline.ewma_variance
+        assert restored.summary()['median'] == baseline.summary()['median']
+
+
+class TestAnomalyDetector:
+    """Test cases for AnomalyDetector class."""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self, db):
+        """Set up test fixtures with temporary database."""
+        self.db = db
+        
+    def test_flags_relative_whale(self):
+        """Test a trade large for a thin market is flagged, not a busy market's usual size."""
+        detector = AnomalyDetector(self.db, min_samples=50)
+        rng = random.Random(3)
+        thin = [make_trade(i, rng.uniform(1000, 2000), market='thin') for i in range(200)]
+        busy = [make_trade(1000 + i, rng.uniform(20000, 80000), market='busy') for i in range(200)]
+        assert detector.process(thin + busy) == []
+        
+        flagged = detector.process([
+            make_trade(5000, 15000.0, market='thin'),
+            make_trade(5001, 30000.0, market='busy')
+        ])
+        assert [trade['id'] for trade in flagged] == [5000]
+        anomaly = flagged[0]['anomaly']
+        assert anomaly['threshold'] < 2100
+        assert anomaly['sample_count'] == 200
+        assert anomaly['z_score'] > 3
+        
+    def test_min_samples(self):
+        """Test markets without enough history never flag."""
+        detector = AnomalyDetector(self.db, min_samples=50)
+        detector.process([make_trade(i, 1000.0) for i in range(10)])
+        
+        assert detector.process([make_trade(100, 1000000.0)]) == []
+        
+    def test_baselines_persist(self):
+        """Test a new detector resumes from the stored baselines."""
+        detector = AnomalyDetector(self.db, min_samples=50)
+        detector.process([make_trade(i, 1000.0 + i) for i in range(100)])
+        
+        row = self.db.get_market_baselines(['a', 'missing'])
+        assert list(row) == ['a']
+        assert row['a']['sample_count'] == 100
+        
+        restarted = AnomalyDetector(self.db, min_samples=50)
+        assert restarted.baseline('a').sample_count == 100
+        flagged = restarted.process([make_trade(200, 50000.0)])
+        assert [trade['id'] for trade in flagged] == [200]
+        assert self.db.get_market_baselines(['a'])['a']['sample_count'] == 101
@@ -1,9 +1,12 @@
 """Tests for database operations."""
 
 import pytest
+import json
 import os
 import tempfile
-from database import Database
+import threading
+import zlib
+from database import RAW_CODEC, RAW_ZDICTS, Database, compress_raw, decompress_raw
 from datetime import datetime
 
 
@@ -84,6 +87,44 @@ class TestDatabase:
         count = self.db.get_transaction_count()
         assert count == 1
         
+    def test_insert_transactions_batch(self):
+        """Test bulk insert returns exactly the newly stored transactions."""
+        now = int(datetime.now().timestamp())
+        self.db.insert_transaction({
+            'tx_hash': '0xold',
+            'amount': 15000.0,
+            'timestamp': now,
+            'details': {}
+        })
+        
+        batch = [
+            {'tx_hash': f'0xbatch{i}', 'amount': 11000.0 + i, 'timestamp': now + i, 'details': {}}
+            for i in range(3)
+        ]
+        batch.insert(1, {'tx_hash': '0xold', 'amount': 15000.0, 'timestamp': now, 'details': {}})
+        batch.append(dict(batch[0]))
+        
+        inserted = self.db.insert_transactions(batch)
+        
+        assert [tx['tx_hash'] for tx in inserted] == ['0xbatch0', '0xbatch1', '0xbatch2']
+        assert [tx['id'] for tx in inserted] == [
+            self.db.get_transaction_by_hash(tx['tx_hash'])['id'] for tx in inserted
+        ]
+        assert 'id' not in batch[0]
+        assert self.db.get_transaction_count() == 4
+        assert self.db.insert_transactions(batch) == []
+        assert self.db.insert_transactions([]) == []
+        
+    def test_transaction_counter_trigger(self):
+        """Test the counter row follows inserts and deletes."""
+        for i in range(3):
+            self.db.insert_transaction({'tx_hash': f'0xcount{i}', 'amount': 15000.0, 'timestamp': i, 'details': {}})
+        assert self.db.get_transaction_count() == 3
+        
+        self.db.conn.execute("DELETE FROM whale_transactions WHERE tx_hash = '0xcount0'")
+        self.db.conn.commit()
+        assert self.db.get_transaction_count() == 2
+        
     def test_get_all_transactions(self):
         """Test retrieving all transactions."""
         # Insert multiple transactions
@@ -107,6 +148,195 @@ class TestDatabase:
         # Should be ordered by timestamp descending
         assert transactions[0]['timestamp'] >= transactions[1]['timestamp']
         
+    def test_feed_query_skips_details(self):
+        """Test the feed omits details_json unless asked and uses the covering index."""
+        self.db.insert_transaction({
+            'tx_hash': '0xfeed',
+            'amount': 15000.0,
+            'timestamp': int(datetime.now().timestamp()),
+            'details': {'raw': 'data'}
+        })
+        
+        assert 'details_json' not in self.db.get_all_transactions()[0]
+        assert self.db.get_all_transactions(include_details=True)[0]['details_json'] == '{"raw": "data"}'
+        
+        plan = self.db.conn.execute(
+            'EXPLAIN QUERY PLAN SELECT id, tx_hash, amount, market_name, market_id, outcome, '
+            'side, trader_address, timestamp, created_at FROM whale_transactions '
+            'ORDER BY timestamp DESC, id DESC LIMIT 10'
+        ).fetchall()
+        assert 'COVERING INDEX idx_whale_tx_feed' in plan[0]['detail']
+        
+    def test_get_transactions_page_keyset(self):
+        """Test keyset pagination walks the feed without gaps or repeats."""
+        now = int(datetime.now().timestamp())
+        for i in range(7):
+            self.db.insert_transaction({
+                'tx_hash': f'0xpage{i}',
+                'amount': 15000.0,
+                'timestamp': now - (i // 2),  # pairs share a timestamp
+                'details': {}
+            })
+            
+        seen = []
+        page = self.db.get_transactions_page(3)
+        while page:
+            seen.extend(tx['tx_hash'] for tx in page)
+            last = page[-1]
+            page = self.db.get_transactions_page(3, before=(last['timestamp'], last['id']))
+            
+        assert seen == [tx['tx_hash'] for tx in self.db.get_all_transactions()]
+        assert len(set(seen)) == 7
+        
+        first = self.db.get_all_transactions()[2]
+        newer = self.db.get_transactions_page(10, after=(first['timestamp'], first['id']))
+        assert [tx['tx_hash'] for tx in newer] == seen[:2]
+        
+    def test_get_transactions_since(self):
+        """Test only rows inserted after the high-water mark are returned."""
+        now = int(datetime.now().timestamp())
+        assert self.db.get_latest_transaction_id() == 0
+        
+        self.db.insert_transaction({'tx_hash': '0xa', 'amount': 15000.0, 'timestamp': now, 'details': {}})
+        mark = self.db.get_latest_transaction_id()
+        self.db.insert_transaction({'tx_hash': '0xb', 'amount': 15000.0, 'timestamp': now - 100, 'details': {}})
+        self.db.insert_transaction({'tx_hash': '0xc', 'amount': 15000.0, 'timestamp': now + 5, 'details': {}})
+        
+        delta = self.db.get_transactions_since(mark, 10)
+        
+        assert [tx['tx_hash'] for tx in delta] == ['0xc', '0xb']
+        assert self.db.get_transactions_since(self.db.get_latest_transaction_id(), 10) == []
+        
+    def test_feed_reads_filter_by_amount(self):
+        """Test feed reads can hide trades below the current threshold."""
+        now = int(datetime.now().timestamp())
+        self.db.insert_transactions([
+            {'tx_hash': f'0xamt{i}', 'amount': amount, 'timestamp': now - i, 'details': {}}
+            for i, amount in enumerate([5000.0, 20000.0, 9999.0, 10000.0, 50000.0])
+        ])
+        
+        page = self.db.get_transactions_page(2, min_amount=10000)
+        assert [tx['tx_hash'] for tx in page] == ['0xamt1', '0xamt3']
+        
+        last = page[-1]
+        older = self.db.get_transactions_page(2, before=(last['timestamp'], last['id']), min_amount=10000)
+        assert [tx['tx_hash'] for tx in older] == ['0xamt4']
+        
+        assert len(self.db.get_all_transactions(min_amount=10000)) == 3
+        assert len(self.db.get_all_transactions()) == 5
+        assert [tx['tx_hash'] for tx in self.db.get_transactions_since(0, 10, min_amount=20000)] == [
+            '0xamt1', '0xamt4'
+        ]
+        assert self.db.get_oldest_transaction_time() == now - 4
+        
+    def test_unusual_trades_join_feed(self):
+        """Test trades flagged as unusual are served below the amount filter."""
+        now = int(datetime.now().timestamp())
+        anomaly = {'threshold': 2000.0, 'quantile': 0.995, 'z_score': 4.2, 'sample_count': 80}
+        self.db.insert_transactions([
+            {'tx_hash': '0xplain', 'amount': 3000.0, 'timestamp': now - 2, 'details': {}},
+            {'tx_hash': '0xodd', 'amount': 3000.0, 'timestamp': now - 1, 'details': {}, 'anomaly': anomaly},
+            {'tx_hash': '0xwhale', 'amount': 20000.0, 'timestamp': now, 'details': {}}
+        ])
+        
+        page = self.db.get_transactions_page(10, min_amount=10000)
+        assert [tx['tx_hash'] for tx in page] == ['0xwhale', '0xodd']
+        assert [tx.get('unusual', False) for tx in page] == [False, True]
+        assert len(self.db.get_all_transactions(min_amount=10000)) == 2
+        assert len(self.db.get_transactions_since(0, 10, min_amount=10000)) == 2
+        assert self.db.get_stored_hashes(['0xodd', '0xnew']) == {'0xodd'}
+        
+        self.db.conn.execute("DELETE FROM whale_transactions WHERE tx_hash = '0xodd'")
+        assert self.db.conn.execute('SELECT COUNT(*) FROM unusual_trades').fetchone()[0] == 0
+        
+    def test_aggregates_maintained_on_insert(self):
+        """Test market x hour and trader x day aggregates follow inserts."""
+        self.db.set_whale_threshold(5000)
+        hour = 1700002800  # on an hour boundary
+        self.db.insert_transactions([
+            {'tx_hash': '0xagg1', 'amount': 10000.0, 'market_id': 'a', 'market_name': 'A',
+             'side': 'BUY', 'trader_address': '0x1', 'timestamp': hour + 10, 'details': {}},
+            {'tx_hash': '0xagg2', 'amount': 30000.0, 'market_id': 'a', 'market_name': 'A',
+             'side': 'SELL', 'trader_address': '0x2', 'timestamp': hour + 20, 'details': {}},
+            {'tx_hash': '0xagg3', 'amount': 25000.0, 'market_id': 'b', 'market_name': 'B',
+             'side': 'BUY', 'trader_address': '0x1', 'timestamp': hour + 3600, 'details': {}}
+        ])
+        # Duplicates must not be counted twice
+        self.db.insert_transactions([
+            {'tx_hash': '0xagg1', 'amount': 10000.0, 'market_id': 'a', 'side': 'BUY',
+             'trader_address': '0x1', 'timestamp': hour + 10, 'details': {}},
+            {'tx_hash': '0xagg4', 'amount': 6000.0, 'market_id': 'b', 'market_name': 'B',
+             'side': 'SELL', 'trader_address': '0x2', 'timestamp': hour + 3700, 'details': {}}
+        ])
+        
+        markets = self.db.get_top_markets(hour)
+        assert [(m['market_id'], m['trade_count'], m['volume']) for m in markets] == [
+            ('a', 2, 40000.0), ('b', 2, 31000.0)
+        ]
+        assert markets[0]['buy_volume'] == 10000.0
+        assert markets[0]['max_amount'] == 30000.0
+        assert [m['market_id'] for m in self.db.get_top_markets(hour + 3600)] == ['b']
+        
+        traders = self.db.get_top_traders(hour, limit=1)
+        assert [(t['trader_address'], t['trade_count'], t['volume']) for t in traders] == [
+            ('0x2', 2, 36000.0)
+        ]
+        
+    def test_aggregates_follow_whale_threshold(self):
+        """Test aggregates leave out trades below the whale threshold and follow its changes."""
+        day = 1700006400  # on a day boundary
+        self.db.insert_transactions([
+            {'tx_hash': f'0xthr{i}', 'amount': amount, 'market_id': 'a', 'side': 'BUY',
+             'trader_address': '0x1', 'timestamp': day + 86400 * i, 'details': {}}
+            for i, amount in enumerate([1000.0, 2000.0, 20000.0, 3000.0])
+        ])
+        assert [(m['trade_count'], m['volume']) for m in self.db.get_top_markets(0)] == [(1, 20000.0)]
+        
+        # Setting the threshold leaves the rebuild to the caller
+        self.db.set_whale_threshold(1500)
+        assert [(m['trade_count'], m['volume']) for m in self.db.get_top_markets(0)] == [(1, 20000.0)]
+        
+        # With nothing expired, every bucket is rebuilt, the oldest included
+        self.db.set_whale_threshold(500)
+        self.db.rebuild_aggregates()
+        assert [(m['trade_count'], m['volume']) for m in self.db.get_top_markets(0)] == [(4, 26000.0)]
+        assert self.db.get_top_traders(0)[0]['trade_count'] == 4
+        
+        self.db.set_whale_threshold(50000)
+        self.db.rebuild_aggregates()
+        assert self.db.get_top_markets(0) == []
+        
+    def test_rebuild_keeps_expired_buckets(self):
+        """Test buckets holding expired trades keep their figures through a rebuild."""
+        hour = 1700002800  # on an hour boundary
+        self.db.insert_transactions([
+            {'tx_hash': f'0xexp{i}', 'amount': 20000.0, 'market_id': 'a', 'side': 'BUY',
+             'trader_address': '0x1', 'timestamp': hour + offset, 'details': {}}
+            for i, offset in enumerate([0, 10, 3600])
+        ])
+        oldest = self.db.get_transaction_by_hash('0xexp0')
+        self.db.expire_transactions([oldest['id']])
+        assert self.db.get_setting('retention_horizon') == str(hour)
+        
+        self.db.rebuild_aggregates()
+        hourly = self.db.conn.execute('SELECT hour, trade_count FROM market_hourly ORDER BY hour').fetchall()
+        assert [tuple(row) for row in hourly] == [(hour, 2), (hour + 3600, 1)]
+        
+    def test_aggregates_built_by_migration(self):
+        """Test the aggregate tables are filled from rows stored before them."""
+        self.db.insert_transactions([
+            {'tx_hash': f'0xold{i}', 'amount': 20000.0, 'market_id': 'a',
+             'side': 'BUY', 'trader_address': '0x1', 'timestamp': 1700000000 + i, 'details': {}}
+            for i in range(3)
+        ])
+        self.db.conn.execute('DROP TABLE market_hourly')
+        self.db.conn.execute('DROP TABLE trader_daily')
+        self.db.conn.execute('PRAGMA user_version = 4')
+        self.db._migrate()
+        
+        assert self.db.get_top_markets(0)[0]['trade_count'] == 3
+        assert self.db.get_top_traders(0)[0]['volume'] == 60000.0
+        
     def test_get_transaction_by_hash(self):
         """Test retrieving specific transaction by hash."""
         tx_data = {
@@ -131,6 +361,56 @@ class TestDatabase:
         assert tx['amount'] == 20000.0
         assert tx['market_name'] == 'Specific Market'
         
+    def test_raw_data_stored_compressed(self):
+        """Test raw payloads are split out of details_json and loaded on demand."""
+        raw = {'transactionHash': '0xraw', 'price': '0.5', 'size': '30000', 'title': 'Raw Market'}
+        self.db.insert_transaction({
+            'tx_hash': '0xraw',
+            'amount': 15000.0,
+            'timestamp': int(datetime.now().timestamp()),
+            'details': {'price': '0.5', 'raw_data': raw}
+        })
+        
+        tx = self.db.get_transaction_by_hash('0xraw')
+        assert 'raw_data' not in tx['details_json']
+        assert 'raw_data' not in tx
+        
+        tx = self.db.get_transaction_by_hash('0xraw', include_raw=True)
+        assert tx['raw_data'] == raw
+        
+    def test_raw_codecs(self):
+        """Test the compact dictionary shrinks payloads and older codecs still decode."""
+        raw = {'proxyWallet': '0xabc', 'side': 'BUY', 'conditionId': '0xdef', 'transactionHash': '0xraw'}
+        data = json.dumps(raw, separators=(',', ':')).encode()
+        legacy = zlib.compressobj(zdict=RAW_ZDICTS['zlib-d1'])
+        legacy = legacy.compress(data) + legacy.flush()
+        
+        assert decompress_raw('zlib-d1', legacy) == raw
+        assert decompress_raw(RAW_CODEC, compress_raw(raw)) == raw
+        assert len(compress_raw(raw)) < len(legacy)
+        with pytest.raises(ValueError):
+            decompress_raw('lz4', legacy)
+            
+    def test_move_raw_data(self):
+        """Test legacy inline payloads are migrated into trade_raw."""
+        raw = {'transactionHash': '0xlegacy', 'title': 'Legacy Market'}
+        self.db.conn.execute(
+            'INSERT INTO whale_transactions (tx_hash, amount, timestamp, details_json, created_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            ('0xlegacy', 15000.0, 1, json.dumps({'price': '0.5', 'raw_data': raw}), 1)
+        )
+        self.db.conn.commit()
+        tx_id = self.db.get_transaction_by_hash('0xlegacy')['id']
+        assert self.db.get_raw_trade(tx_id) == raw
+        
+        last_id, moved, _, _ = self.db.move_raw_data(0, 100)
+        assert (last_id, moved) == (tx_id, 1)
+        assert self.db.move_raw_data(last_id, 100)[0] is None
+        
+        tx = self.db.get_transaction_by_hash('0xlegacy', include_raw=True)
+        assert json.loads(tx['details_json']) == {'price': '0.5'}
+        assert tx['raw_data'] == raw
+        
     def test_transaction_exists(self):
         """Test checking if transaction exists."""
         tx_data = {
@@ -154,6 +434,40 @@ class TestDatabase:
         # Should now exist
         assert self.db.transaction_exists('0xexists') is True
         
+    def test_get_latest_tx_hash(self):
+        """Test retrieving the newest stored transaction hash."""
+        assert self.db.get_latest_tx_hash() is None
+        
+        now = int(datetime.now().timestamp())
+        for i in range(3):
+            self.db.insert_transaction({
+                'tx_hash': f'0xlatest{i}',
+                'amount': 15000.0,
+                'timestamp': now - i,
+                'details': {}
+            })
+            
+        assert self.db.get_latest_tx_hash() == '0xlatest0'
+        
+    def test_write_generation(self):
+        """Test committed writes bump the generation shared by instances."""
+        other = Database(self.db_path)
+        start = self.db.write_generation
+        
+        self.db.insert_transaction({'tx_hash': '0xgen', 'amount': 15000.0, 'timestamp': 1, 'details': {}})
+        assert other.write_generation == start + 1
+        
+        self.db.insert_transaction({'tx_hash': '0xgen', 'amount': 15000.0, 'timestamp': 1, 'details': {}})
+        assert other.write_generation == start + 1  # duplicate, nothing written
+        
+        self.db.set_setting('key', 'value')
+        assert other.write_generation == start + 2
+        
+        # Poll bookkeeping does not invalidate cached responses
+        self.db.set_last_fetch_time(1700000000)
+        self.db.set_backfill_floor(5000)
+        assert other.write_generation == start + 2
+        
     def test_settings_get_set(self):
         """Test settings storage and retrieval."""
         # Set a setting
@@ -180,6 +494,47 @@ class TestDatabase:
         stored_time = self.db.get_last_fetch_time()
         assert stored_time == now
         
+    def test_wal_and_pragmas(self):
+        """Test connections use WAL journaling and the tuned pragmas."""
+        journal_mode = self.db.conn.execute('PRAGMA journal_mode').fetchone()[0]
+        synchronous = self.db.conn.execute('PRAGMA synchronous').fetchone()[0]
+        
+        assert journal_mode == 'wal'
+        assert synchronous == 1  # NORMAL
+        
+    def test_connection_per_thread(self):
+        """Test each thread reads through its own connection."""
+        self.db.set_setting('shared', 'value')
+        seen = {}
+        
+        def worker():
+            seen['conn'] = self.db.conn
+            seen['value'] = self.db.get_setting('shared')
+            
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        
+        assert seen['conn'] is not self.db.conn
+        assert seen['value'] == 'value'
+        
+    def test_released_connections_reused(self):
+        """Test a new thread takes a connection released by an earlier one."""
+        seen = []
+        
+        def request():
+            seen.append(self.db.conn)
+            self.db.get_setting('shared')
+            self.db.release_connection()
+            
+        for _ in range(2):
+            thread = threading.Thread(target=request)
+            thread.start()
+            thread.join()
+            
+        assert seen[0] is seen[1]
+        assert seen[0] is not self.db.conn
+        
     def test_context_manager(self):
         """Test using database as context manager."""
         # Close current connection
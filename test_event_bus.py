@@ -0,0 +1,46 @@
+"""Tests for the in-process event bus."""
+
+import pytest
+from event_bus import EventBus
+
+
+class TestEventBus:
+    """Test cases for EventBus class."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.bus = EventBus(max_queue_size=2)
+        
+    def test_publish_fans_out(self):
+        """Test every subscriber receives each event."""
+        first = self.bus.subscribe()
+        second = self.bus.subscribe()
+        
+        self.bus.publish({'tx_hash': '0xa'})
+        
+        assert first.get(timeout=0.1) == {'tx_hash': '0xa'}
+        assert second.get(timeout=0.1) == {'tx_hash': '0xa'}
+        assert first.get(timeout=0.01) is None
+        
+    def test_slow_subscriber_dropped(self):
+        """Test a full queue drops the subscriber without blocking the publisher."""
+        slow = self.bus.subscribe()
+        fast = self.bus.subscribe()
+        
+        for i in range(3):
+            self.bus.publish({'tx_hash': f'0x{i}'})
+            fast.get(timeout=0.1)
+            
+        assert slow.closed is True
+        assert fast.closed is False
+        assert self.bus.subscriber_count == 1
+        
+    def test_unsubscribe(self):
+        """Test unsubscribed subscribers stop receiving events."""
+        subscription = self.bus.subscribe()
+        self.bus.unsubscribe(subscription)
+        
+        self.bus.publish({'tx_hash': '0xa'})
+        
+        assert subscription.get(timeout=0.01) is None
+        assert self.bus.subscriber_count == 0
@@ -0,0 +1,148 @@
+"""Tests for notification coalescing and rate limiting."""
+
+import threading
+import time
+import pytest
+from conftest import make_trade
+from notification_dispatcher import NotificationDispatcher, TokenBucket, format_summary, format_trade
+
+
+class TestTokenBucket:
+    """Test cases for TokenBucket class."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.now = 0.0
+        self.bucket = TokenBucket(rate=0.5, capacity=2, clock=lambda: self.now)
+        
+    def test_burst_then_limit(self):
+        """Test the bucket allows a burst, then refuses."""
+        assert self.bucket.try_acquire()
+        assert self.bucket.try_acquire()
+        assert not self.bucket.try_acquire()
+        assert self.bucket.wait_time() == pytest.approx(2.0)
+        
+    def test_refill(self):
+        """Test tokens come back at the configured rate, up to capacity."""
+        self.bucket.try_acquire()
+        self.bucket.try_acquire()
+        
+        self.now = 2.0
+        assert self.bucket.try_acquire()
+        assert not self.bucket.try_acquire()
+        
+        self.now = 100.0
+        assert self.bucket.tokens <= 2
+        assert self.bucket.try_acquire()
+        assert self.bucket.try_acquire()
+        assert not self.bucket.try_acquire()
+
+
+class TestFormatting:
+    """Test cases for notification text."""
+    
+    def test_single_trade(self):
+        """Test a single trade keeps the detailed format."""
+        title, body = format_trade(make_trade(1, 12500.0))
+        
+        assert title == "🐋 Whale Trade: $12,500.00"
+        assert body.startswith("A\nSide: BUY\nTime: ")
+        
+    def test_unusual_trade(self):
+        """Test a trade flagged by the anomaly detector says so."""
+        trade = make_trade(1, 12500.0)
+        trade['anomaly'] = {'threshold': 4000.0, 'quantile': 0.995, 'z_score': 4.2, 'sample_count': 80}
+        title, body = format_trade(trade)
+        
+        assert title == "🐋 Unusual Trade: $12,500.00"
+        assert "Above p99.5 for this market ($4,000)\n" in body
+        
+    def test_summary(self):
+        """Test a burst is summarised with count, total and top trade."""
+        trades = [make_trade(i, 100000.0) for i in range(11)] + [make_trade(99, 300000.0)]
+        title, body = format_summary(trades)
+        
+        assert title == "🐋 12 whale trades, $1.4M total"
+        assert body == "Top: $300,000 BUY on A"
+        
+    def test_summary_labels_what_matched(self):
+        """Test a burst of rule matches and unusual trades is not called whale trades."""
+        rule_match = dict(make_trade(1, 2000.0), alert_rules=['watchlist'])
+        unusual = dict(make_trade(2, 3000.0), alert_rules=[], anomaly={'threshold': 1000.0, 'quantile': 0.995})
+        whale = dict(make_trade(3, 20000.0), alert_rules=['whale'])
+        
+        assert format_trade(rule_match)[0] == "🐋 watchlist: $2,000.00"
+        assert format_summary([rule_match, rule_match])[0] == "🐋 2 alert rule matches, $4,000 total"
+        
+        title, body = format_summary([rule_match, unusual, whale])
+        assert title == "🐋 3 trades, $25,000 total"
+        assert body.endswith("\nMatched: 1 whale, 1 unusual, 1 alert rule")
+
+
+class TestNotificationDispatcher:
+    """Test cases for NotificationDispatcher class."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.sent = []
+        self.delivered = threading.Event()
+        
+    def send(self, title, body):
+        """Record a notification."""
+        self.sent.append((title, body))
+        self.delivered.set()
+        
+    def test_submit_does_not_block(self):
+        """Test submitting is immediate even when sending is slow."""
+        dispatcher = NotificationDispatcher(lambda title, body: time.sleep(1), coalesce_seconds=0)
+        dispatcher.start()
+        
+        started = time.monotonic()
+        for i in range(50):
+            dispatcher.submit(make_trade(i))
+        assert time.monotonic() - started < 0.1
+        dispatcher.stop(timeout=0)
+        
+    def test_burst_coalesced(self):
+        """Test trades within the window produce one summary."""
+        dispatcher = NotificationDispatcher(self.send, coalesce_seconds=0.2)
+        dispatcher.start()
+        
+        for i in range(5):
+            dispatcher.submit(make_trade(i))
+        assert self.delivered.wait(2)
+        dispatcher.stop()
+        
+        assert len(self.sent) == 1
+        assert self.sent[0][0].startswith("🐋 5 whale trades")
+        
+    def test_rate_limited_trades_join_summary(self):
+        """Test trades arriving while rate limited join the next summary."""
+        dispatcher = NotificationDispatcher(self.send, coalesce_seconds=0, rate_per_minute=60, burst=1)
+        dispatcher.start()
+        
+        dispatcher.submit(make_trade(0))
+        assert self.delivered.wait(2)
+        self.delivered.clear()
+        
+        for i in range(1, 4):
+            dispatcher.submit(make_trade(i))
+        assert self.delivered.wait(3)
+        dispatcher.stop()
+        
+        assert len(self.sent) == 2
+        assert self.sent[0][0] == "🐋 Whale Trade: $20,000.00"
+        assert self.sent[1][0].startswith("🐋 3 whale trades")
+        
+    def test_send_errors_are_contained(self):
+        """Test a failing send does not kill the worker."""
+        def failing_send(title, body):
+            raise RuntimeError("no D-Bus")
+            
+        dispatcher = NotificationDispatcher(failing_send, coalesce_seconds=0)
+        dispatcher.start()
+        dispatcher.submit(make_trade(0))
+        time.sleep(0.1)
+        
+        assert dispatcher.thread.is_alive()
+        dispatcher.stop()
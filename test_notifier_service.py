@@ -0,0 +1,207 @@
+"""Tests for the background notifier service."""
+
+import threading
+import time
+import pytest
+from adaptive_scheduler import AdaptivePollInterval
+from conftest import make_trade
+from trade_window import TradeWindow
+
+notifier_service = pytest.importorskip('notifier_service')
+
+
+class FakeAPI:
+    """Trade source returning fixed pages."""
+    
+    def __init__(self, pages):
+        """Initialize with the pages every poll returns."""
+        self.pages = pages
+        self.whale_threshold = 0.0
+        self.session = None
+        
+    def iter_trade_pages(self, start_time=None, stop_at_hash=None):
+        """Yield the fixed pages."""
+        yield from self.pages
+
+
+class FakeBackfill:
+    """Stands in for AsyncPolymarketAPI, returning fixed trades to backfills."""
+    
+    trades = []
+    calls = []
+    
+    def __init__(self, api):
+        """Initialize around an API client (ignored)."""
+        
+    def backfill(self, start_time, end_time):
+        """Record the requested window and return the fixed trades."""
+        FakeBackfill.calls.append((start_time, end_time))
+        return list(FakeBackfill.trades)
+
+
+class TestNotifierService:
+    """Test cases for NotifierService class."""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self, db):
+        """Set up a service on a temporary database, without D-Bus."""
+        notifier_service.notify2.init = lambda name: None
+        self.service = notifier_service.NotifierService()
+        self.service.db = db
+        self.service.alert_rules = notifier_service.AlertRuleSet.load(db)
+        self.service.anomalies = notifier_service.AnomalyDetector(db)
+        self.service._send_notification = lambda trade: None
+        
+    def test_overlap_only_poll_backs_off(self):
+        """Test a poll that only re-reads the overlap counts as empty."""
+        trades = [make_trade(i) for i in range(3)]
+        self.service.db.insert_transactions(trades)
+        self.service.db.set_last_fetch_time(trades[-1]['timestamp'])
+        self.service.api = FakeAPI([trades])
+        
+        before = self.service.poll_interval.current
+        self.service._run_poll()
+        
+        assert self.service.status.trades_fetched == 3
+        assert self.service.status.trades_inserted == 0
+        assert self.service.poll_interval.current > before
+        
+    def test_new_trades_settle_interval(self):
+        """Test a poll storing new trades does not back off."""
+        self.service.db.set_last_fetch_time(1700000000)
+        self.service.api = FakeAPI([[make_trade(i) for i in range(3)]])
+        
+        before = self.service.poll_interval.current
+        self.service._run_poll()
+        
+        assert self.service.status.trades_inserted == 3
+        assert self.service.poll_interval.current <= before
+        
+    def test_backfill_keeps_old_trades_out_of_window(self, monkeypatch):
+        """Test backfilled trades older than the analytics window are not appended."""
+        now = int(time.time())
+        self.service.trade_window = TradeWindow(capacity=10)
+        self.service.feed_threshold = 1000.0
+        self.service.api = FakeAPI([])
+        FakeBackfill.trades = [
+            make_trade(1, 5000.0, timestamp=now - 3600),
+            make_trade(2, 5000.0, timestamp=now - 30 * 24 * 3600)
+        ]
+        monkeypatch.setattr(notifier_service, 'AsyncPolymarketAPI', FakeBackfill)
+        
+        self.service._backfill_band(1000.0, 10000.0)
+        
+        assert self.service.db.get_transaction_count() == 2
+        assert len(self.service.trade_window) == 1
+        assert self.service.trade_window.timestamp[0] == now - 3600
+        
+    def test_window_holds_feed_trades_only(self):
+        """Test a stored sub-threshold trade stays out of the window's whale volume."""
+        self.service.trade_window = TradeWindow(capacity=10)
+        self.service.feed_threshold = 10000.0
+        self.service.db.set_last_fetch_time(1700000000)
+        self.service.api = FakeAPI([[make_trade(1, 20000.0), make_trade(2, 5000.0)]])
+        
+        self.service._run_poll()
+        
+        assert self.service.db.get_transaction_count() == 2
+        assert self.service.status.to_dict()['feed_trades'] == 1
+        volume = self.service.trade_window.rolling_volume(1700000000, 1700000010, 10)
+        assert volume['volume'] == [20000.0]
+        assert volume['count'] == [1]
+        
+    def test_retention_updates_status(self, monkeypatch):
+        """Test trades removed by retention leave the status count."""
+        now = int(time.time())
+        self.service.db.insert_transactions([
+            make_trade(1, timestamp=now - 400 * 24 * 3600),
+            make_trade(2, timestamp=now)
+        ])
+        self.service.status.load(self.service.db.get_transaction_count(), now)
+        engine = notifier_service.RetentionEngine
+        monkeypatch.setattr(
+            notifier_service, 'RetentionEngine',
+            lambda db: engine(db, retention_days=30, batch_pause=0, archive_format=None)
+        )
+        
+        self.service._apply_retention()
+        
+        assert self.service.db.get_transaction_count() == 1
+        assert self.service.status.to_dict()['total_trades'] == 1
+        
+    def test_backfill_starts_at_oldest_stored_trade(self, monkeypatch):
+        """Test the band is only fetched over the history actually stored."""
+        now = int(time.time())
+        self.service.db.insert_transactions([make_trade(1, timestamp=now - 2 * 24 * 3600)])
+        self.service.api = FakeAPI([])
+        FakeBackfill.trades = []
+        FakeBackfill.calls = []
+        monkeypatch.setattr(notifier_service, 'AsyncPolymarketAPI', FakeBackfill)
+        monkeypatch.setattr(notifier_service.config, 'RETENTION_DAYS', 90)
+        
+        self.service._backfill_band(1000.0, 10000.0)
+        
+        assert FakeBackfill.calls[0][0] == now - 2 * 24 * 3600
+        
+    def test_backfill_floor_persists(self, monkeypatch):
+        """Test a band already backfilled is not fetched again after raise and lower."""
+        monkeypatch.setattr(notifier_service.config, 'ANOMALY_MIN_AMOUNT', None)
+        self.service.db.set_whale_threshold(10000)
+        self.service.db.set_backfill_floor(10000)
+        self.service.alert_rules = notifier_service.AlertRuleSet.load(self.service.db)
+        self.service.api = FakeAPI([])
+        self.service.is_running = True
+        FakeBackfill.trades = []
+        monkeypatch.setattr(notifier_service, 'AsyncPolymarketAPI', FakeBackfill)
+        
+        assert self.service.update_threshold(5000) is True
+        self.service._backfill_band(5000, 10000)
+        assert self.service.db.get_backfill_floor() == 5000
+        
+        assert self.service.update_threshold(20000) is False
+        assert self.service.update_threshold(5000) is False
+        assert self.service.update_threshold(2000) is True
+        backfills = [job.args for job in self.service.scheduler.get_jobs() if job.id.startswith('backfill_band')]
+        assert backfills == [(5000, 10000), (2000, 5000)]
+        assert self.service.scheduler.get_job('rebuild_aggregates') is not None
+        
+    def test_unusual_small_trade_reaches_feed(self):
+        """Test a sub-threshold trade unusual for its market is stored, notified and fed."""
+        self.service.anomalies = notifier_service.AnomalyDetector(self.service.db, min_samples=5)
+        self.service.feed_threshold = 10000.0
+        notified, fed = [], []
+        self.service._send_notification = notified.append
+        self.service.on_new_trades = fed.extend
+        self.service.db.set_last_fetch_time(1700000000)
+        page = [make_trade(i, 1000.0) for i in range(20)] + [make_trade(20, 5000.0)]
+        self.service.api = FakeAPI([page])
+        
+        self.service._run_poll()
+        self.service._run_poll()
+        
+        assert [trade['tx_hash'] for trade in notified] == ['0x20']
+        assert [(row['tx_hash'], row['unusual']) for row in fed] == [('0x20', True)]
+        feed = self.service.db.get_transactions_page(10, min_amount=10000.0)
+        assert [tx['tx_hash'] for tx in feed] == ['0x20']
+        # The overlap re-read on the second poll is not counted again
+        assert self.service.anomalies.baseline('a').sample_count == 21
+        
+    def test_scheduled_polls_keep_running(self):
+        """Test the poll job survives consecutive runs on a real scheduler."""
+        polls = []
+        second_poll = threading.Event()
+        
+        def poll():
+            polls.append(time.monotonic())
+            if len(polls) == 2:
+                second_poll.set()
+                
+        self.service.db.set_last_fetch_time(1700000000)
+        self.service.poll_interval = AdaptivePollInterval(base_seconds=0.05, min_seconds=0.05, max_seconds=0.1, jitter=0)
+        self.service._poll_trades = poll
+        self.service.start()
+        try:
+            assert second_poll.wait(5)
+            assert self.service.scheduler.get_job('poll_trades') is not None
+        finally:
+            self.service.stop()
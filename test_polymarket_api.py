@@ -1,9 +1,12 @@
 """Tests for Polymarket API client."""
 
+import asyncio
 import pytest
+import threading
+import time
 from unittest.mock import Mock, patch
 from datetime import datetime
-from polymarket_api import PolymarketAPI
+from polymarket_api import AsyncPolymarketAPI, PolymarketAPI
 import config
 
 
@@ -19,8 +22,18 @@ class TestPolymarketAPI:
         assert self.api.base_url == config.POLYMARKET_API_BASE
         assert self.api.trades_endpoint == config.TRADES_ENDPOINT
         assert self.api.timeout == config.API_TIMEOUT
+        assert self.api.connect_timeout == config.API_CONNECT_TIMEOUT
         
-    @patch('polymarket_api.requests.get')
+    def test_clients_share_pooled_session(self):
+        """Test API clients reuse one keep-alive session by default."""
+        other = PolymarketAPI(whale_threshold=50000)
+        
+        assert other.session is self.api.session
+        assert 'gzip' in self.api.session.headers['Accept-Encoding']
+        adapter = self.api.session.get_adapter(config.TRADES_ENDPOINT)
+        assert adapter._pool_maxsize == config.HTTP_POOL_MAXSIZE
+        
+    @patch('polymarket_api.requests.Session.get')
     def test_fetch_trades_success(self, mock_get):
         """Test successful trade fetching."""
         # Mock API response
@@ -54,7 +67,7 @@ class TestPolymarketAPI:
         assert trades[0]['side'] == 'BUY'
         assert trades[0]['market_name'] == 'Test Market?'
         
-    @patch('polymarket_api.requests.get')
+    @patch('polymarket_api.requests.Session.get')
     def test_fetch_trades_api_error(self, mock_get):
         """Test handling of API errors."""
         mock_get.side_effect = Exception("API Error")
@@ -79,7 +92,7 @@ class TestPolymarketAPI:
         # Should skip invalid trades
         assert len(trades) == 0
         
-    @patch('polymarket_api.requests.get')
+    @patch('polymarket_api.requests.Session.get')
     def test_fetch_initial_trades_24hr(self, mock_get):
         """Test initial fetch tries 24 hours first."""
         mock_response = Mock()
@@ -105,7 +118,7 @@ class TestPolymarketAPI:
         assert mock_get.call_count == 1
         assert len(trades) == 1
         
-    @patch('polymarket_api.requests.get')
+    @patch('polymarket_api.requests.Session.get')
     def test_fetch_initial_trades_fallback_7days(self, mock_get):
         """Test initial fetch falls back to 7 days if no 24hr results."""
         mock_response_empty = Mock()
@@ -136,3 +149,122 @@ class TestPolymarketAPI:
         # Should have called API twice (24hr + 7day)
         assert mock_get.call_count == 2
         assert len(trades) == 1
+        
+    @patch('polymarket_api.requests.Session.get')
+    def test_iter_trade_pages_walks_offsets(self, mock_get):
+        """Test pagination continues past a full page and stops on a short one."""
+        def page(start, count):
+            mock_response = Mock()
+            mock_response.json.return_value = [
+                {
+                    'transactionHash': f'0x{i}',
+                    'price': '0.5',
+                    'size': '25000',
+                    'side': 'BUY',
+                    'timestamp': 1700000000 - i
+                }
+                for i in range(start, start + count)
+            ]
+            return mock_response
+            
+        mock_get.side_effect = [page(0, 2), page(2, 2), page(4, 1)]
+        
+        pages = list(self.api.iter_trade_pages(page_size=2))
+        
+        assert [len(p) for p in pages] == [2, 2, 1]
+        assert mock_get.call_count == 3
+        offsets = [c.kwargs['params'].get('offset', 0) for c in mock_get.call_args_list]
+        assert offsets == [0, 2, 4]
+        
+    @patch('polymarket_api.requests.Session.get')
+    def test_iter_trade_pages_stops_at_known_hash(self, mock_get):
+        """Test pagination stops once the newest stored hash is reached."""
+        mock_response = Mock()
+        mock_response.json.return_value = [
+            {
+                'transactionHash': f'0x{i}',
+                'price': '0.5',
+                'size': '25000',
+                'side': 'BUY',
+                'timestamp': 1700000000 - i
+            }
+            for i in range(2)
+        ]
+        mock_get.return_value = mock_response
+        
+        pages = list(self.api.iter_trade_pages(stop_at_hash='0x1', page_size=2))
+        
+        assert mock_get.call_count == 1
+        assert len(pages) == 1
+
+
+class TestAsyncPolymarketAPI:
+    """Test cases for AsyncPolymarketAPI class."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.api = PolymarketAPI()
+        self.engine = AsyncPolymarketAPI(self.api, concurrency=4, slice_seconds=3600)
+        
+    def test_split_range(self):
+        """Test ranges are split into contiguous slices, newest first."""
+        slices = AsyncPolymarketAPI.split_range(0, 9000, 3600)
+        
+        assert slices == [(5400, 9000), (1800, 5400), (0, 1800)]
+        
+    def test_fetch_range_runs_slices_concurrently(self):
+        """Test slices overlap in time and results are merged and deduped."""
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+        
+        def fake_fetch_all(start_time, end_time):
+            with lock:
+                in_flight.append(start_time)
+                peak.append(len(in_flight))
+            time.sleep(0.05)
+            with lock:
+                in_flight.remove(start_time)
+            return [
+                {'tx_hash': f'0x{start_time}', 'timestamp': start_time},
+                {'tx_hash': '0xshared', 'timestamp': 0}
+            ]
+            
+        with patch.object(self.api, 'fetch_all_trades', side_effect=fake_fetch_all):
+            trades = self.engine.backfill(0, 8 * 3600)
+            
+        assert max(peak) == 4
+        assert len(trades) == 9
+        assert [t['timestamp'] for t in trades] == sorted(
+            (t['timestamp'] for t in trades), reverse=True
+        )
+        
+    def test_fetch_initial_trades_tries_24h_first(self):
+        """Test the 7-day fallback is only fetched when the last 24 hours are empty."""
+        calls = []
+        
+        def fake_fetch_all(start_time, end_time):
+            calls.append((start_time, end_time))
+            return [{'tx_hash': f'0x{start_time}', 'timestamp': end_time}]
+            
+        with patch.object(self.api, 'fetch_all_trades', side_effect=fake_fetch_all):
+            trades = asyncio.run(self.engine.fetch_initial_trades())
+            
+        assert len(calls) == config.INITIAL_FETCH_HOURS
+        assert len(trades) == config.INITIAL_FETCH_HOURS
+        
+    def test_fetch_initial_trades_fallback(self):
+        """Test an empty day falls back to the older part of the 7-day window."""
+        calls = []
+        
+        def fake_fetch_all(start_time, end_time):
+            calls.append((start_time, end_time))
+            if len(calls) <= config.INITIAL_FETCH_HOURS:
+                return []
+            return [{'tx_hash': f'0x{start_time}', 'timestamp': start_time}]
+            
+        with patch.object(self.api, 'fetch_all_trades', side_effect=fake_fetch_all):
+            trades = asyncio.run(self.engine.fetch_initial_trades())
+            
+        assert len(calls) == config.FALLBACK_FETCH_DAYS * 24
+        assert len(trades) == (config.FALLBACK_FETCH_DAYS - 1) * 24
@@ -0,0 +1,47 @@
+"""Tests for the response cache."""
+
+import pytest
+from response_cache import ResponseCache
+
+
+class TestResponseCache:
+    """Test cases for ResponseCache class."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.cache = ResponseCache(max_entries=2)
+        self.builds = 0
+        
+    def build(self):
+        """Count payload builds."""
+        self.builds += 1
+        return {'success': True, 'builds': self.builds}
+        
+    def test_hit_at_same_generation(self):
+        """Test a response is built once per generation."""
+        etag1, body1 = self.cache.get('status', 1, self.build)
+        etag2, body2 = self.cache.get('status', 1, self.build)
+        
+        assert self.builds == 1
+        assert (etag1, body1) == (etag2, body2)
+        assert body1 == b'{"success":true,"builds":1}'
+        
+    def test_rebuild_after_write(self):
+        """Test a new generation invalidates the entry and changes the ETag."""
+        etag1, _ = self.cache.get('status', 1, self.build)
+        etag2, body2 = self.cache.get('status', 2, self.build)
+        
+        assert self.builds == 2
+        assert etag1 != etag2
+        assert b'"builds":2' in body2
+        
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted."""
+        self.cache.get('a', 1, self.build)
+        self.cache.get('b', 1, self.build)
+        self.cache.get('a', 1, self.build)
+        self.cache.get('c', 1, self.build)
+        self.cache.get('a', 1, self.build)
+        self.cache.get('b', 1, self.build)
+        
+        assert self.builds == 4
@@ -0,0 +1,93 @@
+"""Tests for the retention engine."""
+
+import pytest
+import gzip
+import json
+import os
+from retention import RetentionEngine
+
+NOW = 1700000000
+DAY = 24 * 3600
+
+
+class TestRetentionEngine:
+    """Test cases for RetentionEngine class."""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self, db, tmp_path):
+        """Set up test fixtures with a temporary database and archive dir."""
+        self.db = db
+        self.archive_dir = os.path.join(tmp_path, 'archive')
+        os.mkdir(self.archive_dir)
+        
+        trades = []
+        for i in range(5):
+            trades.append({
+                'tx_hash': f'0xold{i}',
+                'amount': 10000.0 * (i + 1),
+                'market_name': 'Old Market',
+                'market_id': 'old-market',
+                'side': 'BUY' if i % 2 == 0 else 'SELL',
+                'timestamp': NOW - 40 * DAY + i,
+                'details': {'raw_data': {'transactionHash': f'0xold{i}'}}
+            })
+        trades.append({
+            'tx_hash': '0xrecent',
+            'amount': 50000.0,
+            'market_id': 'old-market',
+            'side': 'BUY',
+            'timestamp': NOW - DAY,
+            'details': {}
+        })
+        self.db.insert_transactions(trades)
+        
+    def test_expires_in_batches_and_rolls_up(self):
+        """Test old trades are deleted in batches and aggregated per market and day."""
+        engine = RetentionEngine(self.db, retention_days=30, batch_size=2, batch_pause=0, archive_format=None)
+        
+        assert engine.run(now=NOW) == 5
+        
+        assert self.db.get_transaction_count() == 1
+        assert self.db.get_all_transactions()[0]['tx_hash'] == '0xrecent'
+        
+        day = ((NOW - 40 * DAY) // DAY) * DAY
+        rollups = self.db.get_daily_rollups(day, day)
+        assert len(rollups) == 1
+        assert rollups[0]['market_id'] == 'old-market'
+        assert rollups[0]['trade_count'] == 5
+        assert rollups[0]['volume'] == 150000.0
+        assert rollups[0]['buy_volume'] == 90000.0
+        assert rollups[0]['sell_volume'] == 60000.0
+        assert rollups[0]['max_amount'] == 50000.0
+        
+        remaining_raw = self.db.conn.execute('SELECT COUNT(*) FROM trade_raw').fetchone()[0]
+        assert remaining_raw == 0
+        
+    def test_ndjson_archive(self):
+        """Test expired trades are exported with their raw payloads."""
+        engine = RetentionEngine(
+            self.db, retention_days=30, batch_size=2, batch_pause=0,
+            archive_format='ndjson', archive_dir=self.archive_dir
+        )
+        engine.run(now=NOW)
+        
+        files = os.listdir(self.archive_dir)
+        assert len(files) == 1
+        assert files[0].endswith('.ndjson.gz')
+        
+        with gzip.open(os.path.join(self.archive_dir, files[0]), 'rt') as f:
+            rows = [json.loads(line) for line in f]
+        assert [row['tx_hash'] for row in rows] == [f'0xold{i}' for i in range(5)]
+        assert rows[0]['raw_data'] == {'transactionHash': '0xold0'}
+        
+    def test_disabled(self):
+        """Test a zero retention window keeps everything."""
+        engine = RetentionEngine(self.db, retention_days=0, archive_format=None)
+        
+        assert engine.run(now=NOW) == 0
+        assert self.db.get_transaction_count() == 6
+        
+    def test_unknown_archive_format(self):
+        """Test an unsupported archive format is rejected up front."""
+        with pytest.raises(ValueError):
+            RetentionEngine(self.db, archive_format='csv')
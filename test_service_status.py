@@ -0,0 +1,71 @@
+"""Tests for the service status snapshot."""
+
+import pytest
+from service_status import ServiceStatus
+
+
+class TestServiceStatus:
+    """Test cases for ServiceStatus class."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.status = ServiceStatus()
+        self.status.load(total_trades=10, last_fetch=1700000000)
+        
+    def test_load(self):
+        """Test the snapshot is seeded from the database values."""
+        snapshot = self.status.to_dict()
+        
+        assert snapshot['total_trades'] == 10
+        assert snapshot['last_fetch'] == 1700000000
+        assert snapshot['api_errors'] == 0
+        
+    def test_record_successful_poll(self):
+        """Test a poll updates counters, stats and version."""
+        version = self.status.version
+        
+        self.status.record_inserted(3)
+        self.status.record_poll(1700000300, 1.23456, fetched=5, inserted=3, ok=True, last_fetch=1700000300)
+        snapshot = self.status.to_dict()
+        
+        assert snapshot['total_trades'] == 13
+        assert snapshot['trades_fetched'] == 5
+        assert snapshot['trades_inserted'] == 3
+        assert snapshot['last_poll_duration'] == 1.235
+        assert snapshot['last_poll_ok'] is True
+        assert snapshot['last_fetch'] == 1700000300
+        assert self.status.version > version
+        
+    def test_record_failed_poll(self):
+        """Test a failed poll counts an API error and keeps last_fetch."""
+        self.status.record_poll(1700000300, 30.0, fetched=0, inserted=0, ok=False)
+        snapshot = self.status.to_dict()
+        
+        assert snapshot['api_errors'] == 1
+        assert snapshot['last_poll_ok'] is False
+        assert snapshot['last_fetch'] == 1700000000
+        
+    def test_record_deleted(self):
+        """Test retention deletions lower the count and change the version."""
+        version = self.status.version
+        
+        self.status.record_deleted(4)
+        
+        assert self.status.to_dict()['total_trades'] == 6
+        assert self.status.version > version
+        
+        version = self.status.version
+        self.status.record_deleted(0)
+        assert self.status.version == version
+        
+    def test_feed_trades(self):
+        """Test trades stored only for rules or baselines are kept out of the feed count."""
+        self.status.record_inserted(5, feed_count=2)
+        snapshot = self.status.to_dict()
+        assert snapshot['total_trades'] == 15
+        assert snapshot['feed_trades'] == 12
+        
+        version = self.status.version
+        self.status.set_feed_trades(9)
+        assert self.status.to_dict()['feed_trades'] == 9
+        assert self.status.version > version
@@ -0,0 +1,120 @@
+"""Tests for the rolling-window trade analytics."""
+
+import pytest
+from conftest import make_trade
+from trade_window import TradeWindow
+
+
+class TestTradeWindow:
+    """Test cases for TradeWindow class."""
+    
+    def test_append_wraps_around(self):
+        """Test the oldest trades are overwritten once the buffer is full."""
+        window = TradeWindow(capacity=3)
+        window.append([make_trade(i, 1000.0 * i, 100 + i) for i in range(1, 5)])
+        
+        assert len(window) == 3
+        assert sorted(window.id.tolist()) == [2, 3, 4]
+        
+        window.append([make_trade(5, 5000.0, 105)])
+        assert sorted(window.id.tolist()) == [3, 4, 5]
+        
+    def test_rolling_volume(self):
+        """Test volume and count are bucketed by time."""
+        window = TradeWindow(capacity=10)
+        window.append([
+            make_trade(1, 1000.0, 1000),
+            make_trade(2, 2000.0, 1059),
+            make_trade(3, 4000.0, 1060),
+            make_trade(4, 8000.0, 900)  # before the window
+        ])
+        
+        result = window.rolling_volume(1000, 1180, 60)
+        assert result['starts'] == [1000, 1060, 1120]
+        assert result['volume'] == [3000.0, 4000.0, 0.0]
+        assert result['count'] == [2, 1, 0]
+        
+    def test_market_stats(self):
+        """Test per-market volume, VWAP and imbalance."""
+        window = TradeWindow(capacity=10)
+        window.append([
+            make_trade(1, 3000.0, 100, market='a', side='BUY', price=0.6, size=5000),
+            make_trade(2, 1000.0, 101, market='a', side='SELL', price=0.4, size=2500),
+            make_trade(3, 2000.0, 102, market='b', side='SELL', price=0.5, size=4000)
+        ])
+        
+        stats = window.market_stats(0)
+        assert [s['market_id'] for s in stats] == ['a', 'b']
+        assert stats[0]['market_name'] == 'A'
+        assert stats[0]['trade_count'] == 2
+        assert stats[0]['volume'] == 4000.0
+        assert stats[0]['vwap'] == pytest.approx((0.6 * 5000 + 0.4 * 2500) / 7500)
+        assert stats[0]['imbalance'] == pytest.approx(0.5)
+        assert stats[1]['imbalance'] == pytest.approx(-1.0)
+        
+        assert window.market_stats(102) == [
+            {'market_id': 'b', 'market_name': 'B', 'trade_count': 1,
+             'volume': 2000.0, 'vwap': 0.5, 'imbalance': -1.0}
+        ]
+        
+    def test_imbalance(self):
+        """Test buy and sell volume across markets."""
+        window = TradeWindow(capacity=10)
+        window.append([
+            make_trade(1, 6000.0, 100, side='BUY'),
+            make_trade(2, 2000.0, 100, market='b', side='SELL')
+        ])
+        
+        assert window.imbalance(0) == {'buy_volume': 6000.0, 'sell_volume': 2000.0, 'imbalance': 0.5}
+        assert window.imbalance(200)['imbalance'] == 0.0
+        
+    def test_anomalies(self):
+        """Test a trade far above its market's usual size is flagged."""
+        window = TradeWindow(capacity=100)
+        window.append([make_trade(i, 10000.0 + 100 * (i % 5), 100 + i) for i in range(1, 31)])
+        window.append([make_trade(31, 500000.0, 200)])
+        window.append([make_trade(40 + i, 500000.0, 100 + i, market='b') for i in range(3)])
+        
+        flagged = window.anomalies(0, z_threshold=3.0, min_samples=10)
+        assert [(f['id'], f['market_id']) for f in flagged] == [(31, 'a')]
+        assert flagged[0]['z_score'] >= 3.0
+        
+        assert window.anomalies(0, z_threshold=3.0, min_samples=50) == []
+        
+    def test_anomaly_at_min_samples(self):
+        """Test a lone outlier is flagged when its market has exactly min_samples trades."""
+        window = TradeWindow(capacity=100)
+        window.append([make_trade(i, 10000.0 + 100 * (i % 3), 100 + i) for i in range(1, 10)])
+        window.append([make_trade(10, 500000.0, 200)])
+        
+        flagged = window.anomalies(0, z_threshold=3.0, min_samples=10)
+        assert [f['id'] for f in flagged] == [10]
+        assert flagged[0]['z_score'] > 3.0
+        assert window.anomalies(0, z_threshold=3.0, min_samples=11) == []
+        
+    def test_empty_window(self):
+        """Test statistics over an empty window."""
+        window = TradeWindow(capacity=10)
+        
+        assert window.market_stats(0) == []
+        assert window.anomalies(0) == []
+        assert window.rolling_volume(0, 60, 60)['volume'] == [0.0]
+        
+    def test_load_from_database(self, db):
+        """Test seeding the window from stored trades."""
+        db.insert_transactions([
+            make_trade(i, 1000.0 * i, 100 * i, size=2000.0 * i) for i in range(1, 5)
+        ])
+        
+        trades = db.get_window_trades(200, 2)
+        assert [t['timestamp'] for t in trades] == [300, 400]
+        assert trades[0]['price'] == 0.5
+        assert trades[0]['size'] == 6000.0
+        assert [t['timestamp'] for t in db.get_window_trades(0, 10, min_amount=2500)] == [300, 400]
+        
+        # Only trades the feed shows are loaded
+        db.set_whale_threshold(2500)
+        window = TradeWindow(capacity=10)
+        window.load(db, 200)
+        assert len(window) == 2
+        assert window.market_stats(0)[0]['vwap'] == 0.5
@@ -0,0 +1,284 @@
+"""Rolling-window trade analytics over a columnar NumPy ring buffer."""
+
+import threading
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import config
+
+
+SIDE_CODES = {'BUY': 1, 'SELL': -1}
+
+
+class TradeWindow:
+    """Recent trades held as NumPy columns in a fixed-size ring buffer.
+    
+    The poller appends each batch of trades the feed shows; the oldest rows are
+    overwritten once the buffer is full. Every statistic is computed with
+    vectorized operations over the rows inside the requested time window,
+    so no request walks Python dictionaries. Markets are stored as integer
+    codes so per-market figures are a single np.bincount each.
+    """
+    
+    def __init__(self, capacity: int = config.TRADE_WINDOW_SIZE):
+        """
+        Initialize an empty window.
+        
+        Args:
+            capacity: Maximum number of trades held
+        """
+        self.capacity = capacity
+        self.id = np.zeros(capacity, dtype=np.int64)
+        self.amount = np.zeros(capacity, dtype=np.float64)
+        self.price = np.zeros(capacity, dtype=np.float64)
+        self.size = np.zeros(capacity, dtype=np.float64)
+        self.timestamp = np.zeros(capacity, dtype=np.int64)
+        self.side = np.zeros(capacity, dtype=np.int8)
+        self.market = np.zeros(capacity, dtype=np.int32)
+        
+        self.market_codes: Dict[str, int] = {}
+        self.market_ids: List[str] = []
+        self.market_names: List[Optional[str]] = []
+        self.appended = 0
+        self._lock = threading.Lock()
+        
+    def __len__(self) -> int:
+        """Number of trades currently held."""
+        return min(self.appended, self.capacity)
+        
+    def _market_code(self, market_id: str, market_name: Optional[str]) -> int:
+        """Get (or assign) the integer code of a market."""
+        code = self.market_codes.get(market_id)
+        if code is None:
+            code = self.market_codes[market_id] = len(self.market_ids)
+            self.market_ids.append(market_id)
+            self.market_names.append(market_name)
+        elif market_name:
+            self.market_names[code] = market_name
+        return code
+        
+    def append(self, trades: Iterable[Dict]):
+        """
+        Add trades to the window, overwriting the oldest once full.
+        
+        Args:
+            trades: Trade dictionaries as stored by Database.insert_transactions
+                (details carry price and size) or returned by
+                Database.get_window_trades
+        """
+        trades = list(trades)[-self.capacity:]
+        if not trades:
+            return
+            
+        with self._lock:
+            ids = np.array([trade.get('id') or 0 for trade in trades], dtype=np.int64)
+            amounts = np.array([trade.get('amount') or 0.0 for trade in trades], dtype=np.float64)
+            prices = np.array([_detail(trade, 'price') for trade in trades], dtype=np.float64)
+            sizes = np.array([_detail(trade, 'size') for trade in trades], dtype=np.float64)
+            timestamps = np.array([trade.get('timestamp') or 0 for trade in trades], dtype=np.int64)
+            sides = np.array([SIDE_CODES.get(trade.get('side'), 0) for trade in trades], dtype=np.int8)
+            markets = np.array([
+                self._market_code(trade.get('market_id') or '', trade.get('market_name'))
+                for trade in trades
+            ], dtype=np.int32)
+            
+            slots = (self.appended + np.arange(len(trades))) % self.capacity
+            self.id[slots] = ids
+            self.amount[slots] = amounts
+            self.price[slots] = prices
+            self.size[slots] = sizes
+            self.timestamp[slots] = timestamps
+            self.side[slots] = sides
+            self.market[slots] = markets
+            self.appended += len(trades)
+            
+    def load(self, db, since: int):
+        """
+        Seed the window from the database with the trades the feed shows.
+        
+        Args:
+            db: Connected database
+            since: Oldest trade timestamp to load
+        """
+        self.append(db.get_window_trades(since, self.capacity, min_amount=db.get_whale_threshold()))
+        
+    def _select(self, since: int) -> np.ndarray:
+        """Slot indices of the held trades at or after since."""
+        held = np.arange(len(self))
+        return held[self.timestamp[held] >= since]
+        
+    def rolling_volume(self, since: int, until: int, bucket_seconds: int) -> Dict:
+        """
+        Whale volume and trade count per time bucket.
+        
+        Args:
+            since: Window start (Unix timestamp)
+            until: Window end (Unix timestamp)
+            bucket_seconds: Bucket width
+            
+        Returns:
+            Dictionary with bucket start times, volumes and counts
+        """
+        with self._lock:
+            rows = self._select(since)
+            rows = rows[self.timestamp[rows] < until]
+            buckets = (self.timestamp[rows] - since) // bucket_seconds
+            amounts = self.amount[rows]
+            
+        length = max(1, -(-(until - since) // bucket_seconds))
+        return {
+            'bucket_seconds': bucket_seconds,
+            'starts': (since + np.arange(length) * bucket_seconds).tolist(),
+            'volume': np.bincount(buckets, weights=amounts, minlength=length).tolist(),
+            'count': np.bincount(buckets, minlength=length).tolist()
+        }
+        
+    def market_stats(self, since: int, limit: int = 20) -> List[Dict]:
+        """
+        Per-market volume, VWAP and buy/sell imbalance.
+        
+        VWAP is sum(price * size) / sum(size). Imbalance is
+        (buy volume - sell volume) / total volume, from -1 to 1.
+        
+        Args:
+            since: Window start (Unix timestamp)
+            limit: Maximum number of markets, by volume
+            
+        Returns:
+            List of market statistic dictionaries, largest volume first
+        """
+        with self._lock:
+            rows = self._select(since)
+            markets = self.market[rows]
+            amounts = self.amount[rows]
+            prices = self.price[rows]
+            sizes = self.size[rows]
+            sides = self.side[rows]
+            market_ids = list(self.market_ids)
+            market_names = list(self.market_names)
+            
+        length = len(market_ids)
+        if not len(rows) or not length:
+            return []
+            
+        volume = np.bincount(markets, weights=amounts, minlength=length)
+        count = np.bincount(markets, minlength=length)
+        notional = np.bincount(markets, weights=prices * sizes, minlength=length)
+        size = np.bincount(markets, weights=sizes, minlength=length)
+        signed = np.bincount(markets, weights=amounts * sides, minlength=length)
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            vwap = np.where(size > 0, notional / size, np.nan)
+            imbalance = np.where(volume > 0, signed / volume, 0.0)
+            
+        top = np.argsort(volume)[::-1][:limit]
+        top = top[count[top] > 0]
+        return [
+            {
+                'market_id': market_ids[code],
+                'market_name': market_names[code],
+                'trade_count': int(count[code]),
+                'volume': float(volume[code]),
+                'vwap': None if np.isnan(vwap[code]) else float(vwap[code]),
+                'imbalance': float(imbalance[code])
+            }
+            for code in top
+        ]
+        
+    def imbalance(self, since: int) -> Dict:
+        """
+        Buy and sell whale volume across all markets.
+        
+        Args:
+            since: Window start (Unix timestamp)
+            
+        Returns:
+            Dictionary with buy and sell volume and their imbalance
+        """
+        with self._lock:
+            rows = self._select(since)
+            amounts = self.amount[rows]
+            sides = self.side[rows]
+            
+        buy = float(amounts[sides > 0].sum())
+        sell = float(amounts[sides < 0].sum())
+        total = buy + sell
+        return {
+            'buy_volume': buy,
+            'sell_volume': sell,
+            'imbalance': (buy - sell) / total if total else 0.0
+        }
+        
+    def anomalies(
+        self,
+        since: int,
+        z_threshold: float = config.WINDOW_OUTLIER_Z_THRESHOLD,
+        min_samples: int = config.WINDOW_OUTLIER_MIN_SAMPLES
+    ) -> List[Dict]:
+        """
+        Flag trades unusually large for their market.
+        
+        Trade sizes are heavy-tailed, so the z-score is taken on log(amount)
+        against the mean and standard deviation of the market's other trades
+        within the window. Leaving the scored trade out keeps a lone outlier
+        from inflating its own baseline, which would cap its z-score at
+        sqrt(n - 1). Markets with fewer than min_samples trades are skipped.
+        
+        Args:
+            since: Window start (Unix timestamp)
+            z_threshold: Smallest z-score flagged
+            min_samples: Trades a market needs before it is scored
+            
+        Returns:
+            Flagged trades, highest z-score first
+        """
+        with self._lock:
+            rows = self._select(since)
+            markets = self.market[rows]
+            amounts = self.amount[rows]
+            ids = self.id[rows]
+            timestamps = self.timestamp[rows]
+            market_ids = list(self.market_ids)
+            
+        if not len(rows):
+            return []
+            
+        values = np.log(np.maximum(amounts, 1.0))
+        length = len(market_ids)
+        count = np.bincount(markets, minlength=length)
+        total = np.bincount(markets, weights=values, minlength=length)
+        squares = np.bincount(markets, weights=values * values, minlength=length)
+        
+        # Leave-one-out moments: each trade against the rest of its market
+        others = count[markets] - 1
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = (total[markets] - values) / others
+            std = np.sqrt(np.maximum((squares[markets] - values * values) / others - mean * mean, 0.0))
+            z = (values - mean) / std
+            
+        flagged = (count[markets] >= min_samples) & (std > 0) & (z >= z_threshold)
+        order = np.argsort(z[flagged])[::-1]
+        return [
+            {
+                'id': int(tx_id),
+                'market_id': market_ids[market],
+                'amount': float(amount),
+                'timestamp': int(timestamp),
+                'z_score': float(score)
+            }
+            for tx_id, market, amount, timestamp, score in zip(
+                ids[flagged][order], markets[flagged][order], amounts[flagged][order],
+                timestamps[flagged][order], z[flagged][order]
+            )
+        ]
+
+
+def _detail(trade: Dict, key: str) -> float:
+    """Read price or size from a trade, falling back to its details."""
+    value = trade.get(key)
+    if value is None:
+        details = trade.get('details')
+        value = details.get(key) if isinstance(details, dict) else None
+    try:
+        return float(value) if value is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
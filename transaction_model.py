@@ -0,0 +1,193 @@
+"""Table model that pages whale transactions in from the database on demand."""
+
+import bisect
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt5.QtGui import QBrush, QColor, QFont
+import config
+from database import Database
+
+
+class TransactionTableModel(QAbstractTableModel):
+    """Windowed view of the whale feed for a QTableView.
+    
+    Only the newest page is loaded up front. The view asks for more through
+    canFetchMore/fetchMore as the user scrolls, and each page is a keyset
+    seek, so opening and refreshing cost the same however large the table is.
+    Fonts and brushes are built once and shared by every cell.
+    """
+    
+    HEADERS = ["Timestamp", "Market", "Amount", "Side", "Outcome"]
+    
+    def __init__(self, db: Database, page_size: int = config.UI_PAGE_SIZE, parent=None):
+        """
+        Initialize the model.
+        
+        Args:
+            db: Connected database
+            page_size: Rows fetched per page
+            parent: Parent object
+        """
+        super().__init__(parent)
+        self.db = db
+        self.page_size = page_size
+        self.transactions: List[Dict] = []
+        self.min_amount = 0.0
+        self.latest_id = 0
+        self.at_end = False
+        
+        self.amount_font = QFont()
+        self.amount_font.setBold(True)
+        self.amount_brush = QBrush(QColor("#4CAF50"))  # Green
+        self.side_brushes = {
+            'BUY': QBrush(QColor("#2196F3")),  # Blue
+            'SELL': QBrush(QColor("#FF9800"))  # Orange
+        }
+        
+    def reload(self):
+        """Drop every loaded row and load the newest page at the current threshold."""
+        self.beginResetModel()
+        self.min_amount = self.db.get_whale_threshold()
+        self.transactions = self.db.get_transactions_page(self.page_size, min_amount=self.min_amount)
+        self.at_end = len(self.transactions) < self.page_size
+        self.latest_id = self.db.get_latest_transaction_id()
+        self.endResetModel()
+        
+    def fetch_new(self) -> int:
+        """
+        Add rows stored since the last load at the top.
+        
+        Returns:
+            Number of rows added
+        """
+        # One poll stores at most MAX_TRADE_PAGES pages
+        transactions = self.db.get_transactions_since(
+            self.latest_id, config.MAX_TRADE_PAGES * config.TRADES_LIMIT, min_amount=self.min_amount
+        )
+        self.prepend(transactions)
+        return len(transactions)
+        
+    def prepend(self, transactions: List[Dict]):
+        """
+        Insert transactions, newest first, at their place in the table.
+        
+        Live trades go above the loaded rows. Older ones, such as rows from
+        a threshold backfill, are slotted in by (timestamp, id); those older
+        than the last loaded row are left for fetchMore to page in.
+        
+        Args:
+            transactions: Transaction dictionaries with the feed columns
+        """
+        if not transactions:
+            return
+        self.latest_id = max(self.latest_id, *(tx['id'] for tx in transactions))
+        
+        known = {tx['id'] for tx in self.transactions}
+        transactions = sorted(
+            (tx for tx in transactions if tx['id'] not in known and (tx['amount'] >= self.min_amount or tx.get('unusual'))),
+            key=_order_key
+        )
+        if not transactions:
+            return
+            
+        top = _order_key(self.transactions[0]) if self.transactions else None
+        newer = [tx for tx in transactions if top is None or _order_key(tx) < top]
+        if newer:
+            self.beginInsertRows(QModelIndex(), 0, len(newer) - 1)
+            self.transactions[:0] = newer
+            self.endInsertRows()
+            
+        keys = [_order_key(tx) for tx in self.transactions]
+        for tx in transactions[len(newer):]:
+            key = _order_key(tx)
+            row = bisect.bisect_left(keys, key)
+            if row == len(keys) and not self.at_end:
+                continue
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.transactions.insert(row, tx)
+            keys.insert(row, key)
+            self.endInsertRows()
+            
+    def transaction(self, row: int) -> Optional[Dict]:
+        """Get the transaction shown in a row."""
+        if 0 <= row < len(self.transactions):
+            return self.transactions[row]
+        return None
+        
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Number of loaded rows."""
+        return 0 if parent.isValid() else len(self.transactions)
+        
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Number of columns."""
+        return 0 if parent.isValid() else len(self.HEADERS)
+        
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        """Whether older rows remain in the database."""
+        return not parent.isValid() and not self.at_end
+        
+    def fetchMore(self, parent: QModelIndex):
+        """Load the next older page after the last loaded row."""
+        if parent.isValid() or self.at_end:
+            return
+            
+        last = self.transactions[-1] if self.transactions else None
+        before = (last['timestamp'], last['id']) if last else None
+        page = self.db.get_transactions_page(self.page_size, before=before, min_amount=self.min_amount)
+        self.at_end = len(page) < self.page_size
+        if not page:
+            return
+            
+        start = len(self.transactions)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self.transactions.extend(page)
+        self.endInsertRows()
+        
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole) -> Any:
+        """Column titles."""
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+        
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        """Cell text, styling, and the row's tx_hash under Qt.UserRole."""
+        if not index.isValid():
+            return None
+            
+        tx = self.transactions[index.row()]
+        column = index.column()
+        
+        if role == Qt.DisplayRole:
+            if column == 0:
+                timestamp = tx.get('timestamp', 0)
+                if not timestamp:
+                    return 'N/A'
+                return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+            if column == 1:
+                return tx.get('market_name') or 'Unknown'
+            if column == 2:
+                return f"${tx.get('amount', 0):,.2f}"
+            if column == 3:
+                return tx.get('side') or 'N/A'
+            return tx.get('outcome') or 'N/A'
+            
+        if role == Qt.ForegroundRole:
+            if column == 2:
+                return self.amount_brush
+            if column == 3:
+                return self.side_brushes.get(tx.get('side'))
+            return None
+            
+        if role == Qt.FontRole and column == 2:
+            return self.amount_font
+            
+        if role == Qt.UserRole:
+            return tx['tx_hash']
+            
+        return None
+
+
+def _order_key(tx: Dict):
+    """Sort key putting the newest transaction first."""
+    return (-tx['timestamp'], -tx['id'])